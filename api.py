@@ -0,0 +1,492 @@
+"""HTTP API (ASGI) untuk klasifikasi alat musik, terpisah dari aplikasi Streamlit.
+
+Menjalankan server (butuh starlette, uvicorn dan python-multipart):
+    python api.py
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Endpoint:
+    GET  /healthz        status model; 503 selama model masih dimuat
+    GET  /metrics        metrik Prometheus (request, latensi per tahap, cache, memori, antrean)
+    POST /predict        satu gambar: body mentah (Content-Type image/*) atau multipart field "file"
+    POST /predict/batch  multipart (field "files", boleh berulang) atau JSON {"urls": [...], "paths": [...]}
+    POST /embed          embedding (vektor sebelum head softmax) per gambar; body sama dengan /predict/batch
+
+Model dikelola ModelManager (model_manager.py): file model diganti = versi baru
+dimuat di background dan ditukar tanpa restart. Jika trafik dibagi ke versi
+kandidat, header X-Route-Key (mis. id pengguna) membuat request dengan key yang
+sama selalu dilayani versi yang sama; field "model" di respons menyebut versinya.
+
+Query ?tta=flip|crops|crops_flip (default TTA_MODE) mengaktifkan test-time
+augmentation per request: beberapa view gambar diprediksi dalam satu forward
+pass dan probabilitasnya dirata-rata (lebih akurat, latensi lebih tinggi).
+
+Query ?similar=k pada /predict (butuh index embedding, lihat embedding_index.py)
+menambahkan k foto referensi termirip dan "out_of_distribution": true jika
+gambar terlalu jauh dari semua foto dataset (kemungkinan bukan alat musik).
+
+Batch dengan "urls" nonaktif secara default (API_ALLOW_URLS=1 untuk
+mengizinkan). Server hanya mengunduh dari alamat publik, dicek setelah DNS
+resolve dan di setiap redirect, dan dari host di API_URL_ALLOWLIST jika diisi.
+
+Gambar di-decode lewat uploads.read_upload: batas piksel (UPLOAD_MAX_*),
+draft mode JPEG dan orientasi EXIF, sama seperti aplikasi Streamlit.
+
+Decode dan inferensi berjalan di thread pool berukuran tetap (API_WORKERS) supaya
+event loop tidak terblokir. Request tunggal digabung lewat MicroBatcher yang sama
+dengan aplikasi Streamlit; jumlah request yang sedang diproses dibatasi
+API_MAX_PENDING, kelebihannya langsung ditolak dengan 503 + Retry-After.
+
+Setiap request /predict* dan /embed dicatat di classifier_requests_total{app="api"} dan
+classifier_stage_seconds{stage="request"}; tahap preprocess dan inference
+diukur di inference.py. Lihat metrics.py.
+"""
+import asyncio
+import http.client
+import io
+import ipaddress
+import os
+import socket
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import config
+import metrics
+import model_manager
+import uploads
+from instruments import fun_facts
+from preprocessing import tta_view_count
+
+MAX_BODY_BYTES = int(config.API_MAX_BODY_MB * 1024 * 1024)
+MAX_IMAGE_BYTES = int(config.API_MAX_IMAGE_MB * 1024 * 1024)
+
+
+# State server: model (dimuat di background, dipantau ModelManager), thread
+# pool dan cache prediksi. Setiap versi model punya batcher sendiri.
+class PredictionService:
+    def __init__(self, workers=config.API_WORKERS, max_pending=config.API_MAX_PENDING):
+        self.models = model_manager.ModelManager()
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="api-worker")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.cache = self.models.cache
+        metrics.REGISTRY.gauge("classifier_api_pending", "Request API yang sedang diproses atau mengantre") \
+            .set_function(lambda: self.pending)
+
+    # Versi model untuk request ini; 503 jika masih dimuat atau gagal dimuat
+    def model(self, key=None):
+        if self.models.loading():
+            raise HTTPException(503, "model sedang dimuat", headers={"Retry-After": "1"})
+        try:
+            return self.models.route(key)
+        except RuntimeError as e:
+            raise HTTPException(503, str(e))
+
+    # Jalankan fn di thread pool. Dipanggil dari event loop (satu thread), jadi
+    # penghitung pending tidak perlu lock.
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(503, "server sibuk", headers={"Retry-After": "1"})
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    # similar > 0: tambahkan foto termirip dan status out-of-distribution
+    def predict_one(self, model, data, tta="none", similar=0):
+        try:
+            with metrics.timed("upload_decode"):
+                source = read_image(data, model).model_input(model.image_size, tta)
+        except uploads.UploadError as e:
+            raise HTTPException(400, str(e))
+        if similar:
+            pred_class, confidence, pred_time, found = model.predict_similar(source, cache=self.cache, tta=tta,
+                                                                             k=similar)
+        else:
+            pred_class, confidence, pred_time = model.predict_image(source, cache=self.cache, tta=tta)
+        result = prediction_result(model, pred_class, confidence, pred_time, tta)
+        if similar:
+            result.update({
+                "out_of_distribution": found["out_of_distribution"],
+                "nearest_distance": found["nearest_distance"],
+                "ood_threshold": found["ood_threshold"],
+                "similar": [{key: n[key] for key in ("source", "class", "distance")} for n in found["neighbours"]],
+            })
+        return result
+
+    # Decode semua gambar, lalu satu forward pass untuk yang berhasil di-decode.
+    # Dengan TTA, view semua gambar diprediksi bersama dalam potongan maksimal
+    # API_MAX_BATCH view per forward pass (memori sama seperti batch tanpa TTA).
+    def predict_many(self, model, sources, tta="none"):
+        views = tta_view_count(tta)
+        results = [None] * len(sources)
+        arrays, indices = [], []
+        for i, (name, read) in enumerate(sources):
+            try:
+                data = read()
+                with metrics.timed("preprocess"):
+                    arrays.append(read_image(data, model).views(model.image_size, tta))  # (views, H, W, 3)
+                indices.append(i)
+            except Exception as e:
+                results[i] = {"source": name, "error": str(e)}
+        if arrays:
+            start_time = time.perf_counter()
+            batch = np.concatenate(arrays)
+            step = max(1, config.API_MAX_BATCH // views) * views
+            with metrics.timed("inference"):
+                probs = np.concatenate([model.predict_arrays(batch[i:i + step], cache=self.cache, views=views)
+                                        for i in range(0, len(batch), step)])
+            pred_time = (time.perf_counter() - start_time) / len(arrays)
+            for i, row in zip(indices, probs):
+                pred_class = int(np.argmax(row))
+                results[i] = {"source": sources[i][0],
+                              **prediction_result(model, pred_class, float(row[pred_class]), pred_time, tta)}
+        return results
+
+    # Embedding per gambar, potongan maksimal API_MAX_BATCH per forward pass
+    def embed_many(self, model, sources):
+        results = [None] * len(sources)
+        arrays, indices = [], []
+        for i, (name, read) in enumerate(sources):
+            try:
+                data = read()
+                with metrics.timed("preprocess"):
+                    arrays.append(read_image(data, model).array)
+                indices.append(i)
+            except Exception as e:
+                results[i] = {"source": name, "error": str(e)}
+        if arrays:
+            batch = np.stack(arrays)
+            with metrics.timed("inference"):
+                embeddings = np.concatenate([model.model.embed_batch(batch[i:i + config.API_MAX_BATCH])
+                                             for i in range(0, len(batch), config.API_MAX_BATCH)])
+            for i, embedding in zip(indices, embeddings):
+                results[i] = {"source": sources[i][0], "embedding": embedding.tolist()}
+        return results
+
+    # Status model + statistik per versi (latensi, confidence, batcher) dan cache
+    def health(self):
+        models = self.models.status()
+        return {"status": models.pop("status"), "pending": self.pending, "max_pending": self.max_pending, **models}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.models.close()
+
+
+def prediction_result(model, pred_class, confidence, pred_time, tta="none"):
+    instrument = model.class_names[pred_class]
+    info = fun_facts.get(instrument, {})
+    return {
+        "model": model.name,
+        "tta": tta,
+        "class": instrument,
+        "class_index": pred_class,
+        "confidence": confidence,
+        "time_ms": pred_time * 1000.0,
+        "fact": info.get("fact"),
+        "video": info.get("video"),
+    }
+
+
+# Decode bytes gambar dengan batas dan ukuran input model; UploadError jika ditolak
+def read_image(data, model):
+    return uploads.read_upload(io.BytesIO(data), model.image_size, max_bytes=MAX_IMAGE_BYTES)
+
+
+# URL yang boleh diunduh: http/https, dan host-nya ada di API_URL_ALLOWLIST
+# (jika diisi). Dicek untuk URL awal dan setiap redirect.
+def check_url(url):
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("hanya URL http/https yang didukung")
+    if config.API_URL_ALLOWLIST and parsed.hostname.lower() not in config.API_URL_ALLOWLIST:
+        raise ValueError(f"host {parsed.hostname} tidak ada di API_URL_ALLOWLIST")
+
+
+# Pengganti socket.create_connection: host di-resolve sekali, semua alamatnya
+# harus publik (bukan private, loopback, link-local, multicast, reserved), lalu
+# koneksi dibuka ke alamat yang sudah dicek itu, jadi DNS yang berubah di antara
+# cek dan connect tidak bisa mengarahkan ke jaringan internal.
+def _public_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    host, port = address
+    resolved = []
+    for _, _, _, _, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        ip = ipaddress.ip_address(sockaddr[0])
+        checked = ip.ipv4_mapped if ip.version == 6 and ip.ipv4_mapped else ip
+        if not checked.is_global or checked.is_multicast or checked.is_reserved:
+            raise ValueError(f"alamat {ip} untuk host {host} tidak diizinkan (bukan alamat publik)")
+        resolved.append(str(ip))
+    error = OSError(f"tidak bisa terhubung ke {host}")
+    for ip in dict.fromkeys(resolved):
+        try:
+            return socket.create_connection((ip, port), timeout, source_address)
+        except OSError as e:
+            error = e
+    raise error
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+
+class _CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+# Tanpa proxy dari environment: koneksi harus langsung ke alamat yang dicek
+_url_opener = urllib.request.build_opener(
+    urllib.request.ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler, _CheckedRedirectHandler)
+
+
+# Baca gambar dari URL (http/https ke alamat publik saja), dibatasi ukuran dan timeout
+def fetch_url(url):
+    check_url(url)
+    with _url_opener.open(url, timeout=config.API_FETCH_TIMEOUT) as response:
+        data = response.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError(f"gambar melebihi {config.API_MAX_IMAGE_MB:g} MB")
+    return data
+
+
+# Baca gambar dari path lokal; hanya path di dalam API_IMAGE_ROOT yang diizinkan
+def read_path(path):
+    if not config.API_IMAGE_ROOT:
+        raise ValueError("batch dengan path dinonaktifkan (API_IMAGE_ROOT kosong)")
+    root = os.path.realpath(config.API_IMAGE_ROOT)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root:
+        raise ValueError("path berada di luar API_IMAGE_ROOT")
+    if os.path.getsize(full_path) > MAX_IMAGE_BYTES:
+        raise ValueError(f"gambar melebihi {config.API_MAX_IMAGE_MB:g} MB")
+    with open(full_path, "rb") as f:
+        return f.read()
+
+
+def _check_image_size(data):
+    if not data:
+        raise HTTPException(400, "gambar kosong")
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(413, f"gambar melebihi {config.API_MAX_IMAGE_MB:g} MB")
+    return data
+
+
+def _route_key(request):
+    return request.headers.get("x-route-key")
+
+
+def _tta_mode(request):
+    tta = request.query_params.get("tta", config.TTA_MODE)
+    try:
+        tta_view_count(tta)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return tta
+
+
+# ?similar=k (0 = tanpa pencarian); 400 jika model tidak punya index embedding
+def _similar_count(request, model):
+    try:
+        similar = int(request.query_params.get("similar", 0))
+    except ValueError:
+        raise HTTPException(400, "similar harus bilangan bulat")
+    if not 0 <= similar <= 50:
+        raise HTTPException(400, "similar harus antara 0 dan 50")
+    if similar and model.index is None:
+        raise HTTPException(400, model.index_error or f"model {model.name} tidak punya index embedding")
+    return similar
+
+
+def _is_multipart(request):
+    return request.headers.get("content-type", "").startswith("multipart/form-data")
+
+
+async def healthz(request):
+    health = request.app.state.service.health()
+    return JSONResponse(health, status_code=200 if health["status"] == "ok" else 503)
+
+
+async def metrics_endpoint(request):
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def predict(request):
+    service = request.app.state.service
+    model = service.model(_route_key(request))
+    tta = _tta_mode(request)
+    similar = _similar_count(request, model)
+    if _is_multipart(request):
+        async with request.form(max_files=1) as form:
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(400, 'field "file" wajib diisi')
+            data = await upload.read()
+    else:
+        data = await request.body()
+    result = await service.run(service.predict_one, model, _check_image_size(data), tta, similar)
+    return JSONResponse(result)
+
+
+async def predict_batch(request):
+    service = request.app.state.service
+    model = service.model(_route_key(request))
+    tta = _tta_mode(request)
+    sources = await _batch_sources(request)
+    start_time = time.perf_counter()
+    results = await service.run(service.predict_many, model, sources, tta)
+    return JSONResponse({"results": results, "time_ms": (time.perf_counter() - start_time) * 1000.0})
+
+
+async def embed(request):
+    service = request.app.state.service
+    model = service.model(_route_key(request))
+    if model.model.embedding_size is None:
+        raise HTTPException(501, f"engine {model.model.name} tidak menyediakan embedding; pakai model .keras/.h5")
+    sources = await _batch_sources(request)
+    start_time = time.perf_counter()
+    results = await service.run(service.embed_many, model, sources)
+    return JSONResponse({"model": model.name, "embedding_size": model.model.embedding_size, "results": results,
+                         "time_ms": (time.perf_counter() - start_time) * 1000.0})
+
+
+# Sumber gambar batch: (nama, fungsi baca bytes) dari multipart "files" atau
+# JSON {"urls": [...], "paths": [...]}
+async def _batch_sources(request):
+    sources = []
+    if _is_multipart(request):
+        async with request.form(max_files=config.API_MAX_BATCH) as form:
+            for upload in form.getlist("files"):
+                if isinstance(upload, str):
+                    continue
+                data = _check_image_size(await upload.read())
+                sources.append((upload.filename, lambda data=data: data))
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            raise HTTPException(400, 'body harus multipart atau JSON {"urls": [...], "paths": [...]}')
+        urls, paths = body.get("urls", []), body.get("paths", [])
+        if urls and not config.API_ALLOW_URLS:
+            raise HTTPException(400, "batch dengan URL dinonaktifkan (set API_ALLOW_URLS=1)")
+        sources += [(url, lambda url=url: fetch_url(url)) for url in urls]
+        sources += [(path, lambda path=path: read_path(path)) for path in paths]
+    if not sources:
+        raise HTTPException(400, "tidak ada gambar")
+    if len(sources) > config.API_MAX_BATCH:
+        raise HTTPException(413, f"maksimal {config.API_MAX_BATCH} gambar per batch")
+    return sources
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+
+# Middleware ASGI: tolak body yang melebihi MAX_BODY_BYTES dengan 413, baik
+# dari header Content-Length maupun saat body dibaca (chunked upload)
+class BodySizeLimit:
+    def __init__(self, app, max_bytes=MAX_BODY_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse({"error": "request terlalu besar"}, status_code=413)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(413, "request terlalu besar")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# Middleware ASGI: durasi dan status setiap request /predict* dan /embed untuk /metrics
+class RequestMetrics:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(("/predict", "/embed")):
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            with metrics.timed("request"):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.REQUESTS.inc(app="api", outcome="ok" if status < 400 else str(status))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.service = PredictionService()
+    yield
+    app.state.service.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+        Route("/embed", embed, methods=["POST"]),
+    ],
+    exception_handlers={HTTPException: http_error},
+    lifespan=lifespan,
+)
+app.add_middleware(BodySizeLimit)
+app.add_middleware(RequestMetrics)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=config.API_HOST, port=config.API_PORT)
@@ -1,12 +1,18 @@
 import streamlit as st
-from PIL import Image
 import numpy as np
-from tensorflow.keras.models import load_model
+from engines import create_engine
+from preprocessing import TTA_MODES
+from uploads import UploadError, read_upload
 
-# Load model dan class names
-model = load_model("Model_CNN_Baru_Final.h5")
+# Class names model lama (4 kelas). Jika Model_CNN_Baru_Final.h5.json (manifest)
+# ada, urutannya harus sama; jika tidak cocok, model gagal dimuat.
 class_names = ['Balungan', 'Bonang', 'Kendang', 'Slentho']
 
+# Load model lewat engine inferensi (dipilih dari ekstensi file / INFERENCE_ENGINE)
+@st.cache_resource
+def load_model_cached():
+    return create_engine("Model_CNN_Baru_Final.h5", class_names=class_names).load().warmup()
+
 # Konfigurasi halaman Streamlit
 st.set_page_config(
     page_title="Klasifikasi Alat Musik Tradisional",
@@ -37,22 +43,36 @@ st.markdown("""
 st.markdown('<div class="title">Klasifikasi Alat Musik Tradisional Jawa Timur 🎶</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Upload gambar alat musik dan model akan memprediksi jenisnya</div>', unsafe_allow_html=True)
 
+model = load_model_cached()
+
+# Test-time augmentation: view gambar (crop pojok, cermin) diprediksi dalam
+# satu batch lalu probabilitasnya dirata-rata
+tta = st.sidebar.selectbox("Test-time augmentation", list(TTA_MODES),
+                           format_func=lambda mode: f"{mode} ({TTA_MODES[mode]} view)")
+
 # Upload gambar
 uploaded_file = st.file_uploader("Pilih gambar alat musik...", type=["jpg", "jpeg", "png"])
 
+# Upload dibaca dengan batas ukuran/piksel, draft mode JPEG dan orientasi EXIF;
+# yang disimpan hanya thumbnail dan array seukuran input model
+upload = None
 if uploaded_file is not None:
-    image = Image.open(uploaded_file)
-    st.image(image, caption="Gambar yang diupload", use_container_width=True)
+    try:
+        upload = read_upload(uploaded_file, model.image_size)
+    except UploadError as e:
+        st.error(f"Gambar ditolak: {e}")
+
+if upload is not None:
+    st.image(upload.thumbnail, caption="Gambar yang diupload", use_container_width=True)
 
-    # Preprocessing gambar
-    image_resized = image.resize((225, 225))
-    image_array = np.array(image_resized) / 255.0
-    image_array = np.expand_dims(image_array, axis=0)
+    # Preprocessing gambar (RGB, resize 225x225, uint8; normalisasi di dalam model)
+    # menjadi satu atau beberapa view TTA (N, 225, 225, 3)
+    image_array = upload.views(model.image_size, tta)
 
-    # Prediksi
-    predictions = model.predict(image_array)
+    # Prediksi: semua view dalam satu forward pass, probabilitas dirata-rata
+    predictions = model.predict_batch(image_array).mean(axis=0, keepdims=True)
     predicted_index = np.argmax(predictions[0])
-    predicted_instrument = class_names[predicted_index]
+    predicted_instrument = model.class_names[predicted_index]
     confidence = float(np.max(predictions[0]))
 
     # Penilaian keyakinan
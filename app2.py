@@ -1,11 +1,13 @@
 import streamlit as st
-from PIL import Image
-import numpy as np
-import tensorflow as tf
-from tensorflow.keras.preprocessing import image
-from tensorflow.keras.models import load_model
-import time
-import os  # untuk cek file audio lokal
+import os
+import uuid
+import model_manager
+import media
+import metrics
+import config
+import uploads
+from explain import heatmap_overlay
+from preprocessing import TTA_MODES
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -36,37 +38,108 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load model dengan caching
-@st.cache_resource
+# Model (dan TensorFlow) dimuat di thread background sekali per proses lewat
+# ModelManager, jadi halaman langsung tampil tanpa menunggu import TensorFlow.
+# File model dipantau: versi baru dimuat di background lalu ditukar tanpa
+# restart dan tanpa memutus sesi yang sedang berjalan.
+manager = model_manager.get_manager()
+# Endpoint /metrics (Prometheus) di METRICS_PORT, sekali per proses
+metrics.serve()
+
+def model_ready():
+    return manager.ready()
+
+# Versi model untuk sesi ini (menunggu jika masih dimuat). Jika trafik dibagi
+# (A/B), satu sesi selalu diarahkan ke versi yang sama.
 def load_model_cached():
     try:
-        model = load_model('Model_CNN_Baru_Final.keras')
-        st.success("✅ Model berhasil dimuat!")
-        return model
+        return manager.route(st.session_state.setdefault("route_key", uuid.uuid4().hex))
     except Exception as e:
         st.error(f"❌ Gagal memuat model: {str(e)}")
         return None
 
-# Fungsi prediksi
-def predict_image(model, img):
+# Fungsi prediksi: batcher bersama per versi (request dari semua sesi digabung
+# menjadi satu forward pass) dan cache prediksi bersama. Jika versi model punya
+# index embedding, hasil keempat berisi foto referensi termirip dan status
+# out-of-distribution (lihat embedding_index.py); jika tidak, None.
+# explain=True: hasil kelima berisi heatmap Grad-CAM dari forward pass yang
+# sama (tanpa TTA); engine tanpa Grad-CAM (TFLite/ONNX) memberi None.
+# upload = uploads.Upload: array seukuran input model atau thumbnail untuk TTA.
+def predict_image(model, upload, tta="none", explain=False):
     try:
-        img = img.resize((225, 225))
-        img_array = image.img_to_array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-
-        start_time = time.time()
-        predictions = model.predict(img_array, verbose=0)
-        pred_time = time.time() - start_time
-
-        pred_class = np.argmax(predictions[0])
-        confidence = float(predictions[0][pred_class])
-        return pred_class, confidence, pred_time
+        if explain and model.model.gradcam_shape is not None:
+            pred_class, confidence, pred_time, heatmap, similar = model.predict_explained(
+                upload.model_input(model.image_size), cache=manager.cache)
+            result = pred_class, confidence, pred_time, similar, heatmap
+        elif model.index is not None:
+            result = model.predict_similar(upload.model_input(model.image_size, tta), cache=manager.cache,
+                                           tta=tta) + (None,)
+        else:
+            result = model.predict_image(upload.model_input(model.image_size, tta), cache=manager.cache,
+                                         tta=tta) + (None, None)
+        metrics.REQUESTS.inc(app="app2", outcome="ok")
+        return result
     except Exception as e:
+        metrics.REQUESTS.inc(app="app2", outcome="error")
         st.error(f"❌ Error saat prediksi: {str(e)}")
-        return None, None, None
+        return None, None, None, None, None
+
+# Baca upload sekali per file, bukan setiap rerun: decode dengan draft mode,
+# orientasi EXIF, batas ukuran/piksel (uploads.py). Sesi hanya menyimpan
+# thumbnail dan array input model. None (dengan pesan error) jika ditolak.
+def read_uploaded(uploaded_file):
+    cached = st.session_state.get("uploaded_image")
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1]
+    try:
+        with metrics.timed("upload_decode"):
+            upload = uploads.read_upload(uploaded_file)
+    except uploads.UploadError as e:
+        metrics.REQUESTS.inc(app="app2", outcome="rejected")
+        st.error(f"❌ Gambar ditolak: {e}")
+        return None
+    st.session_state["uploaded_image"] = (uploaded_file.file_id, upload)
+    return upload
 
-# Daftar nama kelas dan data fakta
-class_names = ["Balungan", "Bonang", "Gambang", "Kendang", "Rebab", "Slentho"]
+# Heatmap Grad-CAM di atas gambar: area yang paling mendorong prediksi
+def show_explanation(img, heatmap, instrument):
+    if heatmap is None:
+        return
+    with st.expander("🔬 Kenapa model memilih kelas ini?", expanded=True):
+        st.image(heatmap_overlay(img, heatmap), use_container_width=True,
+                 caption=f"Area berwarna panas paling memengaruhi prediksi {instrument} (Grad-CAM)")
+
+# Peringatan gambar asing dan foto dataset yang paling mirip dengan upload
+def show_similar(similar):
+    if similar is None:
+        return
+    if similar["out_of_distribution"]:
+        st.warning("🤔 Gambar ini jauh berbeda dari semua foto alat musik di dataset; "
+                   "hasil prediksi kemungkinan tidak tepat.")
+    neighbours = [n for n in similar["neighbours"] if os.path.isfile(n["path"])]
+    if neighbours:
+        with st.expander("🖼️ Foto referensi termirip"):
+            for column, neighbour in zip(st.columns(len(neighbours)), neighbours):
+                column.image(neighbour["path"], caption=f"{neighbour['class']} · jarak {neighbour['distance']:.3f}",
+                             use_container_width=True)
+
+# Pilihan test-time augmentation di sidebar: beberapa view gambar (crop pojok,
+# cermin) diprediksi dalam satu batch lalu dirata-rata. Membantu foto dengan
+# alat musik yang tidak di tengah, dengan latensi lebih tinggi.
+def tta_selector():
+    modes = list(TTA_MODES)
+    return st.sidebar.selectbox(
+        "🔁 Test-time augmentation", modes,
+        index=modes.index(config.TTA_MODE) if config.TTA_MODE in modes else 0,
+        format_func=lambda mode: f"{mode} ({TTA_MODES[mode]} view)",
+    )
+
+# Mode penjelasan: heatmap Grad-CAM ditampilkan bersama hasil prediksi
+def explain_toggle():
+    return st.sidebar.checkbox("🔬 Tampilkan penjelasan (Grad-CAM)", value=False,
+                               help="Menandai bagian gambar yang paling memengaruhi prediksi. Tanpa TTA.")
+
+# Data fakta alat musik
 fun_facts = {
     "Balungan": {
         "fact": "Nada dasar dalam musik gamelan, biasanya dimainkan oleh saron atau slenthem. Dalam musik gamelan Jawa, balungan merujuk pada melodi kerangka atau garis nada utama dari sebuah komposisi. Menariknya, meskipun alat musik seperti saron atau slenthem memainkan bagian ini, para pemain gamelan yang berpengalaman sering kali mendengar balungan hanya di dalam pikiran mereka, bahkan saat tidak ada alat musik yang secara eksplisit memainkannya.",
@@ -109,9 +182,15 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
-    model = load_model_cached()
-    if model is None:
-        return
+    if model_ready():
+        st.success("✅ Model berhasil dimuat!")
+        # Statistik per versi model (latensi, confidence, micro-batching) dan cache prediksi
+        status = manager.status()
+        with st.sidebar.expander("📊 Statistik Inferensi"):
+            st.metric("Cache hit rate", f"{status['cache']['hit_rate']:.0%}")
+            st.json(status)
+    elif manager.loading():
+        st.info("⏳ Model sedang dimuat di background...")
 
     st.markdown("""
     <div class="upload-area">
@@ -120,22 +199,27 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    tta = tta_selector()
+    explain = explain_toggle()
     uploaded_file = st.file_uploader(" ", type=["jpg", "jpeg", "png"], label_visibility="collapsed")
 
-    if uploaded_file:
+    upload = read_uploaded(uploaded_file) if uploaded_file else None
+    if upload is not None:
         col1, col2 = st.columns(2)
 
         with col1:
-            img = Image.open(uploaded_file).convert('RGB')
-            st.image(img, caption="Gambar yang diunggah", use_container_width=True)
+            st.image(upload.thumbnail, caption="Gambar yang diunggah", use_container_width=True)
 
         with col2:
             if st.button("🔍 Analisis Gambar", use_container_width=True):
                 with st.spinner("🔎 Menganalisis..."):
-                    pred_class, confidence, pred_time = predict_image(model, img)
+                    model = load_model_cached()
+                    if model is None:
+                        return
+                    pred_class, confidence, pred_time, similar, heatmap = predict_image(model, upload, tta, explain)
 
-                if pred_class is not None and 0 <= pred_class < len(class_names):
-                    instrument = class_names[pred_class]
+                if pred_class is not None and 0 <= pred_class < len(model.class_names):
+                    instrument = model.class_names[pred_class]
                     info = fun_facts.get(instrument, {})
 
                     st.markdown(f"""
@@ -148,6 +232,8 @@ def main():
                         <p><small>Waktu analisis: {pred_time:.2f} detik</small></p>
                     </div>
                     """, unsafe_allow_html=True)
+                    show_explanation(upload.thumbnail, heatmap, instrument)
+                    show_similar(similar)
 
                     with st.expander("ℹ️ Fakta Menarik & Multimedia"):
                         st.write(f"📌 {info.get('fact', 'Fakta tidak tersedia.')}")
@@ -160,10 +246,9 @@ def main():
                             st.info("📺 Video tidak tersedia.")
 
                         # Audio lokal
-                        audio_path = info.get("audio")
-                        if audio_path and os.path.exists(audio_path):
-                            with open(audio_path, "rb") as f:
-                                st.audio(f.read(), format="audio/mp3")
+                        audio_src, audio_format = media.audio_source(info.get("audio"))
+                        if audio_src is not None:
+                            st.audio(audio_src, format=audio_format)
                         else:
                             st.warning("🔇 Maaf, audio tidak tersedia.")
 
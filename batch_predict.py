@@ -0,0 +1,143 @@
+"""Klasifikasi batch untuk banyak gambar sekaligus tanpa Streamlit.
+
+Contoh:
+    python batch_predict.py foto_arsip/ --output hasil.csv
+    python batch_predict.py "arsip/**/*.jpg" --output hasil.jsonl --batch-size 64
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from config import IMAGE_EXTENSIONS, MODEL_PATH
+from inference import load_model, predict_batch
+from preprocessing import BatchBuffer, load_image
+
+
+# Kumpulkan path gambar dari folder (rekursif) atau pola glob
+def collect_image_paths(source):
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, name) for name in files)
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+# Dijalankan di proses worker: decode + resize, kembalikan uint8 agar IPC ringan
+def _decode_worker(path, size):
+    try:
+        return path, load_image(path, size), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+class ResultWriter:
+    def __init__(self, output, class_names):
+        self.class_names = class_names
+        self.fmt = "jsonl" if output.endswith((".jsonl", ".json")) else "csv"
+        self.file = sys.stdout if output == "-" else open(output, "w", newline="", encoding="utf-8")
+        if self.fmt == "csv":
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(["path", "class", "confidence"] + list(class_names) + ["error"])
+
+    def write(self, path, probs=None, error=None):
+        if self.fmt == "csv":
+            if probs is None:
+                self.csv.writerow([path, "", ""] + [""] * len(self.class_names) + [error])
+            else:
+                idx = int(np.argmax(probs))
+                self.csv.writerow([path, self.class_names[idx], f"{probs[idx]:.6f}"]
+                                  + [f"{p:.6f}" for p in probs] + [""])
+        else:
+            if probs is None:
+                record = {"path": path, "error": error}
+            else:
+                idx = int(np.argmax(probs))
+                record = {
+                    "path": path,
+                    "class": self.class_names[idx],
+                    "confidence": float(probs[idx]),
+                    "probabilities": {name: float(p) for name, p in zip(self.class_names, probs)},
+                }
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def run(pool, paths, model, writer, batch_size=32):
+    # Buffer batch dialokasikan sekali lalu diisi ulang untuk setiap batch
+    batch = BatchBuffer(batch_size, model.image_size)
+    batch_paths = []
+    processed = 0
+
+    def flush_batch():
+        n = len(batch_paths)
+        predictions = predict_batch(model, batch.view())
+        for path, probs in zip(batch_paths, predictions):
+            writer.write(path, probs)
+        writer.flush()
+        batch_paths.clear()
+        batch.clear()
+        return n
+
+    for path, array, error in pool.imap(partial(_decode_worker, size=model.image_size), paths, chunksize=4):
+        if error is not None:
+            writer.write(path, error=error)
+            continue
+        batch.append(array)
+        batch_paths.append(path)
+        if batch.full():
+            processed += flush_batch()
+    if batch_paths:
+        processed += flush_batch()
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klasifikasi batch gambar alat musik tradisional")
+    parser.add_argument("source", help="folder gambar atau pola glob (mis. 'arsip/**/*.jpg')")
+    parser.add_argument("-o", "--output", default="-", help="file hasil .csv atau .jsonl (default: stdout, CSV)")
+    parser.add_argument("-m", "--model", default=MODEL_PATH, help="path model atau manifest (.json)")
+    parser.add_argument("-b", "--batch-size", type=int, default=32)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                        help="jumlah proses decode/resize (default: semua core CPU)")
+    args = parser.parse_args(argv)
+
+    paths = collect_image_paths(args.source)
+    if not paths:
+        print(f"❌ Tidak ada gambar ditemukan di {args.source}", file=sys.stderr)
+        return 1
+
+    # Pool dibuat sebelum TensorFlow dimuat: fork setelah runtime TF aktif
+    # (thread pool internalnya) rawan deadlock di proses anak
+    with Pool(processes=args.workers) as pool:
+        model = load_model(args.model)
+        writer = ResultWriter(args.output, model.class_names)
+        start_time = time.perf_counter()
+        try:
+            processed = run(pool, paths, model, writer, args.batch_size)
+        finally:
+            writer.close()
+    elapsed = time.perf_counter() - start_time
+
+    print(f"✅ {processed}/{len(paths)} gambar diproses dalam {elapsed:.2f} detik "
+          f"({processed / elapsed:.1f} gambar/detik)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+# Penggabung request prediksi dari banyak sesi menjadi satu batch.
+# Request pertama yang masuk membuka "jendela" selama max_wait_ms; semua
+# request yang datang di jendela itu (maksimal max_batch_size) diprediksi
+# dalam satu forward pass, lalu hasilnya dikirim balik ke masing-masing pemanggil.
+# item_shape (H, W, 3), jika diberikan, dan dtypes membatasi array yang boleh
+# masuk; request dengan shape/dtype berbeda di jendela yang sama diprediksi
+# dalam batch terpisah, bukan di-stack (dan di-upcast) bersama.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=10, latency_window=2048,
+                 item_shape=None, dtypes=(np.uint8, np.float32)):
+        self.predict_fn = predict_fn
+        self.item_shape = tuple(item_shape) if item_shape is not None else None
+        self.dtypes = tuple(np.dtype(dtype) for dtype in dtypes)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = collections.Counter()
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._requests = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # Kirim satu gambar (H, W, 3) yang sudah dipraproses, hasilnya Future berisi vektor probabilitas
+    def submit(self, array):
+        if self._closed:
+            raise RuntimeError("MicroBatcher sudah ditutup")
+        array = np.asarray(array)
+        if self.item_shape is not None and array.shape != self.item_shape:
+            raise ValueError(f"Shape input {array.shape} berbeda dengan yang diharapkan {self.item_shape}")
+        if array.dtype not in self.dtypes:
+            raise ValueError(f"dtype input {array.dtype} tidak didukung (harus salah satu dari "
+                             f"{', '.join(str(dtype) for dtype in self.dtypes)})")
+        future = Future()
+        self._queue.put((array, future, time.perf_counter()))
+        return future
+
+    def predict(self, array, timeout=None):
+        return self.submit(array).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            histogram = dict(sorted(self._batch_sizes.items()))
+            requests = self._requests
+        return {
+            "requests": requests,
+            "queue_depth": self.queue_depth(),
+            "batch_size_histogram": histogram,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "latency_p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        }
+
+    # Ambil request sampai batch penuh atau batas waktu tunggu habis
+    def _collect(self, first):
+        items = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            groups = {}
+            for item in self._collect(first):
+                groups.setdefault((item[0].shape, item[0].dtype), []).append(item)
+            for items in groups.values():
+                self._predict(items)
+
+    # Satu forward pass untuk request dengan shape dan dtype yang sama. Error
+    # (termasuk saat stack) hanya dikirim ke Future milik batch ini; thread
+    # batcher tetap berjalan.
+    def _predict(self, items):
+        n = len(items)
+        try:
+            batch = np.stack([array for array, _, _ in items])
+            predictions = np.asarray(self.predict_fn(batch))
+            if len(predictions) != n:
+                raise ValueError(f"predict_fn mengembalikan {len(predictions)} hasil untuk batch {n} gambar")
+        except Exception as e:
+            for _, future, _ in items:
+                future.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        with self._lock:
+            self._batch_sizes[n] += 1
+            self._requests += n
+            self._latencies.extend(done - submitted for _, _, submitted in items)
+        for i, (_, future, _) in enumerate(items):
+            future.set_result(predictions[i])
@@ -0,0 +1,207 @@
+"""Waktu dan payload setiap rerun app Streamlit, diukur dari sisi browser.
+
+Menjalankan `streamlit run <app>` sungguhan lalu berbicara dengan websocket-nya
+seperti browser: mengirim BackMsg rerun (dengan state widget dan fragment_id
+jika widget berada di dalam st.fragment), mengunggah gambar lewat endpoint
+upload Streamlit, dan menghitung byte ForwardMsg yang diterima sampai
+script_finished. Cache pesan browser ikut ditiru (hash pesan besar dikirim
+balik), jadi angka payload sama dengan yang benar-benar lewat jaringan.
+
+Interaksi yang diukur:
+
+- first_run: halaman pertama kali dibuka;
+- sidebar_rerun: checkbox Grad-CAM di sidebar diubah (rerun penuh);
+- upload: gambar diunggah;
+- analyze: tombol "Analisis Gambar" diklik (hasil dari cache prediksi setelah
+  klik pertama, jadi yang terukur biaya rerun, bukan model).
+
+Aplikasi dijalankan dari folder kerja saat ini (MODEL_PATH, data_suara/).
+Bandingkan dua versi app dengan menjalankan benchmark untuk masing-masing file.
+
+    python -m benchmarks.app_rerun --app app3.py
+    python -m benchmarks.app_rerun --app app3.py --image dataset/Bonang/1.jpg --repeats 20
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import numpy as np
+from PIL import Image
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_app(app, port):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true", "--server.port", str(port),
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/_stcore/health")
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.3)
+    process.kill()
+    raise RuntimeError(f"streamlit run {app} tidak siap")
+
+
+# Satu sesi browser: kirim rerun, terima ForwardMsg sampai script selesai
+class BrowserSession:
+    def __init__(self, port):
+        self.port = port
+        self.ws = connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                          origin=f"http://127.0.0.1:{port}", max_size=None)
+        self.session_id = None
+        self.cached_hashes = set()
+        self.widgets = {}  # (tipe, label) -> (widget id, fragment_id)
+
+    def rerun(self, widget_states=(), fragment_id=""):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = ""
+        state.cached_message_hashes.extend(sorted(self.cached_hashes))
+        state.widget_states.widgets.extend(widget_states)
+        if fragment_id:
+            state.fragment_id = fragment_id
+        start = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        received = 0
+        while True:
+            data = self.ws.recv(timeout=600)
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            self._observe(forward)
+            if forward.WhichOneof("type") == "script_finished":
+                return time.perf_counter() - start, received
+
+    def upload(self, name, data, mime):
+        msg = BackMsg()
+        request_id = uuid.uuid4().hex
+        msg.file_urls_request.request_id = request_id
+        msg.file_urls_request.file_names.append(name)
+        msg.file_urls_request.session_id = self.session_id
+        self.ws.send(msg.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.ws.recv(timeout=60))
+            self._observe(forward)
+            if forward.WhichOneof("type") == "file_urls_response" and forward.file_urls_response.response_id == request_id:
+                urls = forward.file_urls_response.file_urls[0]
+                break
+        boundary = uuid.uuid4().hex
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{name}\"\r\n"
+                f"Content-Type: {mime}\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        conn.request("PUT", urls.upload_url, body, {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        status = conn.getresponse().status
+        if status != 204:
+            raise RuntimeError(f"upload gagal: HTTP {status}")
+        return urls
+
+    def widget(self, kind, label):
+        for (widget_kind, widget_label), value in self.widgets.items():
+            if widget_kind == kind and label in widget_label:
+                return value
+        raise KeyError(f"widget {kind} '{label}' tidak ditemukan")
+
+    def close(self):
+        self.ws.close()
+
+    def _observe(self, forward):
+        kind = forward.WhichOneof("type")
+        if forward.metadata.cacheable and forward.hash:
+            self.cached_hashes.add(forward.hash)
+        if kind == "new_session":
+            self.session_id = forward.new_session.initialize.session_id or self.session_id
+        elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+            element = forward.delta.new_element
+            widget_kind = element.WhichOneof("type")
+            widget = getattr(element, widget_kind)
+            if widget_kind in ("button", "checkbox", "file_uploader", "selectbox"):
+                self.widgets[(widget_kind, widget.label)] = (widget.id, forward.delta.fragment_id)
+
+
+def _image_bytes(path):
+    if path:
+        with open(path, "rb") as f:
+            return os.path.basename(path), f.read()
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.default_rng(0).integers(0, 256, (480, 640, 3), np.uint8)).save(buffer, "JPEG")
+    return "contoh.jpg", buffer.getvalue()
+
+
+def _summary(samples):
+    seconds = [s for s, _ in samples]
+    payload = [b for _, b in samples]
+    return {"p50_ms": float(np.median(seconds) * 1000.0), "payload_kb": float(np.median(payload) / 1024.0)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="app3.py")
+    parser.add_argument("--image", default=None, help="gambar yang diunggah (default: JPEG sintetis 640x480)")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    name, data = _image_bytes(args.image)
+    port = _free_port()
+    process = _start_app(args.app, port)
+    results = {"first_run": [], "sidebar_rerun": [], "upload": [], "analyze": []}
+    try:
+        for _ in range(args.repeats):
+            session = BrowserSession(port)
+            results["first_run"].append(session.rerun())
+
+            checkbox_id, _ = session.widget("checkbox", "Grad-CAM")
+            toggled = WidgetState(id=checkbox_id, bool_value=True)
+            results["sidebar_rerun"].append(session.rerun([toggled]))
+            untoggled = WidgetState(id=checkbox_id, bool_value=False)
+            session.rerun([untoggled])
+
+            uploader_id, uploader_fragment = session.widget("file_uploader", "")
+            urls = session.upload(name, data, "image/jpeg")
+            uploaded = WidgetState(id=uploader_id)
+            info = uploaded.file_uploader_state_value.uploaded_file_info.add()
+            info.file_id, info.name, info.size = urls.file_id, name, len(data)
+            info.file_urls.CopyFrom(urls)
+            results["upload"].append(session.rerun([untoggled, uploaded], uploader_fragment))
+
+            button_id, button_fragment = session.widget("button", "Analisis")
+            click = WidgetState(id=button_id, trigger_value=True)
+            session.rerun([untoggled, uploaded, click], button_fragment)  # klik pertama: model + cache
+            for _ in range(3):
+                results["analyze"].append(session.rerun([untoggled, uploaded, click], button_fragment))
+            session.close()
+    finally:
+        process.terminate()
+        process.wait()
+    print(json.dumps({"app": args.app, "repeats": args.repeats,
+                      **{key: _summary(samples) for key, samples in results.items()}}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Ukuran vs throughput: folder JPEG/PNG vs dataset terpaket (dataset_shards.py).
+
+Satu epoch dibaca dengan beberapa cara: decode PIL (jalur inferensi), decode
+tf.data (training_data.image_dataset), batch view langsung dari shard
+memory-map, dan tf.data dari shard (jalur training).
+
+    python -m benchmarks.dataset_shards --dataset dataset --epochs 3
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from dataset import list_labelled_images
+from dataset_shards import ShardedDataset, pack_dataset
+from preprocessing import load_image
+
+
+def _epochs(iterate_epoch, epochs):
+    rates = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        images = iterate_epoch()
+        rates.append(images / (time.perf_counter() - start))
+    return {"images_per_s": rates}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    paths, labels, _ = list_labelled_images(args.dataset)
+    with tempfile.TemporaryDirectory() as output:
+        start = time.perf_counter()
+        manifest = pack_dataset(args.dataset, output)
+        pack_s = time.perf_counter() - start
+        shards = ShardedDataset(output)
+
+        def pil_decode():
+            for path in paths:
+                load_image(path)
+            return len(paths)
+
+        def tf_decode():
+            from training_data import image_dataset
+
+            return sum(len(x) for x, _ in image_dataset(paths, labels).batch(args.batch_size))
+
+        def shard_views():
+            count = 0
+            for images, _ in shards.batches(args.batch_size):
+                images.max()  # sentuh semua halaman memory-map
+                count += len(images)
+            return count
+
+        def shard_tf_data():
+            return sum(len(x) for x, _ in shards.to_tf_dataset(shuffle=True).batch(args.batch_size))
+
+        report = {
+            "images": len(paths),
+            "source_mb": sum(os.path.getsize(p) for p in paths) / 1e6,
+            "packed_mb": sum(os.path.getsize(os.path.join(output, s["images"])) for s in manifest["shards"]) / 1e6,
+            "pack_seconds": pack_s,
+            "pil_decode": _epochs(pil_decode, args.epochs),
+            "tf_data_decode": _epochs(tf_decode, args.epochs),
+            "shard_memmap_views": _epochs(shard_views, args.epochs),
+            "shard_tf_data": _epochs(shard_tf_data, args.epochs),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
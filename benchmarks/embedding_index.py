@@ -0,0 +1,89 @@
+"""Index embedding: waktu build, latensi query dan recall IVF vs pencarian exact.
+
+Vektor sintetis berkelompok (seperti embedding satu kelas yang mirip satu sama
+lain) dengan dimensi embedding MobileNetV2 (1280). Untuk setiap ukuran dataset
+diukur waktu build index (k-means + kalibrasi ambang OOD), ukuran file, latensi
+satu query (p50/p95) dengan IVF dan dengan exact search (semua kelompok
+diperiksa), serta recall@k IVF terhadap hasil exact.
+
+    python -m benchmarks.embedding_index
+    python -m benchmarks.embedding_index --sizes 1000 10000 50000 --nprobe 4 8 16
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from embedding_index import EmbeddingIndex, write_index
+
+
+# N vektor di sekitar `clusters` pusat acak; noise mengatur seberapa rapat
+def clustered_vectors(count, dim, clusters, noise, rng):
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + noise * rng.normal(size=(count, dim)).astype(np.float32), labels
+
+
+def _latency_ms(index, queries, k, nprobe):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, k, nprobe=nprobe)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000.0
+    return float(np.percentile(times, 50)), float(np.percentile(times, 95))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=1280)
+    parser.add_argument("--clusters", type=int, default=60, help="jumlah kelompok sintetis")
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    results = []
+    for size in args.sizes:
+        vectors, labels = clustered_vectors(size + args.queries, args.dim, args.clusters, args.noise, rng)
+        data, queries = vectors[:size], vectors[size:]
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            info = write_index(directory, data, [str(i) for i in range(size)], labels[:size], ["x"] * args.clusters)
+            build_seconds = time.perf_counter() - start
+            index = EmbeddingIndex(directory)
+            nlist = info["nlist"]
+            _, exact_ids = index.search(queries, args.k, nprobe=nlist)
+            exact_p50, exact_p95 = _latency_ms(index, queries, args.k, nlist)
+            result = {
+                "size": size,
+                "nlist": nlist,
+                "build_s": build_seconds,
+                "index_mb": sum(os.path.getsize(os.path.join(directory, name))
+                                for name in os.listdir(directory)) / 1e6,
+                "ood_threshold": info["ood_threshold"],
+                "exact_p50_ms": exact_p50,
+                "exact_p95_ms": exact_p95,
+                "ivf": [],
+            }
+            for nprobe in args.nprobe:
+                if nprobe >= nlist:
+                    continue
+                _, ids = index.search(queries, args.k, nprobe=nprobe)
+                recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, exact_ids)])
+                p50, p95 = _latency_ms(index, queries, args.k, nprobe)
+                result["ivf"].append({"nprobe": nprobe, "p50_ms": p50, "p95_ms": p95,
+                                      "recall_at_k": float(recall), "speedup_p50": exact_p50 / p50})
+            del index
+        results.append(result)
+    print(json.dumps({"dim": args.dim, "k": args.k, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
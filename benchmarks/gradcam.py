@@ -0,0 +1,97 @@
+"""Biaya penjelasan Grad-CAM dibandingkan prediksi biasa, per gambar.
+
+Untuk setiap ukuran batch diukur waktu per gambar dari:
+
+- predict_batch: prediksi biasa;
+- predict_with_gradcam: prediksi + heatmap dalam satu forward + backward pass;
+- "dua pass": prediksi lalu Grad-CAM terpisah (cara naif, model jalan dua kali).
+
+Ditambah waktu overlay heatmap ke gambar ukuran upload (explain.heatmap_overlay)
+dan waktu jawaban dari cache prediksi (gambar yang sama dijelaskan ulang).
+
+    python -m benchmarks.gradcam
+    python -m benchmarks.gradcam --model Model_CNN_Baru_Final.h5 --batch-sizes 1 4 16
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+from batch_predict import collect_image_paths
+from explain import heatmap_overlay
+from preprocessing import load_images
+
+
+def _per_image_ms(fn, batch, repeats):
+    fn(batch)  # warmup/tracing untuk ukuran batch ini
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(batch)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000.0 / len(batch))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--images", default="dataset", help="folder atau pola glob gambar")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--upload-size", default="1600x1200", help="ukuran gambar untuk overlay (WxH)")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    paths = collect_image_paths(args.images)
+    if not paths:
+        parser.error(f"tidak ada gambar di {args.images}")
+
+    from inference import create_prediction_cache, load_model, predict_image_explained
+
+    model = load_model(args.model)
+    if model.gradcam_shape is None:
+        parser.error(f"engine {model.name} tidak menyediakan Grad-CAM; pakai model .keras/.h5")
+    images = load_images(paths[:max(args.batch_sizes)], model.image_size)
+    results = []
+    for batch_size in args.batch_sizes:
+        batch = np.resize(images, (batch_size,) + images.shape[1:])
+        predict_ms = _per_image_ms(model.predict_batch, batch, args.repeats)
+        gradcam_ms = _per_image_ms(model.predict_with_gradcam, batch, args.repeats)
+        results.append({
+            "batch_size": batch_size,
+            "predict_ms": predict_ms,
+            "predict_with_gradcam_ms": gradcam_ms,
+            "two_pass_ms": predict_ms + gradcam_ms,
+            "gradcam_overhead": gradcam_ms / predict_ms - 1.0,
+        })
+
+    width, height = (int(v) for v in args.upload_size.lower().split("x"))
+    upload = Image.open(paths[0]).convert("RGB").resize((width, height))
+    _, heatmaps, _ = model.predict_with_gradcam(images[:1])
+    heatmap_overlay(upload, heatmaps[0])
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        heatmap_overlay(upload, heatmaps[0])
+    overlay_ms = (time.perf_counter() - start) * 1000.0 / args.repeats
+
+    cache = create_prediction_cache()
+    cache.bind(model.fingerprint)
+    predict_image_explained(model, upload, cache=cache)
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        predict_image_explained(model, upload, cache=cache)
+    cached_ms = (time.perf_counter() - start) * 1000.0 / args.repeats
+
+    print(json.dumps({
+        "model": args.model,
+        "gradcam_shape": list(model.gradcam_shape),
+        "results": results,
+        "overlay_ms": overlay_ms,
+        "cached_explain_ms": cached_ms,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
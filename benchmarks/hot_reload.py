@@ -0,0 +1,130 @@
+"""Hot reload dan A/B ModelManager di bawah beban terus-menerus.
+
+Folder model sementara diisi model --primary. Selagi beberapa klien terus
+memprediksi, model --candidate disalin ke folder (model terbaru = versi utama
+baru), lalu routing.json membagi trafik 50/50 antara keduanya. Yang diukur:
+jumlah request gagal selama penukaran (harus 0), waktu dari file disalin
+sampai request pertama dilayani versi baru, latensi maksimum selama versi
+baru dimuat, dan statistik per versi dari fase A/B.
+
+Kedua model harus punya manifest (python model_manifest.py create ...).
+
+    python -m benchmarks.hot_reload --primary Model_CNN_Baru_Final.keras --candidate Model_CNN_Baru_Final.h5
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+from batch_predict import collect_image_paths
+from model_manager import ROUTING_FILE, ModelManager, VersionStats
+from model_manifest import manifest_path
+
+
+def _copy_model(path, directory):
+    # Salin model dulu, manifest terakhir: model baru baru terlihat setelah lengkap
+    for source in (path, manifest_path(path)):
+        shutil.copyfile(source, os.path.join(directory, os.path.basename(source)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--primary", default=config.MODEL_PATH)
+    parser.add_argument("--candidate", default="Model_CNN_Baru_Final.h5")
+    parser.add_argument("--images", default="dataset", help="folder atau pola glob gambar")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--phase-seconds", type=float, default=10, help="durasi setiap fase")
+    parser.add_argument("--poll-seconds", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    for path in (args.primary, args.candidate):
+        if not os.path.isfile(manifest_path(path)):
+            parser.error(f"manifest {manifest_path(path)} tidak ditemukan")
+    images = [Image.open(path).convert("RGB") for path in collect_image_paths(args.images)[:64]]
+    if not images:
+        parser.error(f"tidak ada gambar di {args.images}")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        _copy_model(args.primary, model_dir)
+        manager = ModelManager(model_dir=model_dir, poll_interval=args.poll_seconds, retire_after=5)
+        manager.route()
+        primary_name = os.path.basename(args.primary)
+        candidate_name = os.path.basename(args.candidate)
+
+        log, errors = [], []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def client(index):
+            rng = np.random.default_rng(index)
+            while not stop.is_set():
+                version = manager.route(key=f"client-{index}-{rng.integers(1 << 30)}")
+                image = images[rng.integers(len(images))]
+                start = time.perf_counter()
+                try:
+                    version.predict_image(image)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                with lock:
+                    log.append((start, time.perf_counter() - start, version.name))
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+        for thread in threads:
+            thread.start()
+
+        time.sleep(args.phase_seconds)
+        copied_at = time.perf_counter()
+        _copy_model(args.candidate, model_dir)
+        while manager.route().name != candidate_name and time.perf_counter() - copied_at < 300:
+            time.sleep(0.05)
+        swapped_at = time.perf_counter()
+        time.sleep(args.phase_seconds / 2)
+
+        with open(os.path.join(model_dir, ROUTING_FILE), "w", encoding="utf-8") as f:
+            json.dump({"primary": primary_name, "candidate": candidate_name, "candidate_percent": 50}, f)
+        ab_deadline = time.perf_counter() + 300
+        while len(manager.versions()) < 2 and time.perf_counter() < ab_deadline:
+            time.sleep(0.05)
+        for version in manager.versions():
+            version.stats = VersionStats()  # statistik A/B dihitung dari awal fase
+        ab_started = time.perf_counter()
+        time.sleep(args.phase_seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        status = manager.status()
+        manager.close()
+
+    first_served = min((start for start, _, name in log if name == candidate_name and start >= copied_at), default=None)
+    before = [latency for start, latency, _ in log if start < copied_at]
+    during = [latency for start, latency, _ in log if copied_at <= start < swapped_at]
+    report = {
+        "clients": args.clients,
+        "requests": len(log),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "reload_seconds": swapped_at - copied_at,
+        "first_request_on_new_version_s": first_served - copied_at if first_served is not None else None,
+        "latency_p50_before_ms": float(np.percentile(before, 50) * 1000.0) if before else None,
+        "latency_max_before_ms": float(max(before) * 1000.0) if before else None,
+        "requests_during_reload": len(during),
+        "latency_max_during_reload_ms": float(max(during) * 1000.0) if during else None,
+        "ab_requests": {name: sum(1 for start, _, n in log if n == name and start >= ab_started)
+                        for name in (primary_name, candidate_name)},
+        "ab_versions": status["versions"],
+        "events": status["events"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Benchmark inferensi lengkap: setiap model x engine x thread x batch x resolusi.
+
+Setiap kombinasi (model, thread intra-op, thread inter-op) dijalankan di proses
+Python baru, karena jumlah thread runtime TensorFlow tidak bisa diubah setelah
+runtime aktif. Proses baru juga memberi cold start (import + load + warmup +
+prediksi pertama) dan peak RSS yang bersih. Di dalam proses itu semua batch
+size dan resolusi diukur berurutan.
+
+Satu iterasi = jalur prediksi lengkap: decode + resize N gambar JPEG berukuran
+--resolutions (ukuran foto yang diunggah pengguna), lalu satu forward pass.
+Ukuran input model sendiri tetap (dari manifest). Thread inter-op hanya
+berlaku untuk engine keras; TFLite dan ONNX Runtime dijalankan dengan satu
+thread inter-op.
+
+    python -m benchmarks.inference_matrix
+    python -m benchmarks.inference_matrix --models Model_CNN_Baru_Final.keras Model_CNN_Baru_Final.onnx \\
+        --threads 1 2 4 --batch-sizes 1 8 32 --output hasil_benchmark.json
+
+Hasil: tabel perbandingan (markdown) di stdout, JSON lengkap di --output, dan
+ringkasan konfigurasi terbaik per model untuk setiap jumlah thread (ukuran mesin).
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MODEL_PATTERNS = ("*.keras", "*.h5", "*.tflite", "*.onnx", "models/*.keras", "models/*.tflite", "models/*.onnx")
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # Linux: KB
+
+
+def _jpeg_bytes(source, resolution):
+    from PIL import Image
+
+    with Image.open(source) as img:
+        img = img.convert("RGB").resize(resolution)
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _percentiles(seconds):
+    ms = np.asarray(seconds) * 1000.0
+    return {f"p{q}_ms": float(np.percentile(ms, q)) for q in (50, 95, 99)}
+
+
+# Proses anak: satu model dengan satu pengaturan thread, semua batch x resolusi
+def _child(spec):
+    start = time.perf_counter()
+    if spec["inter_op_threads"] and spec["engine"] == "keras":
+        import tensorflow as tf
+
+        tf.config.threading.set_inter_op_parallelism_threads(spec["inter_op_threads"])
+    from engines import create_engine
+    from preprocessing import load_images
+
+    imported = time.perf_counter()
+    model = create_engine(spec["model"], spec["engine"], num_threads=spec["intra_op_threads"]).load()
+    loaded = time.perf_counter()
+    model.warmup()
+    warmed = time.perf_counter()
+    images = {tuple(r): _jpeg_bytes(spec["sample"], tuple(r)) for r in spec["resolutions"]}
+    first = load_images([io.BytesIO(images[tuple(spec["resolutions"][0])])], model.image_size)
+    first_start = time.perf_counter()
+    model.predict_batch(first)
+    first_prediction = time.perf_counter() - first_start
+    cold_start = {
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "warmup_s": warmed - loaded,
+        "first_prediction_s": first_prediction,
+        "total_s": warmed - start + first_prediction,
+    }
+    rss_after_load = _peak_rss_mb()
+
+    cases = []
+    for batch_size in sorted(spec["batch_sizes"]):
+        for resolution in spec["resolutions"]:
+            data = images[tuple(resolution)]
+            preprocess, forward, total = [], [], []
+            deadline = time.perf_counter() + spec["max_seconds"]
+            iterations = 0
+            while iterations < spec["iterations"] and (iterations < 3 or time.perf_counter() < deadline):
+                t0 = time.perf_counter()
+                batch = load_images([io.BytesIO(data) for _ in range(batch_size)], model.image_size)
+                t1 = time.perf_counter()
+                model.predict_batch(batch)
+                t2 = time.perf_counter()
+                preprocess.append(t1 - t0)
+                forward.append(t2 - t1)
+                total.append(t2 - t0)
+                iterations += 1
+            cases.append({
+                "batch_size": batch_size,
+                "resolution": f"{resolution[0]}x{resolution[1]}",
+                "iterations": iterations,
+                "images_per_s": batch_size * iterations / float(np.sum(total)),
+                "latency": _percentiles(total),
+                "preprocess_p50_ms": float(np.percentile(preprocess, 50) * 1000.0),
+                "forward_p50_ms": float(np.percentile(forward, 50) * 1000.0),
+                "peak_rss_mb": _peak_rss_mb(),
+            })
+    print(json.dumps({
+        **spec,
+        "engine": model.name,
+        "input_size": list(model.image_size),
+        "cold_start": cold_start,
+        "rss_after_load_mb": rss_after_load,
+        "cases": cases,
+    }))
+
+
+def _run_child(spec):
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.inference_matrix", "--child", json.dumps(spec)],
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        return {**spec, "error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "gagal"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def find_models():
+    paths = []
+    for pattern in MODEL_PATTERNS:
+        paths.extend(p for p in sorted(glob.glob(pattern)) if p not in paths)
+    return paths
+
+
+def _rows(results):
+    for result in results:
+        for case in result.get("cases", []):
+            yield result, case
+
+
+def comparison_table(results):
+    lines = [
+        "| model | engine | intra | inter | batch | resolusi | img/s | p50 ms | p95 ms | p99 ms | pra-proses ms | forward ms | peak RSS MB | cold start s |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for result, case in _rows(results):
+        lines.append(
+            f"| {os.path.basename(result['model'])} | {result['engine']} | {result['intra_op_threads']} "
+            f"| {result['inter_op_threads'] or '-'} | {case['batch_size']} | {case['resolution']} "
+            f"| {case['images_per_s']:.1f} | {case['latency']['p50_ms']:.1f} | {case['latency']['p95_ms']:.1f} "
+            f"| {case['latency']['p99_ms']:.1f} | {case['preprocess_p50_ms']:.1f} | {case['forward_p50_ms']:.1f} "
+            f"| {case['peak_rss_mb']:.0f} | {result['cold_start']['total_s']:.1f} |"
+        )
+    for result in results:
+        if "error" in result:
+            lines.append(f"\n❌ {result['model']} (intra {result['intra_op_threads']}): {result['error']}")
+    return "\n".join(lines)
+
+
+# Konfigurasi terbaik per model dan jumlah thread intra-op: throughput
+# tertinggi (batch bebas) dan latensi p95 terendah untuk satu gambar (batch 1,
+# seperti predict_image)
+def best_configs(results):
+    best = {}
+    for result, case in _rows(results):
+        entry = {
+            "engine": result["engine"],
+            "inter_op_threads": result["inter_op_threads"],
+            "batch_size": case["batch_size"],
+            "resolution": case["resolution"],
+            "images_per_s": case["images_per_s"],
+            "p95_ms": case["latency"]["p95_ms"],
+        }
+        per_model = best.setdefault(result["model"], {})
+        slot = per_model.setdefault(str(result["intra_op_threads"]), {"throughput": None, "single_image_latency": None})
+        if slot["throughput"] is None or entry["images_per_s"] > slot["throughput"]["images_per_s"]:
+            slot["throughput"] = entry
+        if case["batch_size"] == 1 and (slot["single_image_latency"] is None
+                                        or entry["p95_ms"] < slot["single_image_latency"]["p95_ms"]):
+            slot["single_image_latency"] = entry
+    return best
+
+
+def _resolution(text):
+    width, height = text.lower().split("x")
+    return [int(width), int(height)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=None, help="default: semua model di folder ini dan models/")
+    parser.add_argument("--engine", default="", help="paksa engine; kosong = tebak dari ekstensi")
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}),
+                        help="jumlah thread intra-op")
+    parser.add_argument("--inter-op-threads", type=int, nargs="+", default=[1], help="hanya untuk engine keras")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--resolutions", type=_resolution, nargs="+",
+                        default=[[640, 480], [1920, 1080], [4032, 3024]], metavar="WxH")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--max-seconds", type=float, default=10, help="batas waktu per kasus (minimal 3 iterasi)")
+    parser.add_argument("--sample", default=None, help="gambar contoh (default: gambar pertama di dataset/)")
+    parser.add_argument("--output", default=None, help="file JSON hasil lengkap")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(json.loads(args.child))
+        return
+
+    from batch_predict import collect_image_paths
+    from engines import engine_for_path
+
+    models = args.models or find_models()
+    if not models:
+        parser.error("tidak ada file model ditemukan")
+    sample = args.sample or next(iter(collect_image_paths("dataset")), None)
+    if sample is None:
+        parser.error("butuh --sample (dataset/ kosong)")
+
+    results = []
+    for model in models:
+        engine = args.engine or engine_for_path(model)
+        inter_options = args.inter_op_threads if engine == "keras" else [None]
+        for threads in args.threads:
+            for inter in inter_options:
+                spec = {
+                    "model": model, "engine": engine, "intra_op_threads": threads, "inter_op_threads": inter,
+                    "batch_sizes": args.batch_sizes, "resolutions": args.resolutions, "sample": sample,
+                    "iterations": args.iterations, "max_seconds": args.max_seconds,
+                }
+                print(f"⏱️ {model} [{engine}] intra={threads} inter={inter or '-'}", file=sys.stderr)
+                results.append(_run_child(spec))
+
+    report = {
+        "machine": {"cpu_count": os.cpu_count(), "platform": sys.platform, "python": sys.version.split()[0]},
+        "results": results,
+        "best_per_thread_count": best_configs(results),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(comparison_table(results))
+    print(json.dumps(report["best_per_thread_count"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
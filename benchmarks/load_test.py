@@ -0,0 +1,153 @@
+"""Load test untuk api.py: RPS berkelanjutan dan latensi pada mesin CPU saja.
+
+Tanpa --url, server uvicorn dijalankan sebagai subprocess di port acak dengan
+cache prediksi dimatikan (setiap request benar-benar memanggil model).
+Gambar diambil bergiliran dari folder --images.
+
+    python -m benchmarks.load_test --images dataset --concurrency 16 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --batch 8
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+from batch_predict import collect_image_paths
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Jalankan api.py di subprocess dan tunggu sampai /healthz mengembalikan 200
+def start_server(port, timeout=300):
+    env = dict(os.environ, PREDICTION_CACHE_SIZE="0", PREDICTION_CACHE_DB="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server berhenti sebelum siap")
+        try:
+            with urllib.request.urlopen(url + "/healthz", timeout=1):
+                return server, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("server tidak siap dalam batas waktu")
+
+
+def _multipart(images):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, data in images:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + data + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def run_load(url, images, concurrency, duration, batch):
+    latencies, statuses = [], collections.Counter()
+    lock = threading.Lock()
+    cycle = itertools.cycle(images)
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < stop_at:
+            with lock:
+                chosen = [next(cycle) for _ in range(batch)]
+            if batch == 1:
+                request = urllib.request.Request(
+                    url + "/predict", data=chosen[0][1], headers={"Content-Type": "application/octet-stream"}
+                )
+            else:
+                body, content_type = _multipart(chosen)
+                request = urllib.request.Request(url + "/predict/batch", data=body, headers={"Content-Type": content_type})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                status = "connection_error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000.0 if latencies else np.zeros(1)
+    ok = statuses.get(200, 0)
+    return {
+        "concurrency": concurrency,
+        "batch": batch,
+        "duration_s": elapsed,
+        "requests_per_s": ok / elapsed,
+        "images_per_s": ok * batch / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+        "status_counts": {str(k): v for k, v in statuses.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="server yang sudah berjalan; kosong = jalankan api.py sendiri")
+    parser.add_argument("--images", default="dataset", help="folder atau pola glob gambar")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=20, help="detik per level concurrency")
+    parser.add_argument("--batch", type=int, default=1, help=">1 = pakai /predict/batch")
+    args = parser.parse_args(argv)
+
+    images = []
+    for path in collect_image_paths(args.images):
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    if not images:
+        parser.error(f"tidak ada gambar di {args.images}")
+
+    server, url = (None, args.url.rstrip("/")) if args.url else start_server(_free_port())
+    try:
+        run_load(url, images, 1, 2, args.batch)  # warmup
+        results = [run_load(url, images, c, args.duration, args.batch) for c in args.concurrency]
+        with urllib.request.urlopen(url + "/healthz") as response:
+            health = json.load(response)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps({"url": url, "images": len(images), "results": results, "server": health}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Biaya audio per rerun tab Ensiklopedia: baca file setiap rerun vs lapisan media.
+
+Mengukur alokasi memori dan ukuran payload st.audio per rerun untuk keenam
+sampel, lalu menguji server media (Range request) dan throughput-nya.
+
+    python -m benchmarks.media --reruns 50
+"""
+import argparse
+import http.client
+import json
+import time
+import tracemalloc
+
+import media
+
+AUDIO_PATHS = [f"data_suara/{name}.mp3" for name in ("Balungan", "Bonang", "Gambang", "Kendang", "Rebab", "Slentho")]
+
+
+# Cara lama: setiap rerun membaca ulang semua file lalu mengirim bytes ke st.audio
+def _read_every_rerun():
+    payload = []
+    for path in AUDIO_PATHS:
+        with open(path, "rb") as f:
+            payload.append(f.read())
+    return payload
+
+
+def _measure(fn, reruns):
+    fn()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(reruns):
+        payload = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms_per_rerun": elapsed * 1000.0 / reruns,
+        "peak_alloc_kb": peak / 1024,
+        "payload_kb_per_rerun": sum(len(p) for p in payload) / 1024,
+    }
+
+
+def _fetch(port, name, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", "/" + name, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, dict(response.getheaders()), body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    library = media.MediaLibrary()
+    server = media.MediaServer(library, port=0)
+    base_url = f"http://127.0.0.1:{server.port}/"
+
+    def url_every_rerun():
+        return [(base_url + library.resolve(path)).encode() for path in AUDIO_PATHS]
+
+    def cached_bytes_every_rerun():
+        return [library.get(library.resolve(path)).to_bytes() for path in AUDIO_PATHS]
+
+    report = {
+        "library_kb": library.total_bytes() / 1024,
+        "read_file_every_rerun": _measure(_read_every_rerun, args.reruns),
+        "media_cache_bytes": _measure(cached_bytes_every_rerun, args.reruns),
+        "media_server_url": _measure(url_every_rerun, args.reruns),
+    }
+    # media_cache_bytes tetap mengirim bytes yang sama, tetapi objeknya dipakai bersama
+    # (tanpa alokasi baru); hanya media_server_url yang menghilangkan payload bytes.
+
+    name = library.resolve(AUDIO_PATHS[0])
+    status, headers, body = _fetch(server.port, name, {"Range": "bytes=0-1023"})
+    status_304, _, _ = _fetch(server.port, name, {"If-None-Match": headers["ETag"]})
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        _fetch(server.port, name)
+    elapsed = time.perf_counter() - start
+    report["server"] = {
+        "range_status": status,
+        "range_bytes": len(body),
+        "content_range": headers.get("Content-Range"),
+        "etag_revalidate_status": status_304,
+        "full_file_requests_per_s": args.requests / elapsed,
+    }
+    server.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Overhead instrumentasi metrics.py dibandingkan latensi prediksi.
+
+Mengukur biaya satu metrics.timed(...) (perf_counter x2 + observe histogram),
+satu Counter.inc dan satu render /metrics, lalu membandingkannya dengan
+predict_image satu gambar tanpa cache (yang di dalamnya sudah memanggil
+timed dua kali: preprocess dan inference). Instrumentasi layak dibiarkan
+aktif jika overhead per prediksi jauh di bawah 1%.
+
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --model Model_CNN_Baru_Final.onnx --iterations 200000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+import metrics
+from batch_predict import collect_image_paths
+
+
+def _ns_per_call(fn, iterations):
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def _timed_empty():
+    with metrics.timed("benchmark"):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--images", default="dataset", help="folder atau pola glob gambar")
+    parser.add_argument("--iterations", type=int, default=100000, help="iterasi untuk primitif metrik")
+    parser.add_argument("--predictions", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    timed_ns = _ns_per_call(_timed_empty, args.iterations)
+    counter_ns = _ns_per_call(lambda: metrics.REQUESTS.inc(app="benchmark", outcome="ok"), args.iterations)
+    render_start = time.perf_counter()
+    body = metrics.REGISTRY.render()
+    render_ms = (time.perf_counter() - render_start) * 1000.0
+
+    from inference import load_model, predict_image
+
+    model = load_model(args.model)
+    model.warmup()
+    paths = collect_image_paths(args.images)
+    if not paths:
+        parser.error(f"tidak ada gambar di {args.images}")
+    images = [Image.open(path).convert("RGB") for path in paths[:args.predictions]]
+    latencies = []
+    for i in range(args.predictions):
+        start = time.perf_counter()
+        predict_image(model, images[i % len(images)])
+        latencies.append(time.perf_counter() - start)
+    predict_ms = float(np.percentile(latencies, 50) * 1000.0)
+
+    # Per prediksi di aplikasi: 3 timer (upload_decode, preprocess, inference) + 2 counter
+    per_prediction_us = (3 * timed_ns + 2 * counter_ns) / 1000.0
+    print(json.dumps({
+        "timed_ns": timed_ns,
+        "counter_inc_ns": counter_ns,
+        "render_ms": render_ms,
+        "render_bytes": len(body),
+        "otel_enabled": metrics._tracer is not None,
+        "predict_image_p50_ms": predict_ms,
+        "instrumentation_per_prediction_us": per_prediction_us,
+        "overhead_percent": per_prediction_us / 10.0 / predict_ms,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Simulasi banyak pengguna yang menekan "Analisis Gambar" bersamaan.
+
+Membandingkan prediksi langsung per request (batch size 1) dengan MicroBatcher.
+
+    python -m benchmarks.micro_batching --concurrency 32 --requests 512
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import inference
+
+
+def run_load(predict_one, concurrency, requests, sample):
+    latencies = []
+
+    def call(_):
+        start = time.perf_counter()
+        predict_one(sample)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000.0
+    return {
+        "throughput_rps": requests / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=inference.MODEL_PATH)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args(argv)
+
+    model = inference.load_model(args.model)
+    sample = np.random.default_rng(0).random(model.image_size[::-1] + (3,), dtype=np.float32)
+    inference.predict_batch(model, sample[None])  # warmup
+
+    direct = run_load(lambda x: inference.predict_batch(model, x[None]), args.concurrency, args.requests, sample)
+
+    batcher = inference.create_batcher(model, args.max_batch_size, args.max_wait_ms)
+    batched = run_load(batcher.predict, args.concurrency, args.requests, sample)
+    stats = batcher.stats()
+    batcher.close()
+
+    print(json.dumps({"direct": direct, "micro_batching": batched, "batcher_stats": stats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
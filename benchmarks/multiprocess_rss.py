@@ -0,0 +1,128 @@
+"""Memori per worker: setiap worker memuat model sendiri vs server inferensi bersama.
+
+Menjalankan N proses worker (seperti N proses streamlit/uvicorn) dalam dua mode:
+
+- "local": setiap worker memanggil inference.load_model sendiri (bobot dan
+  runtime TensorFlow/ONNX di setiap proses);
+- "shared": satu inference_server.py memuat model, worker memakai RemoteEngine
+  (INFERENCE_SERVER) dan mengirim batch lewat shared memory.
+
+Setelah setiap worker selesai memuat model dan menjalankan beberapa prediksi,
+RSS dan PSS dibaca dari /proc/<pid>/smaps_rollup selagi worker masih hidup.
+PSS membagi halaman yang dipakai bersama (mis. library .so yang sama) ke semua
+proses pemakainya, jadi jumlah PSS = memori fisik yang benar-benar terpakai.
+Di mode shared, proses server ikut dijumlahkan. Juga dilaporkan waktu muat
+model di worker dan latensi p50 prediksi satu gambar. Hanya Linux.
+
+    python -m benchmarks.multiprocess_rss
+    python -m benchmarks.multiprocess_rss --model Model_CNN_Baru_Final.onnx --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import config
+
+
+def _memory_mb(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1].lower()] = int(parts[1]) / 1024.0
+    return values
+
+
+# Dijalankan di proses worker: muat model, prediksi, lapor, lalu tunggu
+# sampai stdin ditutup supaya memorinya bisa diukur
+def _worker(model_path, repeats):
+    import inference
+
+    start = time.perf_counter()
+    model = inference.load_model(model_path)
+    load_seconds = time.perf_counter() - start
+    batch = np.random.default_rng(os.getpid()).integers(0, 256, (1,) + tuple(model.input_shape[1:]), np.uint8)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_batch(batch)
+        times.append(time.perf_counter() - start)
+    print(json.dumps({"load_s": load_seconds, "p50_ms": float(np.median(times) * 1000.0)}), flush=True)
+    sys.stdin.read()
+
+
+def _start_server(model, socket_path):
+    server = subprocess.Popen([sys.executable, "inference_server.py", "--socket", socket_path, "--preload", model],
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              stderr=subprocess.DEVNULL)
+    while not os.path.exists(socket_path):
+        if server.poll() is not None:
+            raise RuntimeError("inference_server.py berhenti sebelum siap")
+        time.sleep(0.2)
+    return server
+
+
+def _run(mode, workers, model, repeats, socket_path):
+    env = dict(os.environ, INFERENCE_SERVER=socket_path if mode == "shared" else "",
+               PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    server = _start_server(os.path.abspath(model), socket_path) if mode == "shared" else None
+    processes = []
+    try:
+        start = time.perf_counter()
+        for _ in range(workers):
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.multiprocess_rss", "--worker", model, "--repeats", str(repeats)],
+                env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True))
+        reports = [json.loads(p.stdout.readline()) for p in processes]
+        ready_seconds = time.perf_counter() - start
+        memory = [_memory_mb(p.pid) for p in processes]
+        server_memory = _memory_mb(server.pid) if server else {"rss": 0.0, "pss": 0.0}
+    finally:
+        for p in processes:
+            p.stdin.close()
+            p.wait()
+        if server:
+            server.terminate()
+            server.wait()
+    return {
+        "mode": mode,
+        "workers": workers,
+        "worker_rss_mb": float(np.mean([m["rss"] for m in memory])),
+        "worker_pss_mb": float(np.mean([m["pss"] for m in memory])),
+        "server_pss_mb": server_memory["pss"],
+        "total_pss_mb": sum(m["pss"] for m in memory) + server_memory["pss"],
+        "worker_load_s": float(np.mean([r["load_s"] for r in reports])),
+        "all_ready_s": ready_seconds,
+        "predict_p50_ms": float(np.median([r["p50_ms"] for r in reports])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeats", type=int, default=30, help="prediksi per worker sebelum diukur")
+    parser.add_argument("--worker", metavar="MODEL", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        return _worker(args.worker, args.repeats)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "inference.sock")
+        for workers in args.workers:
+            for mode in ("local", "shared"):
+                results.append(_run(mode, workers, args.model, args.repeats, socket_path))
+                print(json.dumps(results[-1]), file=sys.stderr, flush=True)
+    print(json.dumps({"model": args.model, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
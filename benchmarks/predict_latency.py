@@ -0,0 +1,50 @@
+"""Latensi prediksi satu gambar: model.predict vs model(x) vs tf.function (KerasEngine).
+
+    python -m benchmarks.predict_latency --iterations 200
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import inference
+from engines import KerasEngine
+
+
+def measure(fn, sample, iterations, warmup=5):
+    for _ in range(warmup):
+        fn(sample)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(sample)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000.0
+    return {
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=inference.MODEL_PATH)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    engine = KerasEngine(args.model).load().warmup()
+    keras_model = engine.keras_model
+    sample = np.random.default_rng(0).random((1,) + engine.input_shape[1:], dtype=np.float32)
+
+    results = {
+        "model.predict": measure(lambda x: keras_model.predict(x, verbose=0), sample, args.iterations),
+        "model(x, training=False)": measure(lambda x: keras_model(x, training=False).numpy(), sample, args.iterations),
+        "KerasEngine (tf.function)": measure(engine.predict_batch, sample, args.iterations),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Latensi cache prediksi: miss (prediksi penuh) vs hit memori vs hit SQLite.
+
+    python -m benchmarks.prediction_cache --iterations 1000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import inference
+from prediction_cache import PredictionCache
+
+
+def _percentiles(latencies):
+    latencies = np.array(latencies) * 1000.0
+    return {"p50_ms": float(np.percentile(latencies, 50)), "p99_ms": float(np.percentile(latencies, 99))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=inference.MODEL_PATH)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    model = inference.load_model(args.model)
+    compute = lambda array: inference.predict_batch(model, array[None])[0]
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, (args.iterations,) + model.input_shape[1:], dtype=np.uint8)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PredictionCache(capacity=args.iterations, db_path=os.path.join(tmp, "cache.sqlite"))
+        cache.bind(model.fingerprint)
+        results = {}
+        for name in ("miss", "memory_hit"):
+            latencies = []
+            for image in images[:100] if name == "miss" else images[:100].repeat(args.iterations // 100, axis=0):
+                start = time.perf_counter()
+                cache.get_or_compute(image, compute)
+                latencies.append(time.perf_counter() - start)
+            results[name] = _percentiles(latencies)
+
+        # Kosongkan tier memori supaya semua lookup jatuh ke SQLite
+        cache._memory.clear()
+        cache.capacity = 0
+        latencies = []
+        for image in images[:100]:
+            start = time.perf_counter()
+            cache.get_or_compute(image, compute)
+            latencies.append(time.perf_counter() - start)
+        results["disk_hit"] = _percentiles(latencies)
+        results["stats"] = cache.stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Waktu startup app Streamlit: time-to-first-paint dan time-to-first-prediction.
+
+Setiap pengukuran dijalankan di proses Python baru (cold start). First paint =
+run pertama script selesai (halaman lengkap terkirim ke browser); first
+prediction = model selesai dimuat di background dan satu prediksi berhasil.
+
+    python -m benchmarks.startup --app app3.py --runs 3
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def _child(app):
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=600)
+    at.run()
+    first_paint = time.perf_counter() - start
+
+    import inference
+    import model_manager
+
+    model = model_manager.get_manager().route().model
+    sample = np.zeros((1,) + model.input_shape[1:], dtype=np.float32)
+    inference.predict_batch(model, sample)
+    first_prediction = time.perf_counter() - start
+    print(json.dumps({
+        "first_paint_s": first_paint,
+        "first_prediction_s": first_prediction,
+        "exceptions": [str(e.value) for e in at.exception],
+    }))
+
+
+def _run_child(args):
+    out = subprocess.run([sys.executable] + args, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="app3.py")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.app)
+        return
+
+    # Pembanding: biaya import TensorFlow yang dulu dibayar sebelum halaman tampil
+    tf_import = _run_child(["-c", "import json, time; t = time.perf_counter(); import tensorflow; "
+                                  "print(json.dumps(time.perf_counter() - t))"])
+    runs = [_run_child(["-m", "benchmarks.startup", "--child", "--app", args.app]) for _ in range(args.runs)]
+    report = {
+        "app": args.app,
+        "tensorflow_import_s": tf_import,
+        "first_paint_s": float(np.median([r["first_paint_s"] for r in runs])),
+        "first_prediction_s": float(np.median([r["first_prediction_s"] for r in runs])),
+        "exceptions": runs[-1]["exceptions"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Biaya test-time augmentation: semua view dalam satu batch vs satu per satu.
+
+Untuk setiap mode TTA diukur waktu pembuatan view (preprocessing.tta_views)
+dan forward pass, dibandingkan dengan memprediksi view yang sama satu per satu
+(N kali predict_batch berukuran 1) dan dengan prediksi tanpa TTA. Akurasi per
+mode diukur dengan evaluate.py --tta.
+
+    python -m benchmarks.tta
+    python -m benchmarks.tta --model Model_CNN_Baru_Final.onnx --modes flip crops_flip
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+from batch_predict import collect_image_paths
+from preprocessing import TTA_MODES, tta_views
+
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--images", default="dataset", help="folder atau pola glob gambar")
+    parser.add_argument("--modes", nargs="+", choices=list(TTA_MODES), default=list(TTA_MODES))
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    paths = collect_image_paths(args.images)
+    if not paths:
+        parser.error(f"tidak ada gambar di {args.images}")
+    image = Image.open(paths[0]).convert("RGB")
+
+    from inference import load_model
+
+    model = load_model(args.model)
+    results = []
+    for mode in args.modes:
+        views = tta_views(image, model.image_size, mode)
+        model.predict_batch(views)  # warmup untuk ukuran batch ini
+        results.append({
+            "mode": mode,
+            "views": len(views),
+            "views_ms": _median_ms(lambda: tta_views(image, model.image_size, mode), args.repeats),
+            "batched_forward_ms": _median_ms(lambda: model.predict_batch(views), args.repeats),
+            "sequential_forward_ms": _median_ms(
+                lambda: [model.predict_batch(view[np.newaxis]) for view in views], args.repeats),
+        })
+    baseline = next((r["batched_forward_ms"] for r in results if r["mode"] == "none"), None)
+    for result in results:
+        result["speedup_vs_sequential"] = result["sequential_forward_ms"] / result["batched_forward_ms"]
+        if baseline:
+            result["cost_vs_no_tta"] = result["batched_forward_ms"] / baseline
+    print(json.dumps({"model": args.model, "image": paths[0], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
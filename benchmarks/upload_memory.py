@@ -0,0 +1,130 @@
+"""Memori puncak per upload: decode penuh lama vs uploads.read_upload.
+
+Setiap kasus dijalankan di proses anak baru supaya puncak RSS tidak tercampur
+antar kasus. Byte file sudah di memori sebelum pengukuran (seperti
+UploadedFile Streamlit), jadi yang diukur hanya tambahan dari decode,
+thumbnail dan array input model.
+
+- "full": Image.open().convert("RGB") resolusi penuh, array untuk st.image,
+  encode JPEG untuk browser, lalu resize ke input model (alur app2/app3 lama);
+- "bounded": uploads.read_upload (draft mode, batas piksel, thumbnail) lalu
+  encode thumbnail untuk browser.
+
+Gambar sintetis: foto JPEG 12 dan 40 megapiksel (dengan tag orientasi EXIF)
+dan PNG 8 megapiksel. --max-peak-mb membuat proses keluar dengan kode 1 jika
+puncak mode bounded melebihi batas (bisa dipakai sebagai cek di CI).
+
+    python -m benchmarks.upload_memory
+    python -m benchmarks.upload_memory --max-peak-mb 64
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+CASES = {
+    "jpeg_12mp": ((4000, 3000), "JPEG"),
+    "jpeg_40mp": ((7744, 5184), "JPEG"),
+    "png_8mp": ((3264, 2448), "PNG"),
+}
+
+
+def _write_image(path, size, fmt):
+    width, height = size
+    # Gradien + noise kecil: ukuran file mirip foto, bukan gambar polos
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    rows = []
+    rng = np.random.default_rng(0)
+    for start in range(0, height, 512):
+        count = min(512, height - start)
+        y = np.linspace(start, start + count, count, dtype=np.float32)[:, None] * 255 / height
+        block = np.stack([np.broadcast_to(x, (count, width)), np.broadcast_to(y, (count, width)),
+                          np.full((count, width), 128, np.float32)], axis=-1)
+        rows.append((block + rng.normal(0, 8, block.shape)).clip(0, 255).astype(np.uint8))
+    img = Image.fromarray(np.concatenate(rows))
+    if fmt == "JPEG":
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        img.save(path, "JPEG", quality=90, exif=exif.tobytes())
+    else:
+        img.save(path, "PNG", compress_level=1)
+
+
+def _rss_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return None
+
+
+# Dijalankan di proses anak: ukur tambahan puncak RSS satu upload
+def _measure(mode, path):
+    from config import IMAGE_SIZE
+    from preprocessing import load_image
+    from uploads import read_upload
+
+    with open(path, "rb") as f:
+        data = io.BytesIO(f.read())
+    before = _rss_kb("VmRSS")
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")  # reset VmHWM (puncak RSS) ke RSS saat ini
+        peak_field = "VmHWM"
+    except OSError:
+        peak_field = None
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "full":
+        img = Image.open(data).convert("RGB")
+        display = np.asarray(img)
+        Image.fromarray(display).save(io.BytesIO(), "JPEG")
+        array = load_image(img, IMAGE_SIZE)
+    else:
+        upload = read_upload(data, IMAGE_SIZE)
+        upload.thumbnail.save(io.BytesIO(), "JPEG")
+        array = upload.array
+    seconds = time.perf_counter() - start
+    peak = _rss_kb(peak_field) if peak_field else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"peak_mb": (peak - before) / 1024.0, "seconds": seconds, "array": list(array.shape)}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--max-peak-mb", type=float, default=None)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return _measure(*args.child)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.cases:
+            size, fmt = CASES[name]
+            path = os.path.join(directory, f"{name}.{fmt.lower()}")
+            _write_image(path, size, fmt)
+            result = {"case": name, "file_mb": os.path.getsize(path) / 1024 / 1024}
+            for mode in ("full", "bounded"):
+                output = subprocess.run([sys.executable, "-m", "benchmarks.upload_memory", "--child", mode, path],
+                                        capture_output=True, text=True, check=True).stdout
+                result[mode] = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+    print(json.dumps(results, indent=2))
+    if args.max_peak_mb is not None:
+        worst = max(r["bounded"]["peak_mb"] for r in results)
+        if worst > args.max_peak_mb:
+            print(f"puncak {worst:.1f} MB melebihi batas {args.max_peak_mb:g} MB", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Klasifikasi video: throughput, frame yang dibuang dan ketepatan timeline.
+
+Membuat video sintetis dari gambar dataset: beberapa segmen berurutan, satu
+kelas per segmen, dengan gerakan kamera kecil (crop bergeser) supaya setiap
+frame berbeda. Video lalu diklasifikasi dua kali dengan video_stream:
+
+- "file": dibaca secepat inferensi mampu (tanpa frame dibuang);
+- "realtime": diputar pada fps aslinya seperti kamera, frame dibuang jika
+  inferensi tertinggal.
+
+Yang dilaporkan: kelipatan waktu nyata, frame decode/sampel/dibuang/prediksi,
+ukuran batch rata-rata, serta porsi waktu video yang kelasnya benar di
+timeline dan selisih batas segmen terhadap label sebenarnya.
+
+    python -m benchmarks.video_stream
+    python -m benchmarks.video_stream --model Model_CNN_Baru_Final.onnx --resolution 1920x1080 --segment-seconds 6
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+import config
+from dataset import list_labelled_images
+from video_stream import _import_cv2, classify_stream
+
+
+def _resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+# Tulis video MJPG/AVI; mengembalikan daftar (kelas, mulai, selesai) sebenarnya
+def write_video(path, images, fps, segment_seconds, resolution):
+    cv2 = _import_cv2()
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, resolution)
+    width, height = resolution
+    truth, start = [], 0.0
+    for class_name, image_path in images:
+        with Image.open(image_path) as img:
+            base = np.asarray(img.convert("RGB").resize((int(width * 1.1), int(height * 1.1))))
+        frames = int(segment_seconds * fps)
+        for i in range(frames):
+            dx = int((base.shape[1] - width) * i / max(frames - 1, 1))
+            frame = base[:height, dx:dx + width]
+            writer.write(np.ascontiguousarray(frame[:, :, ::-1]))
+        truth.append((class_name, start, start + frames / fps))
+        start += frames / fps
+    writer.release()
+    return truth
+
+
+# Porsi waktu video yang kelas timeline-nya sama dengan label sebenarnya, dan
+# selisih rata-rata batas segmen (detik) ke batas timeline terdekat
+def score_timeline(timeline, truth, step=0.1):
+    duration = truth[-1][2]
+    times = np.arange(0.0, duration, step)
+
+    def label_at(segments, t):
+        for label, start, end in segments:
+            if start <= t < end:
+                return label
+        return segments[-1][0] if segments and t >= segments[-1][2] else None
+
+    predicted = [(s["class"], s["start_s"], s["end_s"]) for s in timeline]
+    correct = np.mean([label_at(predicted, t) == label_at(truth, t) for t in times])
+    boundaries = [start for _, start, _ in truth[1:]]
+    predicted_boundaries = [s["start_s"] for s in timeline[1:]]
+    errors = [min((abs(b - p) for p in predicted_boundaries), default=duration) for b in boundaries]
+    return {
+        "time_accuracy": float(correct),
+        "segments_true": len(truth),
+        "segments_predicted": len(timeline),
+        "boundary_error_s": float(np.mean(errors)) if errors else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--segment-seconds", type=float, default=4.0)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--resolution", type=_resolution, default=(1280, 720), metavar="WxH")
+    parser.add_argument("--min-fps", type=float, default=1.0)
+    parser.add_argument("--max-fps", type=float, default=5.0)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    paths, labels, class_names = list_labelled_images(args.dataset)
+    if not paths:
+        parser.error(f"tidak ada gambar berlabel di {args.dataset}")
+    # Gambar pertama setiap kelas, berurutan: satu segmen per kelas
+    first = {}
+    for path, label in zip(paths, labels):
+        first.setdefault(label, path)
+    images = [(class_names[label], path) for label, path in sorted(first.items())]
+
+    from inference import load_model
+
+    model = load_model(args.model)
+    report = {"model": args.model, "resolution": "x".join(map(str, args.resolution)), "fps": args.fps}
+    with tempfile.TemporaryDirectory() as directory:
+        video = os.path.join(directory, "pertunjukan.avi")
+        truth = write_video(video, images, args.fps, args.segment_seconds, args.resolution)
+        report["duration_s"] = truth[-1][2]
+        for mode in ("file", "realtime"):
+            result = classify_stream(model, video, min_fps=args.min_fps, max_fps=args.max_fps,
+                                     batch_size=args.batch_size, realtime=mode == "realtime")
+            report[mode] = {
+                "realtime_factor": result["realtime_factor"],
+                "frames": result["frames"],
+                "mean_batch_size": result["mean_batch_size"],
+                **score_timeline(result["timeline"], truth),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+
+# Konfigurasi inferensi bersama untuk app2.py, app3.py dan semua perintah CLI.
+# Semua nilai bisa diganti lewat environment variable, contoh:
+#   INFERENCE_ENGINE=onnx MODEL_PATH=Model_CNN_Baru_Final.onnx streamlit run app3.py
+
+MODEL_PATH = os.environ.get("MODEL_PATH", "Model_CNN_Baru_Final.keras")
+# keras | tflite | onnx; kosong = tebak dari ekstensi MODEL_PATH
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "")
+# MODEL_PATH boleh menunjuk manifest (.json). REQUIRE_MODEL_MANIFEST=1 menolak
+# model tanpa manifest (disarankan di production)
+REQUIRE_MODEL_MANIFEST = os.environ.get("REQUIRE_MODEL_MANIFEST", "0") == "1"
+# Hot reload dan A/B (model_manager.py). File model diperiksa setiap
+# MODEL_POLL_SECONDS detik (0 = tidak dipantau). Jika MODEL_DIR diisi, versi
+# aktif dibaca dari MODEL_DIR/routing.json atau model terbaru di folder itu;
+# jika kosong, MODEL_PATH yang dipakai dan MODEL_CANDIDATE (opsional) menerima
+# MODEL_CANDIDATE_PERCENT persen trafik.
+MODEL_DIR = os.environ.get("MODEL_DIR", "")
+MODEL_POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", 5))
+MODEL_CANDIDATE = os.environ.get("MODEL_CANDIDATE", "")
+MODEL_CANDIDATE_PERCENT = float(os.environ.get("MODEL_CANDIDATE_PERCENT", 0))
+# Jumlah thread intra-op untuk engine (TFLite/XNNPACK, ONNX Runtime)
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", os.cpu_count() or 1))
+# Server inferensi bersama (inference_server.py): path Unix socket. Jika diisi,
+# app2/app3/api.py tidak memuat model sendiri, tapi meminta prediksi ke satu
+# proses server lewat shared memory. INFERENCE_SERVER_KEY (opsional) = authkey
+# koneksi; socket sendiri hanya bisa dibuka oleh user yang sama (dibuat dengan umask 077).
+INFERENCE_SERVER = os.environ.get("INFERENCE_SERVER", "")
+INFERENCE_SERVER_KEY = os.environ.get("INFERENCE_SERVER_KEY", "")
+
+# Cache prediksi: jumlah entri di memori, file SQLite opsional (kosong = nonaktif)
+# dan batas ukuran file SQLite dalam MB
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 1024))
+PREDICTION_CACHE_DB = os.environ.get("PREDICTION_CACHE_DB", "")
+PREDICTION_CACHE_DB_MB = int(os.environ.get("PREDICTION_CACHE_DB_MB", 64))
+
+# Test-time augmentation (preprocessing.TTA_MODES): mode default untuk setiap
+# prediksi (none | flip | crops | crops_flip), bisa diganti per request. Crop
+# menutupi TTA_CROP_SCALE dari lebar/tinggi gambar.
+TTA_MODE = os.environ.get("TTA_MODE", "none")
+TTA_CROP_SCALE = float(os.environ.get("TTA_CROP_SCALE", 0.8))
+
+# Batas upload gambar di app/app2/app3 dan api.py (uploads.py): ukuran file,
+# jumlah piksel menurut header, jumlah piksel yang boleh di-decode (JPEG
+# di-decode dengan skala diperkecil, PNG selalu penuh) dan sisi terpanjang
+# thumbnail yang ditampilkan
+UPLOAD_MAX_MB = float(os.environ.get("UPLOAD_MAX_MB", 20))
+UPLOAD_MAX_PIXELS = int(float(os.environ.get("UPLOAD_MAX_MEGAPIXELS", 64)) * 1e6)
+UPLOAD_MAX_DECODE_PIXELS = int(float(os.environ.get("UPLOAD_MAX_DECODE_MEGAPIXELS", 12)) * 1e6)
+UPLOAD_THUMBNAIL_PX = int(os.environ.get("UPLOAD_THUMBNAIL_PX", 800))
+
+# Jumlah foto referensi termirip yang ditampilkan jika model punya index
+# embedding (embedding_index.py)
+EMBEDDING_NEIGHBOURS = int(os.environ.get("EMBEDDING_NEIGHBOURS", 5))
+
+# Server media untuk sampel audio (media.py). MEDIA_PORT=0 = tanpa server:
+# st.audio menerima bytes dari cache memori. Di balik reverse proxy, isi
+# MEDIA_BASE_URL dengan URL publik yang diteruskan ke server media.
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "data_suara")
+MEDIA_VARIANT = os.environ.get("MEDIA_VARIANT", "")  # "" (mp3 asli) atau "opus"
+MEDIA_HOST = os.environ.get("MEDIA_HOST", "127.0.0.1")
+MEDIA_PORT = int(os.environ.get("MEDIA_PORT", 0))
+MEDIA_BASE_URL = os.environ.get("MEDIA_BASE_URL", "")
+
+# HTTP API (api.py). API_WORKERS = ukuran thread pool untuk decode/inferensi,
+# API_MAX_PENDING = batas request yang diproses/antre sebelum ditolak (503).
+# Batch dengan "paths" hanya diizinkan jika API_IMAGE_ROOT diisi, dan path
+# harus berada di dalam folder tersebut. Batch dengan "urls" hanya jika
+# API_ALLOW_URLS=1; unduhan dibatasi ke alamat publik dan, jika diisi, ke host
+# di API_URL_ALLOWLIST (dipisah koma).
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", 8000))
+API_WORKERS = int(os.environ.get("API_WORKERS", 8))
+API_MAX_PENDING = int(os.environ.get("API_MAX_PENDING", 64))
+API_MAX_BODY_MB = float(os.environ.get("API_MAX_BODY_MB", 20))
+API_MAX_IMAGE_MB = float(os.environ.get("API_MAX_IMAGE_MB", 10))
+API_MAX_BATCH = int(os.environ.get("API_MAX_BATCH", 32))
+API_ALLOW_URLS = os.environ.get("API_ALLOW_URLS", "0") == "1"
+API_URL_ALLOWLIST = {host.strip().lower() for host in os.environ.get("API_URL_ALLOWLIST", "").split(",") if host.strip()}
+API_FETCH_TIMEOUT = float(os.environ.get("API_FETCH_TIMEOUT", 5))
+API_IMAGE_ROOT = os.environ.get("API_IMAGE_ROOT", "")
+
+# Metrik Prometheus (metrics.py). api.py selalu menyediakan GET /metrics;
+# app2/app3 membuka endpoint /metrics sendiri di METRICS_PORT (0 = nonaktif).
+# METRICS_OTEL=1 menambahkan span OpenTelemetry per tahap (butuh opentelemetry-api).
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_OTEL = os.environ.get("METRICS_OTEL", "0") == "1"
+
+IMAGE_SIZE = (225, 225)
+CLASS_NAMES = ["Balungan", "Bonang", "Gambang", "Kendang", "Rebab", "Slentho"]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
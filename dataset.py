@@ -0,0 +1,24 @@
+import os
+
+from config import IMAGE_EXTENSIONS
+
+
+# Kelas = nama subfolder, diurutkan alfabetis seperti flow_from_directory
+def list_class_names(root):
+    return sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+
+
+# Daftar (path, label) dari folder berstruktur dataset/<kelas>/<gambar>
+def list_labelled_images(root, class_names=None):
+    if class_names is None:
+        class_names = list_class_names(root)
+    paths, labels = [], []
+    for label, class_name in enumerate(class_names):
+        class_dir = os.path.join(root, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        for name in sorted(os.listdir(class_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_dir, name))
+                labels.append(label)
+    return paths, labels, class_names
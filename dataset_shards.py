@@ -0,0 +1,190 @@
+"""Dataset terpaket: gambar yang sudah di-decode dan di-resize (uint8) + label dalam shard .npy.
+
+Shard dibaca dengan memory-map, jadi training/evaluasi berulang tidak perlu
+men-decode JPEG lagi dan data dibagi lewat page cache tanpa salinan.
+
+Contoh:
+    python dataset_shards.py dataset --output dataset_packed
+    python dataset_shards.py dataset --output dataset_packed_255 --image-size 255 255
+
+Isi folder output:
+    manifest.json         urutan kelas, ukuran gambar, daftar shard dan file sumber
+    images-00000.npy ...  uint8 (N, H, W, 3)
+    labels-00000.npy ...  int32 (N,)
+"""
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from config import IMAGE_SIZE
+from dataset import list_labelled_images
+from preprocessing import load_image
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def is_packed(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+# Dijalankan di proses worker: decode + resize dengan jalur yang sama seperti inferensi
+def _decode_worker(args):
+    path, size = args
+    try:
+        return load_image(path, size), None
+    except Exception as e:
+        return None, str(e)
+
+
+# Decode semua gambar di root lalu tulis ke shard berisi maksimal shard_size gambar
+def pack_dataset(root, output, image_size=IMAGE_SIZE, shard_size=1024, class_names=None, workers=None):
+    paths, labels, class_names = list_labelled_images(root, class_names)
+    os.makedirs(output, exist_ok=True)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "class_names": list(class_names),
+        "image_size": list(image_size),
+        "num_images": 0,
+        "shards": [],
+        "sources": [],
+        "skipped": [],
+    }
+    with Pool(workers) as pool:
+        for shard_index, start in enumerate(range(0, len(paths), shard_size)):
+            shard_paths = paths[start:start + shard_size]
+            shard_labels = labels[start:start + shard_size]
+            images_name = f"images-{shard_index:05d}.npy"
+            labels_name = f"labels-{shard_index:05d}.npy"
+            images = np.lib.format.open_memmap(
+                os.path.join(output, images_name), mode="w+", dtype=np.uint8,
+                shape=(len(shard_paths), image_size[1], image_size[0], 3),
+            )
+            kept_labels = []
+            decoded = pool.imap(_decode_worker, [(path, image_size) for path in shard_paths], chunksize=8)
+            for path, label, (array, error) in zip(shard_paths, shard_labels, decoded):
+                if array is None:
+                    manifest["skipped"].append({"path": os.path.relpath(path, root).replace(os.sep, "/"), "error": error})
+                    continue
+                images[len(kept_labels)] = array
+                kept_labels.append(label)
+                manifest["sources"].append(os.path.relpath(path, root).replace(os.sep, "/"))
+            count = len(kept_labels)
+            images.flush()
+            if count < len(shard_paths):
+                # Ada gambar yang gagal di-decode: tulis ulang shard dengan ukuran pas
+                trimmed = np.array(images[:count])
+                del images
+                np.save(os.path.join(output, images_name), trimmed)
+            else:
+                del images
+            np.save(os.path.join(output, labels_name), np.asarray(kept_labels, dtype=np.int32))
+            manifest["shards"].append({"images": images_name, "labels": labels_name, "count": count})
+            manifest["num_images"] += count
+
+    with open(os.path.join(output, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+# Pembaca dataset terpaket. Gambar dibaca langsung dari memory-map: dataset[i]
+# dan batches() tanpa indeks mengembalikan view, bukan salinan.
+class ShardedDataset:
+    def __init__(self, directory):
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Versi format dataset tidak didukung: {manifest.get('format_version')}")
+        self.directory = directory
+        self.class_names = manifest["class_names"]
+        self.image_size = tuple(manifest["image_size"])
+        self.sources = manifest["sources"]
+        self._images = [np.load(os.path.join(directory, s["images"]), mmap_mode="r") for s in manifest["shards"]]
+        self._labels = [np.load(os.path.join(directory, s["labels"]), mmap_mode="r") for s in manifest["shards"]]
+        expected = (self.image_size[1], self.image_size[0], 3)
+        for shard, images in zip(manifest["shards"], self._images):
+            if images.shape != (shard["count"],) + expected or images.dtype != np.uint8:
+                raise ValueError(f"Shard {shard['images']} tidak sesuai manifest: {images.shape} {images.dtype}")
+        self._offsets = np.cumsum([0] + [len(images) for images in self._images])
+        self.labels = np.concatenate(self._labels) if self._labels else np.zeros(0, np.int32)
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def _locate(self, index):
+        shard = int(np.searchsorted(self._offsets, index, side="right")) - 1
+        return shard, index - int(self._offsets[shard])
+
+    def __getitem__(self, index):
+        shard, offset = self._locate(index)
+        return self._images[shard][offset], int(self._labels[shard][offset])
+
+    # Ambil banyak gambar sekaligus (salinan berurutan sesuai indices)
+    def take(self, indices):
+        indices = np.asarray(indices)
+        out = np.empty((len(indices),) + self._images[0].shape[1:], dtype=np.uint8)
+        for i, index in enumerate(indices):
+            out[i] = self[int(index)][0]
+        return out, self.labels[indices]
+
+    # Iterasi batch (images, labels). Tanpa indices, batch adalah view ke shard
+    # (tidak melintasi batas shard); dengan indices, batch dikumpulkan via take().
+    def batches(self, batch_size, indices=None):
+        if indices is None:
+            for images, labels in zip(self._images, self._labels):
+                for start in range(0, len(images), batch_size):
+                    yield images[start:start + batch_size], labels[start:start + batch_size]
+            return
+        for start in range(0, len(indices), batch_size):
+            yield self.take(indices[start:start + batch_size])
+
+    # tf.data.Dataset (gambar uint8, label) untuk training_data.build_pipeline.
+    # Jika shuffle=True, urutan indeks diacak ulang setiap epoch. Generator
+    # mengirim potongan berisi chunk_size gambar (lalu di-unbatch) supaya
+    # overhead Python per gambar tidak menjadi bottleneck.
+    def to_tf_dataset(self, indices=None, shuffle=False, seed=42, chunk_size=64):
+        import tensorflow as tf
+
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        rng = np.random.default_rng(seed)
+
+        def generate():
+            order = rng.permutation(indices) if shuffle else indices
+            for start in range(0, len(order), chunk_size):
+                images, labels = self.take(order[start:start + chunk_size])
+                yield images, labels.astype(np.int32)
+
+        height, width = self.image_size[1], self.image_size[0]
+        return tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec((None, height, width, 3), tf.uint8),
+            tf.TensorSpec((None,), tf.int32),
+        )).unbatch()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="folder dataset/<kelas>/<gambar>")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--image-size", type=int, nargs=2, default=IMAGE_SIZE, metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--shard-size", type=int, default=1024, help="jumlah gambar per shard")
+    parser.add_argument("--class-names", nargs="+", default=None, help="default: nama subfolder (alfabetis)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    manifest = pack_dataset(args.root, args.output, tuple(args.image_size), args.shard_size, args.class_names,
+                            args.workers)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(args.output, s["images"])) for s in manifest["shards"])
+    print(f"✅ {manifest['num_images']} gambar, {len(manifest['shards'])} shard, "
+          f"{size / 1e6:.1f} MB dalam {elapsed:.1f} s -> {args.output}")
+    for skipped in manifest["skipped"]:
+        print(f"⚠️ dilewati {skipped['path']}: {skipped['error']}")
+
+
+if __name__ == "__main__":
+    main()
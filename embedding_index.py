@@ -0,0 +1,308 @@
+"""Index embedding dataset berlabel untuk pencarian foto termirip dan deteksi gambar asing.
+
+Embedding = vektor GlobalAveragePooling2D sebelum head softmax (lihat
+engines.KerasEngine), dinormalisasi L2 dan disimpan sebagai float16. Index
+berupa inverted file (IVF): vektor dikelompokkan dengan k-means, query hanya
+dibandingkan dengan vektor di beberapa kelompok terdekat (nprobe), sehingga
+waktu query tidak tumbuh linear dengan ukuran dataset. Dataset kecil (< 256
+gambar) dicari secara exact.
+
+Ambang out-of-distribution dikalibrasi dari jarak tetangga terdekat gambar
+dataset itu sendiri (persentil --ood-percentile): upload yang jaraknya ke
+foto referensi terdekat melebihi ambang kemungkinan besar bukan alat musik
+gamelan. Tidak ada model kedua; embedding berasal dari forward pass prediksi.
+
+Index disimpan di samping model (<model>.embeddings/) dan dimuat otomatis
+oleh ModelManager jika fingerprint modelnya cocok.
+
+    python embedding_index.py build dataset --model Model_CNN_Baru_Final.keras
+    python embedding_index.py build dataset_packed --nlist 64 --ood-percentile 99
+    python embedding_index.py query foto.jpg --model Model_CNN_Baru_Final.keras -k 5
+
+Isi folder index:
+    index.json       model (fingerprint), kelas, sumber gambar, ambang OOD, parameter IVF
+    embeddings.npy   float16 (N, D), berurutan per kelompok IVF
+    labels.npy       int32 (N,)
+    centroids.npy    float32 (nlist, D)
+    offsets.npy      int64 (nlist + 1,), awal setiap kelompok di embeddings.npy
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from config import MODEL_PATH
+from dataset import list_labelled_images
+from dataset_shards import ShardedDataset, is_packed
+from preprocessing import load_images
+
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+EXACT_SEARCH_BELOW = 256
+
+
+def index_path(model_path):
+    return model_path + ".embeddings"
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# k-means sferis (cosine) pada maksimal 256 vektor per kelompok; kelompok
+# kosong diisi ulang dengan vektor acak
+def _kmeans(vectors, nlist, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    train = vectors
+    if len(vectors) > 256 * nlist:
+        train = vectors[rng.choice(len(vectors), 256 * nlist, replace=False)]
+    centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(train, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, train)
+        counts = np.bincount(assignment, minlength=nlist)
+        empty = counts == 0
+        sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _assign(vectors, centroids, chunk_size=8192):
+    return np.concatenate([
+        np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), chunk_size)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+
+# Bangun index dari embedding (N, D); sources/labels sejajar dengan embeddings.
+# Mengembalikan isi index.json.
+def write_index(output, embeddings, sources, labels, class_names, model=None, root=None, nlist=None,
+                nprobe=None, ood_percentile=99.0, seed=0):
+    start_time = time.perf_counter()
+    vectors = _normalize(embeddings)
+    if nlist is None:
+        nlist = 1 if len(vectors) < EXACT_SEARCH_BELOW else int(np.sqrt(len(vectors)))
+    nlist = max(1, min(nlist, len(vectors)))
+    centroids = _kmeans(vectors, nlist, seed=seed) if nlist > 1 else _normalize(vectors.mean(axis=0, keepdims=True))
+    assignment = _assign(vectors, centroids) if nlist > 1 else np.zeros(len(vectors), dtype=np.int64)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))]).astype(np.int64)
+
+    os.makedirs(output, exist_ok=True)
+    np.save(os.path.join(output, "embeddings.npy"), vectors[order].astype(np.float16))
+    np.save(os.path.join(output, "labels.npy"), np.asarray(labels, dtype=np.int32)[order])
+    np.save(os.path.join(output, "centroids.npy"), centroids.astype(np.float32))
+    np.save(os.path.join(output, "offsets.npy"), offsets)
+    info = {
+        "format_version": FORMAT_VERSION,
+        "model": os.path.basename(model.path) if model is not None else None,
+        "fingerprint": model.fingerprint if model is not None else None,
+        "embedding_size": int(vectors.shape[1]),
+        "class_names": list(class_names),
+        "root": os.path.abspath(root) if root else None,
+        "sources": [sources[i] for i in order],
+        "metric": "cosine",
+        "nlist": int(nlist),
+        "nprobe": int(nprobe or max(1, min(nlist, 8))),
+        "ood_percentile": ood_percentile,
+        "ood_threshold": None,
+    }
+    with open(os.path.join(output, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False)
+
+    # Kalibrasi ambang OOD: jarak tetangga terdekat (selain dirinya sendiri)
+    # untuk sampel gambar dataset, dicari lewat index yang sama dengan query
+    index = EmbeddingIndex(output)
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(vectors), min(len(vectors), 1000), replace=False)
+    distances, ids = index.search(vectors[order][sample], k=2)
+    nearest = np.where(ids[:, 0] == sample, distances[:, 1], distances[:, 0])
+    info["ood_threshold"] = float(np.percentile(nearest[np.isfinite(nearest)], ood_percentile)) \
+        if np.isfinite(nearest).any() else None
+    info["build_seconds"] = time.perf_counter() - start_time
+    with open(os.path.join(output, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False)
+    return info
+
+
+# Index yang sudah dibangun. Embedding dibaca lewat memory-map, jadi beberapa
+# worker berbagi page cache yang sama.
+class EmbeddingIndex:
+    def __init__(self, directory):
+        with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Versi format index tidak didukung: {info.get('format_version')}")
+        self.directory = directory
+        self.info = info
+        self.fingerprint = info["fingerprint"]
+        self.class_names = info["class_names"]
+        self.sources = info["sources"]
+        self.nprobe = info["nprobe"]
+        self.ood_threshold = info["ood_threshold"]
+        self.embeddings = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(directory, "labels.npy"))
+        self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"))
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    # k tetangga terdekat per query (Q, D): jarak cosine (1 - similarity, minimal
+    # 0 walau pembulatan float16 membuat similarity sedikit di atas 1) dan id
+    # (Q, k) terurut dari yang terdekat; -1/inf jika kandidat kurang dari k.
+    # Setiap kelompok IVF dibaca sekali (potongan float16 -> float32) untuk
+    # semua query yang memeriksanya, lalu top-k digabung per query.
+    def search(self, queries, k=5, nprobe=None, chunk_size=4096):
+        queries = _normalize(np.atleast_2d(queries))
+        nlist = len(self.centroids)
+        nprobe = min(nprobe or self.nprobe, nlist)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if nprobe >= nlist:
+            probed = np.ones((len(queries), nlist), dtype=bool)
+        else:
+            lists = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            probed = np.zeros((len(queries), nlist), dtype=bool)
+            np.put_along_axis(probed, lists, True, axis=1)
+        for c in range(nlist):
+            rows = np.flatnonzero(probed[:, c])
+            if not len(rows):
+                continue
+            for start in range(int(self.offsets[c]), int(self.offsets[c + 1]), chunk_size):
+                stop = min(start + chunk_size, int(self.offsets[c + 1]))
+                block = np.asarray(self.embeddings[start:stop], dtype=np.float32)
+                merged_scores = np.concatenate([scores[rows], queries[rows] @ block.T], axis=1)
+                merged_ids = np.concatenate(
+                    [ids[rows], np.broadcast_to(np.arange(start, stop), (len(rows), stop - start))], axis=1)
+                top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k] if merged_scores.shape[1] > k \
+                    else np.broadcast_to(np.arange(merged_scores.shape[1]), (len(rows), merged_scores.shape[1]))
+                scores[rows] = np.take_along_axis(merged_scores, top, axis=1)
+                ids[rows] = np.take_along_axis(merged_ids, top, axis=1)
+        order = np.argsort(-scores, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        ids = np.take_along_axis(ids, order, axis=1)
+        return np.where(ids >= 0, np.maximum(1.0 - scores, 0.0), np.inf).astype(np.float32), ids
+
+    def source_path(self, index):
+        root = self.info.get("root")
+        return os.path.join(root, self.sources[index]) if root else self.sources[index]
+
+    # Foto referensi termirip dan status out-of-distribution untuk satu embedding
+    def describe(self, embedding, k=5):
+        distances, ids = self.search(embedding, k)
+        neighbours = [{
+            "source": self.sources[i],
+            "path": self.source_path(i),
+            "class": self.class_names[int(self.labels[i])],
+            "distance": float(d),
+        } for d, i in zip(distances[0], ids[0]) if i >= 0]
+        nearest = neighbours[0]["distance"] if neighbours else None
+        return {
+            "neighbours": neighbours,
+            "nearest_distance": nearest,
+            "ood_threshold": self.ood_threshold,
+            "out_of_distribution": bool(nearest is None or (self.ood_threshold is not None
+                                                            and nearest > self.ood_threshold)),
+        }
+
+
+# Index untuk model ini (<model>.embeddings/), atau None jika belum dibangun,
+# model tidak menyediakan embedding, atau index dibuat untuk model lain
+def load_for_model(model):
+    directory = index_path(model.path)
+    if model.embedding_size is None or not os.path.isfile(os.path.join(directory, INDEX_FILE)):
+        return None
+    index = EmbeddingIndex(directory)
+    if index.fingerprint != model.fingerprint:
+        raise ValueError(f"Index {directory} dibuat untuk model lain (fingerprint berbeda); bangun ulang index")
+    return index
+
+
+# Embedding semua gambar dataset per batch: dari folder (decode + resize
+# seperti inferensi) atau dataset terpaket
+def compute_embeddings(model, source, batch_size=32):
+    if is_packed(source):
+        shards = ShardedDataset(source)
+        if shards.image_size != tuple(model.image_size):
+            raise ValueError(f"dataset dipaket dengan ukuran {shards.image_size}, model butuh {tuple(model.image_size)}")
+        names, class_names = shards.sources, shards.class_names
+        labels = shards.labels
+        batches = (images for images, _ in shards.batches(batch_size))
+    else:
+        paths, labels, class_names = list_labelled_images(source)
+        names = [os.path.relpath(path, source).replace(os.sep, "/") for path in paths]
+        batches = (load_images(paths[start:start + batch_size], model.image_size)
+                   for start in range(0, len(paths), batch_size))
+    embeddings = np.concatenate([model.embed_batch(batch) for batch in batches]) if len(names) else \
+        np.zeros((0, model.embedding_size), dtype=np.float32)
+    return embeddings, names, np.asarray(labels, dtype=np.int32), class_names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="hitung embedding dataset dan bangun index")
+    build.add_argument("source", help="folder dataset/<kelas>/<gambar> atau dataset terpaket")
+    build.add_argument("-m", "--model", default=MODEL_PATH, help="model .keras/.h5 atau manifest-nya")
+    build.add_argument("-o", "--output", default=None, help="default: <model>.embeddings")
+    build.add_argument("-b", "--batch-size", type=int, default=32)
+    build.add_argument("--nlist", type=int, default=None, help="jumlah kelompok IVF (default: akar N; 1 = exact)")
+    build.add_argument("--nprobe", type=int, default=None, help="kelompok yang diperiksa per query (default: 8)")
+    build.add_argument("--ood-percentile", type=float, default=99.0)
+    query = commands.add_parser("query", help="cari foto termirip untuk satu gambar")
+    query.add_argument("image")
+    query.add_argument("-m", "--model", default=MODEL_PATH)
+    query.add_argument("-i", "--index", default=None, help="default: <model>.embeddings")
+    query.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from inference import load_model
+
+    model = load_model(args.model)
+    if model.embedding_size is None:
+        parser.error(f"engine {model.name} tidak menyediakan embedding; pakai model .keras/.h5")
+
+    if args.command == "build":
+        start_time = time.perf_counter()
+        embeddings, names, labels, class_names = compute_embeddings(model, args.source, args.batch_size)
+        if not len(names):
+            parser.error(f"tidak ada gambar berlabel di {args.source}")
+        embed_seconds = time.perf_counter() - start_time
+        output = args.output or index_path(model.path)
+        root = None if is_packed(args.source) else args.source
+        info = write_index(output, embeddings, names, labels, class_names, model=model, root=root,
+                           nlist=args.nlist, nprobe=args.nprobe, ood_percentile=args.ood_percentile)
+        size = sum(os.path.getsize(os.path.join(output, name)) for name in os.listdir(output))
+        threshold = f"{info['ood_threshold']:.4f}" if info["ood_threshold"] is not None else "tidak ada"
+        print(f"✅ {output}: {len(names)} gambar, {info['embedding_size']} dimensi, nlist {info['nlist']}, "
+              f"ambang OOD {threshold}, {size / 1e6:.1f} MB; "
+              f"embedding {embed_seconds:.1f} s, index {info['build_seconds']:.2f} s", file=sys.stderr)
+        return
+
+    index = EmbeddingIndex(args.index or index_path(model.path))
+    from preprocessing import load_image
+
+    start_time = time.perf_counter()
+    probs, embeddings = model.predict_with_embeddings(load_image(args.image, model.image_size)[np.newaxis])
+    forward = time.perf_counter()
+    result = index.describe(embeddings[0], args.k)
+    done = time.perf_counter()
+    pred_class = int(np.argmax(probs[0]))
+    print(json.dumps({
+        "class": model.class_names[pred_class],
+        "confidence": float(probs[0][pred_class]),
+        **result,
+        "forward_ms": (forward - start_time) * 1000.0,
+        "search_ms": (done - forward) * 1000.0,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
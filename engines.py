@@ -0,0 +1,365 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from config import CLASS_NAMES, IMAGE_SIZE, INFERENCE_ENGINE, INFERENCE_THREADS, MODEL_PATH, REQUIRE_MODEL_MANIFEST
+from model_manifest import check_model_file, manifest_path, model_fingerprint, read_manifest, resolve_model_path
+from preprocessing import to_float
+
+
+# Antarmuka engine inferensi. Semua engine menerima batch (N, H, W, 3) berupa
+# uint8 [0, 255] (hasil preprocessing.load_image) atau float32 [0, 1], dan
+# mengembalikan probabilitas (N, jumlah_kelas) dengan urutan kelas yang sama
+# (class_names) apa pun backend-nya.
+#
+# Urutan kelas dan ukuran input diambil dari manifest model (model_manifest.py)
+# jika ada. class_names/image_size yang diberikan pemanggil berfungsi sebagai
+# ekspektasi (harus cocok dengan manifest) sekaligus fallback untuk model lama
+# tanpa manifest; jika keduanya kosong dipakai CLASS_NAMES/IMAGE_SIZE.
+class InferenceEngine:
+    name = ""
+    embedding_size = None  # dimensi embedding; None = engine tidak menyediakan embedding
+    gradcam_shape = None  # (h, w) peta Grad-CAM; None = engine tidak menyediakan Grad-CAM
+
+    def __init__(self, path, class_names=None, image_size=None, num_threads=INFERENCE_THREADS):
+        self.path = resolve_model_path(path)
+        self.expected_class_names = list(class_names) if class_names is not None else None
+        self.expected_image_size = tuple(image_size) if image_size is not None else None
+        self.class_names = self.expected_class_names or list(CLASS_NAMES)
+        self.image_size = self.expected_image_size or tuple(IMAGE_SIZE)
+        self.input_shape = (None,) + self.image_size[::-1] + (3,)
+        self.num_threads = num_threads
+        self.fingerprint = None
+        self.manifest = None
+
+    # Fingerprint (sha256 isi file) dihitung tepat sebelum model dimuat,
+    # dipakai sebagai bagian kunci cache prediksi dan untuk cek checksum manifest
+    def load(self):
+        self.fingerprint = model_fingerprint(self.path)
+        self._apply_manifest(read_manifest(self.path))
+        self._load()
+        return self
+
+    def _apply_manifest(self, manifest):
+        if manifest is None:
+            if REQUIRE_MODEL_MANIFEST:
+                raise ValueError(f"Manifest model tidak ditemukan: {manifest_path(self.path)}")
+            return
+        check_model_file(manifest, self.path, self.fingerprint)
+        if self.expected_class_names is not None and manifest["class_names"] != self.expected_class_names:
+            raise ValueError(f"Urutan kelas di manifest {self.path} ({manifest['class_names']}) "
+                             f"berbeda dengan yang diharapkan ({self.expected_class_names})")
+        if self.expected_image_size is not None and tuple(manifest["image_size"]) != self.expected_image_size:
+            raise ValueError(f"Ukuran input di manifest {self.path} ({manifest['image_size']}) "
+                             f"berbeda dengan yang diharapkan ({list(self.expected_image_size)})")
+        self.manifest = manifest
+        self.class_names = list(manifest["class_names"])
+        self.image_size = tuple(manifest["image_size"])
+        self.input_shape = (None,) + self.image_size[::-1] + (3,)
+
+    def _load(self):
+        raise NotImplementedError
+
+    # Jalankan satu prediksi dummy supaya graph/kernel siap sebelum request
+    # pertama, sekaligus cek jumlah output model terhadap jumlah kelas
+    def warmup(self):
+        probs = self.predict_batch(np.zeros((1,) + self.input_shape[1:], dtype=np.uint8))
+        if probs.shape[-1] != len(self.class_names):
+            raise ValueError(f"Model {self.path} mengeluarkan {probs.shape[-1]} kelas, "
+                             f"sedangkan class_names berisi {len(self.class_names)}")
+        return self
+
+    def predict_batch(self, batch):
+        raise NotImplementedError
+
+    # Probabilitas (N, jumlah_kelas) dan embedding (N, embedding_size) float32
+    # dari forward pass yang sama; embedding = output layer sebelum head
+    # klasifikasi (GlobalAveragePooling2D pada MobileNetV2)
+    def predict_with_embeddings(self, batch):
+        raise NotImplementedError(f"engine {self.name} tidak menyediakan embedding; pakai model .keras/.h5")
+
+    def embed_batch(self, batch):
+        return self.predict_with_embeddings(batch)[1]
+
+    # Grad-CAM kelas prediksi dari forward pass yang sama: probabilitas
+    # (N, jumlah_kelas), heatmap (N, h, w) float32 [0, 1] dan embedding
+    # (N, embedding_size), atau None jika engine tidak menyediakan embedding
+    def predict_with_gradcam(self, batch):
+        raise NotImplementedError(f"engine {self.name} tidak menyediakan Grad-CAM; pakai model .keras/.h5")
+
+    # Kompatibel dengan pemanggilan gaya Keras: model.predict(x, verbose=0)
+    def predict(self, batch, verbose=0):
+        return self.predict_batch(batch)
+
+    def metadata(self):
+        return {
+            "engine": self.name,
+            "path": self.path,
+            "input_shape": list(self.input_shape),
+            "class_names": self.class_names,
+            "manifest": self.manifest is not None,
+            "num_threads": self.num_threads,
+            "fingerprint": self.fingerprint,
+            "embedding_size": self.embedding_size,
+            "gradcam_shape": list(self.gradcam_shape) if self.gradcam_shape else None,
+        }
+
+    def _check_class_names(self, stored):
+        if stored is not None and list(stored) != self.class_names:
+            raise ValueError(f"Urutan kelas di {self.path} ({stored}) berbeda dengan konfigurasi ({self.class_names})")
+
+    # Ukuran spasial input yang dideklarasikan model (H, W) harus sama dengan
+    # image_size; dimensi dinamis (None/nama simbolik) dilewati
+    def _check_input_shape(self, shape):
+        expected = self.input_shape[1:3]
+        for actual, wanted in zip(tuple(shape)[1:3], expected):
+            if isinstance(actual, (int, np.integer)) and actual > 0 and actual != wanted:
+                raise ValueError(f"Input model {self.path} berukuran {list(shape)[1:3]}, "
+                                 f"sedangkan image_size {list(self.image_size)} (H, W = {list(expected)})")
+
+
+# Model .keras/.h5 dibungkus tf.function dengan input signature tetap (batch
+# dinamis), jadi setiap panggilan langsung mengeksekusi graph tanpa overhead
+# model.predict (data adapter, step loop, callback). Untuk input uint8,
+# normalisasi 1/255 dilipat ke graph lewat layer Rescaling sehingga host
+# tidak perlu membuat salinan float32 dari batch. Model kedua dengan dua output
+# (probabilitas + embedding) berbagi layer dan bobot yang sama, jadi embedding
+# tidak butuh forward pass tambahan. Grad-CAM memakai model ketiga yang juga
+# mengeluarkan aktivasi konvolusi terakhir: satu forward + backward pass per
+# batch, tanpa menjalankan model prediksi lagi.
+class KerasEngine(InferenceEngine):
+    name = "keras"
+
+    def _load(self):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(self.num_threads)
+        except RuntimeError:
+            pass  # runtime TF sudah berjalan, pengaturan thread tidak bisa diubah lagi
+        self.set_model(load_model(self.path))
+
+    def set_model(self, keras_model):
+        import tensorflow as tf
+
+        self._check_input_shape(keras_model.input_shape)
+        self.keras_model = keras_model
+        rescale = tf.keras.layers.Rescaling(1.0 / 255)
+        self._serve = tf.function(
+            lambda x: keras_model(x, training=False),
+            input_signature=[tf.TensorSpec(self.input_shape, tf.float32)],
+        )
+        self._serve_uint8 = tf.function(
+            lambda x: keras_model(rescale(x), training=False),
+            input_signature=[tf.TensorSpec(self.input_shape, tf.uint8)],
+        )
+        embedding = _embedding_output(keras_model)
+        if embedding is not None:
+            both = tf.keras.Model(keras_model.inputs, [keras_model.outputs[0], embedding])
+            self.embedding_size = int(embedding.shape[-1])
+            self._serve_both = tf.function(
+                lambda x: both(x, training=False),
+                input_signature=[tf.TensorSpec(self.input_shape, tf.float32)],
+            )
+            self._serve_both_uint8 = tf.function(
+                lambda x: both(rescale(x), training=False),
+                input_signature=[tf.TensorSpec(self.input_shape, tf.uint8)],
+            )
+        conv = _gradcam_output(keras_model)
+        if conv is not None:
+            self.gradcam_shape = tuple(int(d) for d in conv.shape[1:3])
+            gradcam = _gradcam_function(keras_model, conv, embedding)
+            self._gradcam = tf.function(gradcam, input_signature=[tf.TensorSpec(self.input_shape, tf.float32)])
+            self._gradcam_uint8 = tf.function(
+                lambda x: gradcam(rescale(x)),
+                input_signature=[tf.TensorSpec(self.input_shape, tf.uint8)],
+            )
+        return self
+
+    def predict_batch(self, batch):
+        batch = np.asarray(batch)
+        if batch.dtype == np.uint8:
+            return self._serve_uint8(batch).numpy()
+        return self._serve(batch.astype(np.float32, copy=False)).numpy()
+
+    def predict_with_embeddings(self, batch):
+        if self.embedding_size is None:
+            return super().predict_with_embeddings(batch)
+        batch = np.asarray(batch)
+        if batch.dtype == np.uint8:
+            probs, embeddings = self._serve_both_uint8(batch)
+        else:
+            probs, embeddings = self._serve_both(batch.astype(np.float32, copy=False))
+        return probs.numpy(), embeddings.numpy()
+
+    def predict_with_gradcam(self, batch):
+        if self.gradcam_shape is None:
+            return super().predict_with_gradcam(batch)
+        batch = np.asarray(batch)
+        if batch.dtype == np.uint8:
+            probs, heatmaps, embeddings = self._gradcam_uint8(batch)
+        else:
+            probs, heatmaps, embeddings = self._gradcam(batch.astype(np.float32, copy=False))
+        return probs.numpy(), heatmaps.numpy(), embeddings.numpy() if self.embedding_size is not None else None
+
+
+# Rantai (layer, tensor output) dari output model mundur ke input, mengikuti
+# input pertama setiap layer. Tensor diambil dari graph yang sama dengan
+# model.outputs: pada model Sequential hasil load .h5, layer.input/layer.output
+# bisa menunjuk graph simbolik lain yang tidak terhubung ke output model.
+def _output_chain(keras_model):
+    chain, tensor = [], keras_model.outputs[0]
+    try:
+        while True:
+            operation, node_index, _ = tensor._keras_history
+            inputs = operation._inbound_nodes[node_index].input_tensors
+            if not inputs:
+                return chain
+            chain.append((operation, tensor))
+            tensor = inputs[0]
+    except (AttributeError, IndexError):
+        return chain
+
+
+# Tensor embedding: output GlobalAveragePooling2D terakhir, atau input layer
+# terakhir (head klasifikasi) untuk arsitektur lain. None jika tidak 2-D.
+def _embedding_output(keras_model):
+    import tensorflow as tf
+
+    chain = _output_chain(keras_model)
+    pools = [tensor for layer, tensor in chain if isinstance(layer, tf.keras.layers.GlobalAveragePooling2D)]
+    tensor = pools[0] if pools else chain[1][1] if len(chain) > 1 else None
+    return tensor if tensor is not None and len(tensor.shape) == 2 else None
+
+
+# Aktivasi konvolusi terakhir (output 4-D terakhir, mis. out_relu pada
+# MobileNetV2) sebagai dasar Grad-CAM; None jika model tidak punya
+def _gradcam_output(keras_model):
+    return next((tensor for _, tensor in _output_chain(keras_model) if len(tensor.shape) == 4), None)
+
+
+# Fungsi Grad-CAM untuk batch float [0, 1]: gradien skor kelas prediksi
+# terhadap aktivasi konvolusi dirata-rata per channel menjadi bobot, lalu
+# heatmap = ReLU(jumlah aktivasi x bobot), dinormalisasi ke [0, 1] per gambar.
+# Skor = logit sebelum softmax jika head berupa Dense softmax (gradien
+# probabilitas mendekati nol untuk prediksi yang sangat yakin).
+def _gradcam_function(keras_model, conv, embedding):
+    import tensorflow as tf
+
+    chain = _output_chain(keras_model)
+    head = chain[0][0]
+    use_logits = isinstance(head, tf.keras.layers.Dense) and head.activation is tf.keras.activations.softmax
+    outputs = [keras_model.outputs[0], conv, chain[1][1] if use_logits else keras_model.outputs[0]]
+    if embedding is not None:
+        outputs.append(embedding)
+    explain = tf.keras.Model(keras_model.inputs, outputs)
+
+    def gradcam(x):
+        with tf.GradientTape() as tape:
+            tape.watch(x)  # bobot model beku (trainable=False) tidak otomatis direkam tape
+            probs, activations, head_input, *rest = explain(x, training=False)
+            scores = head_input
+            if use_logits:
+                scores = tf.matmul(head_input, head.kernel)
+                if head.bias is not None:  # Dense(use_bias=False)
+                    scores += head.bias
+            top = tf.argmax(probs, axis=1, output_type=tf.int32)
+            score = tf.gather(scores, top, axis=1, batch_dims=1)
+        weights = tf.reduce_mean(tape.gradient(score, activations), axis=(1, 2))
+        heatmaps = tf.nn.relu(tf.einsum("bhwc,bc->bhw", activations, weights))
+        heatmaps /= tf.reduce_max(heatmaps, axis=(1, 2), keepdims=True) + 1e-8
+        return probs, heatmaps, rest[0] if rest else tf.zeros_like(probs[:, :0])
+
+    return gradcam
+
+
+# Runtime TFLite (hasil export_tflite.py). Memakai paket ringan tflite_runtime
+# jika terpasang, kalau tidak jatuh ke tf.lite. Delegate XNNPACK aktif secara
+# default untuk model float/int8, jumlah thread-nya diatur lewat num_threads.
+class TFLiteEngine(InferenceEngine):
+    name = "tflite"
+
+    def _load(self):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite.python.interpreter import Interpreter
+
+        self.interpreter = Interpreter(model_path=self.path, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._check_input_shape(self._input["shape"])
+        # Interpreter tidak thread-safe, sedangkan Streamlit memanggil dari banyak thread
+        self._lock = threading.Lock()
+
+    def predict_batch(self, batch):
+        batch = to_float(batch)
+        with self._lock:
+            if tuple(self._input["shape"]) != batch.shape:
+                self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+            self.interpreter.set_tensor(self._input["index"], _quantize(batch, self._input))
+            self.interpreter.invoke()
+            return _dequantize(self.interpreter.get_tensor(self._output["index"]), self._output)
+
+
+# ONNX Runtime (hasil export_onnx.py) dengan optimasi graph penuh. Urutan
+# kelas yang disimpan di metadata model dicek terhadap konfigurasi.
+class OnnxEngine(InferenceEngine):
+    name = "onnx"
+
+    def _load(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.num_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self._input_name = self.session.get_inputs()[0].name
+        self._check_input_shape(self.session.get_inputs()[0].shape)
+
+        stored = self.session.get_modelmeta().custom_metadata_map.get("class_names")
+        self._check_class_names(json.loads(stored) if stored else None)
+
+    def predict_batch(self, batch):
+        return self.session.run(None, {self._input_name: to_float(batch)})[0]
+
+
+# Konversi float <-> int8/uint8 untuk model TFLite dengan input/output integer
+def _quantize(array, details):
+    if details["dtype"] == np.float32:
+        return array
+    scale, zero_point = details["quantization"]
+    info = np.iinfo(details["dtype"])
+    return np.clip(np.round(array / scale + zero_point), info.min, info.max).astype(details["dtype"])
+
+
+def _dequantize(array, details):
+    if details["dtype"] == np.float32:
+        return array.copy()
+    scale, zero_point = details["quantization"]
+    return (array.astype(np.float32) - zero_point) * scale
+
+
+ENGINES = {engine.name: engine for engine in (KerasEngine, TFLiteEngine, OnnxEngine)}
+
+
+# Tebak engine dari ekstensi file model
+def engine_for_path(path):
+    ext = os.path.splitext(path)[1].lower()
+    return {".tflite": "tflite", ".onnx": "onnx"}.get(ext, "keras")
+
+
+# Buat engine sesuai konfigurasi (belum dimuat; panggil .load().warmup())
+def create_engine(path=MODEL_PATH, engine=INFERENCE_ENGINE, **kwargs):
+    name = engine or engine_for_path(path)
+    if name not in ENGINES:
+        raise ValueError(f"Engine tidak dikenal: {name} (pilihan: {', '.join(ENGINES)})")
+    return ENGINES[name](path, **kwargs)
@@ -0,0 +1,403 @@
+"""Evaluasi model pada dataset berlabel: akurasi dan kecepatan dalam satu laporan.
+
+Sumber data boleh folder dataset/<kelas>/<gambar> atau dataset terpaket
+(dataset_shards.py). Decode + resize berjalan paralel di beberapa proses, model
+memprediksi per batch. Label dicocokkan lewat nama kelas di manifest model.
+
+Contoh:
+    python evaluate.py dataset --output eval.json
+    python evaluate.py dataset --split validation --model models/mobilenetv2-20250101-120000.keras.json
+    python evaluate.py dataset_packed --batch-size 64 --plot confusion.png
+    python evaluate.py dataset --output eval_baru.json --baseline eval.json
+    python evaluate.py dataset --split validation --tta none flip crops_flip
+
+Isi laporan (JSON):
+    metrics      akurasi, macro/weighted F1, top-k, precision/recall/F1 per kelas,
+                 confusion matrix (baris = label, kolom = prediksi)
+    calibration  ECE, MCE, Brier score dan reliability per bin confidence
+    latency      waktu per gambar untuk tahap decode, resize dan forward
+                 (p50/p95/rata-rata), plus throughput end-to-end
+    regressions  (dengan --baseline) metrik yang turun / tahap yang melambat
+    tta_comparison  (dengan beberapa --tta) akurasi, confidence dan latensi per
+                 mode test-time augmentation; metrik utama memakai mode pertama
+
+Dengan --baseline, exit code 1 jika ada regresi melebihi --max-metric-drop atau
+--max-slowdown, jadi bisa dipakai di CI setelah training.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from config import IMAGE_EXTENSIONS, MODEL_PATH
+from dataset import list_labelled_images
+from dataset_shards import ShardedDataset, is_packed
+from preprocessing import TTA_MODES, BatchBuffer, load_image_timed, tta_view_count, tta_views
+
+
+# Dijalankan di proses worker: decode + resize (atau view TTA) dengan waktu per tahap
+def _decode_worker(item, size, tta="none"):
+    index, path = item
+    try:
+        array, decode_s, resize_s = load_image_timed(path, size, tta)
+        return index, array, decode_s, resize_s, None
+    except Exception as e:
+        return index, None, 0.0, 0.0, str(e)
+
+
+def confusion_matrix(labels, predictions, num_classes):
+    matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+    np.add.at(matrix, (labels, predictions), 1)
+    return matrix
+
+
+# Precision/recall/F1 per kelas + rata-rata macro dan weighted (setara
+# sklearn classification_report; pembagian dengan nol dihitung 0)
+def classification_metrics(matrix, class_names):
+    true_positive = np.diag(matrix).astype(np.float64)
+    support = matrix.sum(axis=1)
+    predicted = matrix.sum(axis=0)
+    precision = np.divide(true_positive, predicted, out=np.zeros_like(true_positive), where=predicted > 0)
+    recall = np.divide(true_positive, support, out=np.zeros_like(true_positive), where=support > 0)
+    denominator = precision + recall
+    f1 = np.divide(2 * precision * recall, denominator, out=np.zeros_like(true_positive), where=denominator > 0)
+    total = support.sum()
+    present = support > 0
+    return {
+        "accuracy": float(true_positive.sum() / total) if total else 0.0,
+        "macro_f1": float(f1[present].mean()) if present.any() else 0.0,
+        "weighted_f1": float((f1 * support).sum() / total) if total else 0.0,
+        "per_class": {
+            name: {"precision": float(p), "recall": float(r), "f1": float(f), "support": int(s)}
+            for name, p, r, f, s in zip(class_names, precision, recall, f1, support)
+        },
+        "confusion_matrix": matrix.tolist(),
+    }
+
+
+# Akurasi top-k: label ada di antara k probabilitas tertinggi
+def top_k_accuracy(probs, labels, ks=(1, 2, 3)):
+    ranked = np.argsort(-probs, axis=1)
+    return {
+        f"top_{k}": float(np.mean(np.any(ranked[:, :k] == labels[:, None], axis=1)))
+        for k in ks if k <= probs.shape[1]
+    }
+
+
+# Kalibrasi: apakah confidence sesuai dengan akurasi sebenarnya. ECE = rata-rata
+# selisih |akurasi - confidence| per bin (berbobot jumlah sampel), MCE = selisih
+# terbesar, Brier = rata-rata kuadrat selisih probabilitas dengan one-hot label.
+def calibration(probs, labels, bins=10):
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    bin_index = np.clip(np.digitize(confidence, edges[1:-1], right=True), 0, bins - 1)
+    reliability, ece, mce = [], 0.0, 0.0
+    for b in range(bins):
+        mask = bin_index == b
+        if not mask.any():
+            continue
+        accuracy, mean_confidence = float(correct[mask].mean()), float(confidence[mask].mean())
+        gap = abs(accuracy - mean_confidence)
+        ece += gap * mask.sum() / len(labels)
+        mce = max(mce, gap)
+        reliability.append({
+            "range": [float(edges[b]), float(edges[b + 1])], "count": int(mask.sum()),
+            "accuracy": accuracy, "confidence": mean_confidence,
+        })
+    one_hot = np.eye(probs.shape[1])[labels]
+    return {
+        "ece": float(ece),
+        "mce": float(mce),
+        "brier": float(np.mean(np.sum((probs - one_hot) ** 2, axis=1))),
+        "bins": reliability,
+    }
+
+
+def _latency_summary(seconds):
+    ms = np.asarray(seconds, dtype=np.float64) * 1000.0
+    if not len(ms):
+        return None
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "total_s": float(ms.sum() / 1000.0),
+    }
+
+
+# Prediksi semua gambar dari folder: decode paralel di pool, forward per batch.
+# Mengembalikan probabilitas (urutan sama dengan paths), waktu per tahap dan error decode.
+# Dengan tta, satu forward pass berisi batch_size view (batch_size // jumlah
+# view gambar) dan probabilitas setiap gambar dirata-rata dari view-nya (sama
+# seperti inference.predict_image).
+def predict_paths(pool, model, paths, batch_size, tta="none"):
+    views = tta_view_count(tta)
+    probs = np.zeros((len(paths), len(model.class_names)), dtype=np.float32)
+    valid = np.zeros(len(paths), dtype=bool)
+    timings = {"decode": [], "resize": [], "forward": []}
+    errors = []
+    batch = BatchBuffer(max(1, batch_size // views) * views, model.image_size)
+    batch_indices = []
+
+    def flush_batch():
+        start = time.perf_counter()
+        output = np.asarray(model.predict_batch(batch.view()))
+        probs[batch_indices] = output.reshape(len(batch_indices), views, -1).mean(axis=1)
+        per_image = (time.perf_counter() - start) / len(batch_indices)
+        timings["forward"].extend([per_image] * len(batch_indices))
+        valid[batch_indices] = True
+        batch_indices.clear()
+        batch.clear()
+
+    worker = partial(_decode_worker, size=model.image_size, tta=tta)
+    for index, array, decode_s, resize_s, error in pool.imap(worker, enumerate(paths), chunksize=4):
+        if error is not None:
+            errors.append({"path": paths[index], "error": error})
+            continue
+        timings["decode"].append(decode_s)
+        timings["resize"].append(resize_s)
+        for view in array.reshape((-1,) + array.shape[-3:]):
+            batch.append(view)
+        batch_indices.append(index)
+        if batch.full():
+            flush_batch()
+    if batch_indices:
+        flush_batch()
+    return probs, valid, timings, errors
+
+
+# Prediksi dari dataset terpaket: gambar sudah di-decode dan di-resize, jadi
+# tahap decode/resize diganti "read" (salin dari memory-map). View TTA dibuat
+# dari gambar terpaket itu (termasuk di "read"), batch_size view per forward pass.
+def predict_shards(shards, model, indices, batch_size, tta="none"):
+    views = tta_view_count(tta)
+    step = max(1, batch_size // views)
+    probs = np.zeros((len(indices), len(model.class_names)), dtype=np.float32)
+    timings = {"read": [], "forward": []}
+    for start in range(0, len(indices), step):
+        read_start = time.perf_counter()
+        images, _ = shards.take(indices[start:start + step])
+        count = len(images)
+        if views > 1:
+            images = np.concatenate([tta_views(image, model.image_size, tta) for image in images])
+        forward_start = time.perf_counter()
+        output = np.asarray(model.predict_batch(images))
+        probs[start:start + count] = output.reshape(count, views, -1).mean(axis=1)
+        done = time.perf_counter()
+        timings["read"].extend([(forward_start - read_start) / count] * count)
+        timings["forward"].extend([(done - forward_start) / count] * count)
+    return probs, np.ones(len(indices), dtype=bool), timings, []
+
+
+def evaluate(probs, labels, class_names):
+    predictions = probs.argmax(axis=1)
+    metrics = classification_metrics(confusion_matrix(labels, predictions, len(class_names)), class_names)
+    metrics.update(top_k_accuracy(probs, labels))
+    return metrics
+
+
+# Ringkasan satu mode TTA: akurasi dan confidence dibandingkan biaya latensinya
+def tta_summary(mode, probs, labels, class_names, timings, elapsed):
+    confidence = probs.max(axis=1)
+    metrics = evaluate(probs, labels, class_names)
+    return {
+        "mode": mode,
+        "views": tta_view_count(mode),
+        "accuracy": metrics["accuracy"],
+        "macro_f1": metrics["macro_f1"],
+        "ece": calibration(probs, labels)["ece"],
+        "mean_confidence": float(confidence.mean()),
+        "low_confidence_rate": float(np.mean(confidence < 0.5)),
+        "forward_p50_ms": _latency_summary(timings["forward"])["p50_ms"],
+        "images_per_s": len(labels) / elapsed if elapsed else 0.0,
+    }
+
+
+# Bandingkan dengan laporan lama: metrik yang turun lebih dari max_drop
+# (absolut) dan tahap yang p50-nya melambat lebih dari max_slowdown (relatif)
+def find_regressions(report, baseline, max_drop=0.01, max_slowdown=0.2):
+    regressions = []
+    for key in ("accuracy", "macro_f1", "top_2"):
+        old, new = baseline["metrics"].get(key), report["metrics"].get(key)
+        if old is not None and new is not None and old - new > max_drop:
+            regressions.append({"metric": key, "baseline": old, "current": new})
+    old, new = baseline["calibration"]["ece"], report["calibration"]["ece"]
+    if new - old > max_drop:
+        regressions.append({"metric": "ece", "baseline": old, "current": new})
+    for stage, summary in report["latency"]["stages"].items():
+        old_summary = baseline["latency"]["stages"].get(stage)
+        if summary and old_summary and summary["p50_ms"] > old_summary["p50_ms"] * (1 + max_slowdown):
+            regressions.append({"stage": stage, "baseline_p50_ms": old_summary["p50_ms"], "current_p50_ms": summary["p50_ms"]})
+    return regressions
+
+
+def plot_confusion_matrix(matrix, class_names, path):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    matrix = np.asarray(matrix)
+    fig, ax = plt.subplots(figsize=(1.2 * len(class_names) + 2, 1.2 * len(class_names) + 1))
+    ax.imshow(matrix, cmap="Blues")
+    ax.set_xticks(range(len(class_names)), class_names, rotation=45, ha="right")
+    ax.set_yticks(range(len(class_names)), class_names)
+    ax.set_xlabel("Prediksi")
+    ax.set_ylabel("Label")
+    for (i, j), value in np.ndenumerate(matrix):
+        ax.text(j, i, value, ha="center", va="center", color="white" if value > matrix.max() / 2 else "black")
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def print_report(report, file=sys.stderr):
+    metrics = report["metrics"]
+    width = max(len(name) for name in metrics["per_class"])
+    print(f"{'':{width}}  precision  recall  f1-score  support", file=file)
+    for name, row in metrics["per_class"].items():
+        print(f"{name:{width}}  {row['precision']:9.3f}  {row['recall']:6.3f}  {row['f1']:8.3f}  {row['support']:7d}", file=file)
+    print(f"\naccuracy {metrics['accuracy']:.3f}  macro-F1 {metrics['macro_f1']:.3f}  "
+          + "  ".join(f"{k} {v:.3f}" for k, v in metrics.items() if k.startswith("top_"))
+          + f"  ECE {report['calibration']['ece']:.3f}", file=file)
+    for stage, summary in report["latency"]["stages"].items():
+        if summary:
+            print(f"{stage:8} p50 {summary['p50_ms']:7.2f} ms  p95 {summary['p95_ms']:7.2f} ms", file=file)
+    print(f"throughput {report['latency']['images_per_s']:.1f} gambar/detik", file=file)
+    for row in report.get("tta_comparison", []):
+        print(f"TTA {row['mode']:10} ({row['views']:2d} view)  accuracy {row['accuracy']:.3f}  "
+              f"conf<0.5 {row['low_confidence_rate']:.1%}  forward p50 {row['forward_p50_ms']:7.2f} ms  "
+              f"{row['images_per_s']:.1f} gambar/detik", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="folder dataset/<kelas>/<gambar> atau dataset terpaket")
+    parser.add_argument("-m", "--model", default=MODEL_PATH, help="path model atau manifest (.json)")
+    parser.add_argument("-o", "--output", default="-", help="file laporan JSON (default: stdout)")
+    parser.add_argument("-b", "--batch-size", type=int, default=32)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                        help="jumlah proses decode/resize (default: semua core CPU)")
+    parser.add_argument("--split", choices=["all", "validation", "train"], default="all",
+                        help="evaluasi sebagian dataset dengan split yang sama seperti train.py")
+    parser.add_argument("--validation-split", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tta", nargs="+", choices=list(TTA_MODES), default=["none"],
+                        help="mode test-time augmentation; lebih dari satu = dibandingkan (metrik utama: mode pertama)")
+    parser.add_argument("--plot", default=None, help="simpan confusion matrix sebagai gambar (PNG)")
+    parser.add_argument("--baseline", default=None, help="laporan lama untuk dicek regresinya")
+    parser.add_argument("--max-metric-drop", type=float, default=0.01)
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="0.2 = p50 tahap boleh naik 20%%")
+    args = parser.parse_args(argv)
+
+    packed = is_packed(args.source)
+    # Pool dibuat sebelum TensorFlow dimuat (lihat batch_predict.py)
+    pool = None if packed else Pool(processes=args.workers)
+    try:
+        from inference import load_model
+        from training_data import stratified_split_indices
+
+        model = load_model(args.model)
+        if packed:
+            shards = ShardedDataset(args.source)
+            if shards.image_size != tuple(model.image_size):
+                parser.error(f"dataset dipaket dengan ukuran {shards.image_size}, model butuh {tuple(model.image_size)}")
+            names, dataset_labels, dataset_classes = shards.sources, shards.labels, shards.class_names
+        else:
+            names, dataset_labels, dataset_classes = list_labelled_images(args.source)
+        dataset_labels = np.asarray(dataset_labels, dtype=np.int64)
+        if not len(dataset_labels):
+            parser.error(f"tidak ada gambar berlabel ({', '.join(IMAGE_EXTENSIONS)}) di {args.source}")
+
+        # Split dihitung dengan urutan kelas dataset (sama seperti train.py), lalu
+        # label dipetakan ke indeks output model lewat nama kelas. Kelas yang tidak
+        # dikenal model dilewati.
+        indices = np.arange(len(dataset_labels))
+        if args.split != "all":
+            train_idx, val_idx = stratified_split_indices(dataset_labels, args.validation_split, args.seed)
+            indices = val_idx if args.split == "validation" else train_idx
+        remap = np.array([model.class_names.index(c) if c in model.class_names else -1 for c in dataset_classes])
+        labels = remap[dataset_labels]
+        skipped_classes = [c for c in dataset_classes if c not in model.class_names]
+        indices = indices[labels[indices] >= 0]
+        if not len(indices):
+            parser.error(f"tidak ada gambar untuk kelas model {model.class_names}")
+
+        runs = []
+        for tta in args.tta:
+            start_time = time.perf_counter()
+            if packed:
+                result = predict_shards(shards, model, indices, args.batch_size, tta)
+            else:
+                result = predict_paths(pool, model, [names[i] for i in indices], args.batch_size, tta)
+            runs.append((tta, time.perf_counter() - start_time) + result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    tta, elapsed, probs, valid, timings, errors = runs[0]
+    all_labels = labels[indices]
+    labels, probs = all_labels[valid], probs[valid]
+    report = {
+        "model": model.metadata(),
+        "source": args.source,
+        "split": args.split,
+        "tta": tta,
+        "num_images": int(len(labels)),
+        "skipped_classes": skipped_classes,
+        "metrics": evaluate(probs, labels, model.class_names),
+        "calibration": calibration(probs, labels),
+        "latency": {
+            "batch_size": args.batch_size,
+            "workers": 0 if packed else args.workers,
+            "wall_s": elapsed,
+            "images_per_s": len(labels) / elapsed if elapsed else 0.0,
+            "stages": {stage: _latency_summary(seconds) for stage, seconds in timings.items()},
+        },
+        "errors": errors,
+    }
+    if len(runs) > 1:
+        report["tta_comparison"] = [
+            tta_summary(mode, run_probs[run_valid], all_labels[run_valid], model.class_names, run_timings, run_elapsed)
+            for mode, run_elapsed, run_probs, run_valid, run_timings, _ in runs
+        ]
+    # Prediksi salah dengan confidence tertinggi: kandidat label salah di dataset
+    wrong = np.flatnonzero(probs.argmax(axis=1) != labels)
+    wrong = wrong[np.argsort(-probs[wrong].max(axis=1))][:20]
+    sample_names = [names[i] for i in indices[valid]]
+    report["worst_mistakes"] = [{
+        "source": sample_names[i],
+        "label": model.class_names[labels[i]],
+        "prediction": model.class_names[int(probs[i].argmax())],
+        "confidence": float(probs[i].max()),
+    } for i in wrong]
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = find_regressions(report, json.load(f), args.max_metric_drop, args.max_slowdown)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.plot:
+        plot_confusion_matrix(report["metrics"]["confusion_matrix"], model.class_names, args.plot)
+    print_report(report)
+    for regression in report.get("regressions", []):
+        print(f"⚠️ regresi: {regression}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
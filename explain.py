@@ -0,0 +1,39 @@
+import functools
+
+import numpy as np
+from PIL import Image
+
+OVERLAY_ALPHA = 0.45
+OVERLAY_MAX_SIZE = 800
+
+
+# Tabel warna 256 entri (RGB uint8) dari colormap matplotlib, dibuat sekali
+@functools.lru_cache(maxsize=None)
+def _colormap_table(colormap):
+    from matplotlib import colormaps
+
+    return (colormaps[colormap](np.linspace(0.0, 1.0, 256))[:, :3] * 255).astype(np.uint8)
+
+
+# Warna heatmap [0, 1] -> RGB uint8 lewat colormap matplotlib (default "jet")
+def colorize(heatmap, colormap="jet"):
+    return _colormap_table(colormap)[(np.clip(heatmap, 0.0, 1.0) * 255).astype(np.uint8)]
+
+
+# Heatmap Grad-CAM (h, w) ditimpa di atas gambar: gambar diperkecil dulu ke
+# maksimal max_size piksel (ukuran tampilan, bukan ukuran upload), heatmap
+# diperbesar ke ukuran itu (bicubic), diwarnai, lalu dicampur dengan bobot
+# alpha x heatmap. Area yang tidak berpengaruh (heatmap ~0) tetap terlihat
+# seperti gambar aslinya.
+def heatmap_overlay(img, heatmap, alpha=OVERLAY_ALPHA, colormap="jet", max_size=OVERLAY_MAX_SIZE):
+    img = img.convert("RGB")
+    if max(img.size) > max_size:
+        img = img.copy()
+        img.thumbnail((max_size, max_size), Image.BILINEAR)
+    heatmap = np.asarray(Image.fromarray(np.asarray(heatmap, dtype=np.float32), mode="F")
+                         .resize(img.size, Image.BICUBIC))
+    heatmap = np.clip(heatmap, 0.0, 1.0)
+    weight = (alpha * heatmap)[..., np.newaxis]
+    pixels = np.asarray(img, dtype=np.float32)
+    blended = pixels + (colorize(heatmap, colormap) - pixels) * weight
+    return Image.fromarray(blended.astype(np.uint8))
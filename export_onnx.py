@@ -0,0 +1,66 @@
+"""Export model .keras/.h5 ke ONNX untuk dijalankan dengan ONNX Runtime (OnnxEngine).
+
+Contoh:
+    python export_onnx.py --model Model_CNN_Baru_Final.keras --dataset dataset
+    python export_onnx.py --model Model_CNN_Baru_Final.h5 --class-names Balungan Bonang Kendang Slentho
+    INFERENCE_ENGINE=onnx MODEL_PATH=Model_CNN_Baru_Final.onnx streamlit run app3.py
+"""
+import argparse
+import json
+import os
+
+import onnx
+import tensorflow as tf
+import tf2onnx
+
+from config import IMAGE_SIZE
+from dataset import list_labelled_images
+from engines import KerasEngine, OnnxEngine
+from export_tflite import parity_report, print_report
+from model_manifest import build_manifest, write_manifest
+
+
+# Konversi ke ONNX; urutan kelas dan ukuran input disimpan di metadata model
+# supaya OnnxEngine bisa memastikan mapping kelasnya sama dengan model Keras.
+def convert(keras_model, class_names, image_size=IMAGE_SIZE, opset=17):
+    input_signature = (tf.TensorSpec((None,) + tuple(image_size[::-1]) + (3,), tf.float32, name="input"),)
+    serve = tf.function(lambda x: keras_model(x, training=False), input_signature=input_signature)
+    model_proto, _ = tf2onnx.convert.from_function(serve, input_signature=input_signature, opset=opset)
+    onnx.helper.set_model_props(model_proto, {
+        "class_names": json.dumps(list(class_names)),
+        "image_size": json.dumps(list(image_size)),
+    })
+    return model_proto
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="Model_CNN_Baru_Final.keras", help="model .keras atau .h5 sumber")
+    parser.add_argument("--output", default=None, help="default: nama model dengan ekstensi .onnx")
+    parser.add_argument("--class-names", nargs="+", default=None,
+                        help="urutan kelas sesuai training (default: dari manifest model atau CLASS_NAMES)")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--dataset", default=None, help="jika diisi, buat laporan paritas terhadap model Keras")
+    parser.add_argument("--report", default="onnx_parity_report.json")
+    args = parser.parse_args(argv)
+
+    reference = KerasEngine(args.model, class_names=args.class_names).load().warmup()
+    output = args.output or os.path.splitext(args.model)[0] + ".onnx"
+    onnx.save(convert(reference.keras_model, reference.class_names, reference.image_size, args.opset), output)
+    write_manifest(output, build_manifest(
+        output, reference.class_names, reference.image_size,
+        source_model=os.path.basename(args.model), source_sha256=reference.fingerprint,
+    ))
+    print(f"✅ onnx: {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+
+    if args.dataset:
+        paths, labels, _ = list_labelled_images(args.dataset, reference.class_names)
+        engine = OnnxEngine(output).load().warmup()
+        report = parity_report(reference, {"onnx": engine}, paths, labels)
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Export model Keras ke TFLite (float16 dan INT8) beserta laporan paritas akurasi.
+
+Contoh:
+    python export_tflite.py --model Model_CNN_Baru_Final.keras --dataset dataset
+    MODEL_PATH=Model_CNN_Baru_Final_int8.tflite streamlit run app3.py
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from config import IMAGE_SIZE
+from dataset import list_labelled_images
+from engines import KerasEngine, TFLiteEngine
+from model_manifest import build_manifest, write_manifest
+from preprocessing import load_image, load_images, to_float
+
+QUANTIZATIONS = ("float16", "int8")
+
+
+# Ambil sampel representatif secara merata dari setiap kelas (deterministik)
+def sample_representative(paths, labels, n, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    per_class = max(1, n // max(1, len(set(labels.tolist()))))
+    chosen = []
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        chosen.extend(rng.choice(idx, size=min(per_class, len(idx)), replace=False).tolist())
+    return [paths[i] for i in sorted(chosen)]
+
+
+def convert(keras_model, quantization, representative_paths=(), image_size=IMAGE_SIZE):
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        # Kuantisasi INT8 pasca-training: rentang aktivasi dikalibrasi dari
+        # gambar training. Input/output tetap float32 agar praproses di app sama.
+        def representative_dataset():
+            for path in representative_paths:
+                yield [to_float(load_image(path, image_size)[None])]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Kuantisasi tidak dikenal: {quantization}")
+    return converter.convert()
+
+
+def _predict_all(model, paths, batch_size):
+    outputs, elapsed = [], 0.0
+    for i in range(0, len(paths), batch_size):
+        batch = load_images(paths[i:i + batch_size], model.image_size)
+        start = time.perf_counter()
+        outputs.append(model.predict(batch))
+        elapsed += time.perf_counter() - start
+    return np.concatenate(outputs), elapsed * 1000.0 / max(1, len(paths))
+
+
+# Bandingkan akurasi dan latensi engine hasil export dengan engine Keras aslinya
+def parity_report(reference_engine, engines, paths, labels, batch_size=32):
+    labels = np.asarray(labels)
+    reference, reference_ms = _predict_all(reference_engine, paths, batch_size)
+    report = {
+        "keras": {
+            "accuracy": float(np.mean(reference.argmax(1) == labels)),
+            "ms_per_image": reference_ms,
+        }
+    }
+    for name, engine in engines.items():
+        probs, ms = _predict_all(engine, paths, batch_size)
+        report[name] = {
+            "path": engine.path,
+            "size_mb": os.path.getsize(engine.path) / 1e6,
+            "accuracy": float(np.mean(probs.argmax(1) == labels)),
+            "top1_agreement": float(np.mean(probs.argmax(1) == reference.argmax(1))),
+            "max_abs_prob_diff": float(np.abs(probs - reference).max()),
+            "ms_per_image": ms,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n{'model':<10} {'akurasi':>8} {'sepakat':>8} {'ms/gambar':>10}")
+    for name, row in report.items():
+        agreement = f"{row['top1_agreement']:.2%}" if "top1_agreement" in row else "-"
+        print(f"{name:<10} {row['accuracy']:>8.2%} {agreement:>8} {row['ms_per_image']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="Model_CNN_Baru_Final.keras", help="model Keras sumber")
+    parser.add_argument("--dataset", default="dataset", help="folder dataset/<kelas>/<gambar>")
+    parser.add_argument("--output-dir", default=None, help="default: folder yang sama dengan model")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, nargs="+", default=list(QUANTIZATIONS))
+    parser.add_argument("--representative-samples", type=int, default=200)
+    parser.add_argument("--report", default="tflite_parity_report.json")
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args(argv)
+
+    reference = KerasEngine(args.model).load().warmup()
+    paths, labels, _ = list_labelled_images(args.dataset, reference.class_names)
+    representative_paths = sample_representative(paths, labels, args.representative_samples)
+
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.model))
+    exported = {}
+    for quantization in args.quantization:
+        out_path = os.path.join(output_dir, f"{stem}_{quantization}.tflite")
+        flatbuffer = convert(reference.keras_model, quantization, representative_paths, reference.image_size)
+        with open(out_path, "wb") as f:
+            f.write(flatbuffer)
+        write_manifest(out_path, build_manifest(
+            out_path, reference.class_names, reference.image_size,
+            source_model=os.path.basename(args.model), source_sha256=reference.fingerprint, quantization=quantization,
+        ))
+        exported[quantization] = out_path
+        print(f"✅ {quantization}: {out_path} ({os.path.getsize(out_path) / 1e6:.1f} MB)")
+
+    if args.skip_parity:
+        return
+    engines = {name: TFLiteEngine(path).load().warmup() for name, path in exported.items()}
+    report = parity_report(reference, engines, paths, labels)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
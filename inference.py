@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+import metrics
+from batching import MicroBatcher
+from config import INFERENCE_ENGINE, MODEL_PATH
+from engines import create_engine
+from prediction_cache import PredictionCache
+from preprocessing import load_image, tta_views
+
+
+# Load model lewat engine yang dipilih konfigurasi (keras/tflite/onnx), lalu
+# warmup sekali. Urutan kelas dan ukuran input dibaca dari manifest model;
+# class_names hanya perlu diisi untuk model lama tanpa manifest. Import TensorFlow/ONNX Runtime terjadi di dalam engine,
+# sehingga proses worker praproses tidak ikut memuatnya. Jika INFERENCE_SERVER
+# diisi, model dimuat sekali di server inferensi bersama (inference_server.py)
+# dan proses ini hanya memegang RemoteEngine.
+def load_model(path=MODEL_PATH, engine=INFERENCE_ENGINE, class_names=None):
+    if config.INFERENCE_SERVER:
+        from inference_server import RemoteEngine
+
+        return RemoteEngine(path, engine, class_names=class_names).load()
+    return create_engine(path, engine, class_names=class_names).load().warmup()
+
+
+_loaders = {}
+_loaders_lock = threading.Lock()
+
+
+# Mulai memuat model di thread background, sekali per proses untuk setiap
+# kombinasi (path, engine). Hasilnya Future: UI bisa dirender dulu, lalu
+# future.result() dipanggil saat model benar-benar dibutuhkan. Jika file model
+# berubah (mtime/ukuran), pemanggilan berikutnya memuat ulang versi baru.
+def load_model_async(path=MODEL_PATH, engine=INFERENCE_ENGINE, class_names=None):
+    key = (path, engine, tuple(class_names or ()))
+    signature = _file_signature(path)
+    with _loaders_lock:
+        loaded = _loaders.get(key)
+        if loaded is None or loaded[0] != signature:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            loaded = (signature, executor.submit(load_model, path, engine, class_names))
+            executor.shutdown(wait=False)
+            _loaders[key] = loaded
+        return loaded[1]
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Prediksi satu batch array uint8/float32 (N, H, W, 3) -> probabilitas (N, jumlah_kelas)
+def predict_batch(model, batch):
+    return model.predict_batch(batch)
+
+
+# Fungsi prediksi satu gambar PIL. Jika batcher (MicroBatcher) diberikan,
+# gambar dikirim ke antrean bersama dan diprediksi bersama request lain.
+# Jika cache (PredictionCache) diberikan, gambar yang sama tidak diprediksi ulang;
+# entri cache dikunci dengan fingerprint model, jadi satu cache bisa dipakai
+# bersama beberapa versi model (lihat model_manager.py).
+# Durasi praproses dan inferensi dicatat ke metrics (classifier_stage_seconds).
+# tta (preprocessing.TTA_MODES) selain "none": semua view gambar diprediksi
+# dalam satu batch (lewat batcher, view ikut batch yang sama) dan
+# probabilitasnya dirata-rata. Cache menyimpan hasil rata-rata per mode.
+def predict_image(model, img, batcher=None, cache=None, tta="none"):
+    with metrics.timed("preprocess"):
+        if tta == "none":
+            img_array = load_image(img, model.image_size)
+        else:
+            img_array = tta_views(img, model.image_size, tta)
+
+    start_time = time.perf_counter()
+    if batcher is not None:
+        predict_views = lambda views: np.stack([future.result() for future in [batcher.submit(v) for v in views]])
+    else:
+        predict_views = lambda views: predict_batch(model, views)
+    if img_array.ndim == 3:
+        compute = lambda array: predict_views(array[np.newaxis])[0]
+    else:
+        compute = lambda views: np.mean(predict_views(views), axis=0)
+    with metrics.timed("inference"):
+        if cache is not None:
+            probs = cache.get_or_compute(img_array, compute, model.fingerprint)
+        else:
+            probs = compute(img_array)
+    pred_time = time.perf_counter() - start_time
+
+    pred_class = int(np.argmax(probs))
+    confidence = float(probs[pred_class])
+    return pred_class, confidence, pred_time
+
+
+# Seperti predict_image, plus foto referensi termirip dari index embedding
+# (embedding_index.EmbeddingIndex) dan status out-of-distribution. Probabilitas
+# dan embedding berasal dari forward pass yang sama; dengan TTA keduanya
+# dirata-rata per view. batcher (create_embedding_batcher) menggabungkan view
+# dengan request lain. Di cache, probabilitas dan embedding disimpan sebagai
+# satu entri (kunci terpisah dari prediksi biasa); saat dihitung, probabilitasnya
+# juga diisi ke entri prediksi biasa. Durasi pencarian dicatat sebagai stage "search".
+def predict_image_similar(model, img, index, k=5, tta="none", batcher=None, cache=None):
+    with metrics.timed("preprocess"):
+        if tta == "none":
+            views = load_image(img, model.image_size)[np.newaxis]
+        else:
+            views = tta_views(img, model.image_size, tta)
+
+    def compute(views):
+        if batcher is not None:
+            rows = np.stack([future.result() for future in [batcher.submit(v) for v in views]])
+        else:
+            rows = np.concatenate(model.predict_with_embeddings(views), axis=1)
+        return rows.mean(axis=0).astype(np.float32)
+
+    classes = len(model.class_names)
+    start_time = time.perf_counter()
+    with metrics.timed("inference"):
+        if cache is not None:
+            key = cache.key(views, model.fingerprint + ":embedding")
+            packed = cache.get(key)
+            if packed is None:
+                packed = compute(views)
+                cache.put(key, packed, model.fingerprint)
+                plain = views[0] if tta == "none" else views
+                cache.put(cache.key(plain, model.fingerprint), packed[:classes], model.fingerprint)
+        else:
+            packed = compute(views)
+    pred_time = time.perf_counter() - start_time
+    with metrics.timed("search"):
+        similar = index.describe(packed[classes:], k)
+
+    probs = packed[:classes]
+    pred_class = int(np.argmax(probs))
+    return pred_class, float(probs[pred_class]), pred_time, similar
+
+
+# Prediksi + heatmap Grad-CAM kelas prediksi (engine.predict_with_gradcam):
+# aktivasi konvolusi dari forward pass prediksi itu sendiri dipakai ulang,
+# model tidak dijalankan dua kali. Probabilitas, heatmap dan embedding
+# disimpan sebagai satu entri cache (kunci terpisah dari prediksi biasa); saat
+# dihitung, probabilitasnya juga diisi ke entri prediksi biasa. Jika index diberikan,
+# embedding yang sama dipakai untuk foto termirip (hasil kelima; None jika
+# tidak). Penjelasan selalu untuk gambar utuh (tanpa TTA).
+def predict_image_explained(model, img, cache=None, index=None, k=5):
+    with metrics.timed("preprocess"):
+        img_array = load_image(img, model.image_size)
+
+    def compute(array):
+        probs, heatmaps, embeddings = model.predict_with_gradcam(array[np.newaxis])
+        parts = [probs[0], heatmaps[0].ravel()] + ([embeddings[0]] if embeddings is not None else [])
+        return np.concatenate(parts).astype(np.float32)
+
+    classes = len(model.class_names)
+    start_time = time.perf_counter()
+    with metrics.timed("explain"):
+        if cache is not None:
+            key = cache.key(img_array, model.fingerprint + ":gradcam")
+            packed = cache.get(key)
+            if packed is None:
+                packed = compute(img_array)
+                cache.put(key, packed, model.fingerprint)
+                cache.put(cache.key(img_array, model.fingerprint), packed[:classes], model.fingerprint)
+        else:
+            packed = compute(img_array)
+    pred_time = time.perf_counter() - start_time
+
+    height, width = model.gradcam_shape
+    probs = packed[:classes]
+    heatmap = packed[classes:classes + height * width].reshape(height, width)
+    embedding = packed[classes + height * width:]
+    similar = None
+    if index is not None and len(embedding):
+        with metrics.timed("search"):
+            similar = index.describe(embedding, k)
+
+    pred_class = int(np.argmax(probs))
+    return pred_class, float(probs[pred_class]), pred_time, heatmap, similar
+
+
+# Prediksi banyak array uint8 (N, H, W, 3) dalam satu forward pass. Jika cache
+# diberikan, hanya gambar yang belum ada di cache yang ikut dihitung.
+def predict_arrays(model, arrays, cache=None):
+    arrays = np.asarray(arrays)
+    if cache is None:
+        return np.asarray(predict_batch(model, arrays), dtype=np.float32)
+    keys = [cache.key(array, model.fingerprint) for array in arrays]
+    cached = [cache.get(key) for key in keys]
+    missing = [i for i, probs in enumerate(cached) if probs is None]
+    if missing:
+        computed = predict_batch(model, arrays[missing])
+        for i, probs in zip(missing, computed):
+            cache.put(keys[i], probs, model.fingerprint)
+            cached[i] = probs
+    return np.stack(cached).astype(np.float32, copy=False)
+
+
+# Batcher bersama untuk satu model: predict_fn-nya memanggil predict_batch,
+# hanya menerima array seukuran input model
+def create_batcher(model, max_batch_size=16, max_wait_ms=10):
+    return MicroBatcher(lambda batch: predict_batch(model, batch), max_batch_size, max_wait_ms,
+                        item_shape=model.input_shape[1:])
+
+
+# Batcher untuk predict_image_similar: setiap baris hasilnya berisi
+# probabilitas diikuti embedding dari forward pass yang sama
+def create_embedding_batcher(model, max_batch_size=16, max_wait_ms=10):
+    return MicroBatcher(lambda batch: np.concatenate(model.predict_with_embeddings(batch), axis=1),
+                        max_batch_size, max_wait_ms, item_shape=model.input_shape[1:])
+
+
+# Cache prediksi sesuai konfigurasi (PREDICTION_CACHE_*)
+def create_prediction_cache():
+    return PredictionCache(
+        capacity=config.PREDICTION_CACHE_SIZE,
+        db_path=config.PREDICTION_CACHE_DB or None,
+        max_db_bytes=config.PREDICTION_CACHE_DB_MB * 1024 * 1024,
+    )
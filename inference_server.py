@@ -0,0 +1,454 @@
+"""Satu proses inferensi untuk banyak worker front-end (Streamlit/API).
+
+Tanpa server ini setiap worker (beberapa proses streamlit/uvicorn di balik load
+balancer) memuat model dan runtime TensorFlow/ONNX sendiri, jadi memori naik
+lurus dengan jumlah worker. Dengan INFERENCE_SERVER diisi, inference.load_model
+mengembalikan RemoteEngine: worker hanya menyimpan metadata model, batch input
+ditulis ke shared memory (tanpa pickle/salinan lewat socket) dan server yang
+menjalankan model sekali untuk semua worker. Request prediksi dari semua
+worker digabung oleh satu MicroBatcher per model di server.
+
+Model tidak di-load di proses induk lalu di-fork: runtime TensorFlow (thread
+pool, state CUDA/oneDNN) tidak aman di-fork setelah diinisialisasi, dan bobot
+Keras tetap tersalin ke memori privat tiap worker begitu refcount/halaman
+heap-nya tersentuh. Satu proses inferensi + shared memory tidak punya masalah
+itu dan tetap berlaku untuk engine keras, tflite maupun onnx.
+
+Server memuat ulang model jika file model berubah (hot reload model_manager.py
+tetap berjalan di worker). Koneksi memakai pickle, jadi socket hanya dibuat
+untuk user yang sama (umask 077); tambahkan INFERENCE_SERVER_KEY untuk authkey.
+
+    python inference_server.py --socket /tmp/klasifikasi.sock
+    python inference_server.py --socket /tmp/klasifikasi.sock --preload Model_CNN_Baru_Final.onnx
+    INFERENCE_SERVER=/tmp/klasifikasi.sock streamlit run app3.py --server.port 8501
+    INFERENCE_SERVER=/tmp/klasifikasi.sock uvicorn api:app --port 8000
+    python inference_server.py --socket /tmp/klasifikasi.sock --status
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import pickle
+import queue
+import signal
+import sys
+import threading
+import time
+from multiprocessing import connection, resource_tracker, shared_memory
+
+import numpy as np
+
+import config
+from batching import MicroBatcher
+from engines import InferenceEngine, create_engine
+
+# Versi model lama yang tetap dilayani setelah file model berubah, supaya
+# worker yang belum memuat ulang tidak langsung gagal
+KEEP_VERSIONS = 2
+# Ukuran minimal shared memory per koneksi (cukup untuk 16 gambar 225x225 uint8)
+MIN_SEGMENT_BYTES = 4 * 1024 * 1024
+
+
+def _authkey(key=None):
+    key = config.INFERENCE_SERVER_KEY if key is None else key
+    return key.encode() if key else None
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Engine yang sudah dimuat di server dan batcher-nya
+class _ServedModel:
+    def __init__(self, model_id, model, max_batch_size, max_wait_ms):
+        self.id = model_id
+        self.model = model
+        self.batcher = MicroBatcher(model.predict_batch, max_batch_size, max_wait_ms,
+                                    item_shape=model.input_shape[1:])
+        self.loaded_at = time.time()
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "engine": self.model.name,
+            "path": self.model.path,
+            "class_names": self.model.class_names,
+            "image_size": list(self.model.image_size),
+            "fingerprint": self.model.fingerprint,
+            "manifest": self.model.manifest,
+            "num_threads": self.model.num_threads,
+            "embedding_size": self.model.embedding_size,
+            "gradcam_shape": list(self.model.gradcam_shape) if self.model.gradcam_shape else None,
+        }
+
+
+# Server inferensi: satu thread per koneksi worker. Perintah (tuple):
+#   ("load", path, engine, class_names)  -> metadata model (dimuat sekali per versi file)
+#   ("predict" | "embeddings" | "gradcam", model_id, nama_shm, shape, dtype)
+#                                        -> hasil engine untuk batch di shared memory
+#   ("status",)                          -> model yang dimuat dan statistik batcher
+# Balasan: ("ok", hasil) atau ("error", exception).
+class InferenceServer:
+    def __init__(self, address, authkey=None, max_batch_size=16, max_wait_ms=2):
+        self.address = address
+        self.authkey = authkey
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._models = {}  # id -> _ServedModel
+        self._sources = {}  # (path, engine, class_names) -> [(signature, id), ...] terbaru di akhir
+        self._load_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._connections = 0
+        self._connections_lock = threading.Lock()
+        self._listener = None
+
+    def load(self, path, engine="", class_names=None):
+        key = (os.path.abspath(path), engine or "", tuple(class_names or ()))
+        signature = _file_signature(key[0])
+        with self._load_lock:
+            versions = self._sources.setdefault(key, [])
+            if versions and versions[-1][0] == signature:
+                return self._models[versions[-1][1]]
+            model = create_engine(key[0], engine, class_names=class_names).load().warmup()
+            served = _ServedModel(f"{model.fingerprint[:12]}-{next(self._ids)}", model, self.max_batch_size, self.max_wait_ms)
+            self._models[served.id] = served
+            versions.append((signature, served.id))
+            for _, old_id in versions[:-KEEP_VERSIONS]:
+                self._models.pop(old_id).batcher.close()
+            del versions[:-KEEP_VERSIONS]
+            self._log(f"model dimuat: {model.path} ({model.name}, id {served.id})")
+            return served
+
+    def status(self):
+        return {
+            "address": self.address,
+            "pid": os.getpid(),
+            "connections": self._connections,
+            "models": [{**served.describe(), "manifest": served.model.manifest is not None,
+                        "batcher": served.batcher.stats()} for served in list(self._models.values())],
+        }
+
+    def serve_forever(self):
+        _remove_stale_socket(self.address)
+        # Socket dibuat dengan umask 077: sejak bind hanya user yang sama yang
+        # bisa terhubung (tanpa jeda seperti chmod setelah bind)
+        umask = os.umask(0o077)
+        try:
+            self._listener = connection.Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        self._log(f"mendengarkan di {self.address} (pid {os.getpid()})")
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except connection.AuthenticationError as e:
+                    self._log(f"koneksi ditolak: {e}")
+                    continue
+                except OSError:
+                    break  # listener ditutup
+                threading.Thread(target=self._serve, args=(conn,), name="inference-conn", daemon=True).start()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()  # socket AF_UNIX ikut dihapus
+            self._listener = None
+        for served in list(self._models.values()):
+            served.batcher.close()
+
+    def _serve(self, conn):
+        with self._connections_lock:
+            self._connections += 1
+        segment = None
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    if request[0] in ("predict", "embeddings", "gradcam"):
+                        segment = _attach(segment, request[2])
+                        reply = ("ok", self._run(request, segment))
+                    else:
+                        reply = ("ok", self._handle(request))
+                except Exception as e:
+                    reply = ("error", e)
+                try:
+                    conn.send(reply)
+                except (pickle.PicklingError, TypeError, AttributeError, ValueError):
+                    # exception yang tidak bisa di-pickle
+                    conn.send(("error", RuntimeError(f"{type(reply[1]).__name__}: {reply[1]}")))
+        finally:
+            with self._connections_lock:
+                self._connections -= 1
+            if segment is not None:
+                segment.close()
+            conn.close()
+
+    def _handle(self, request):
+        if request[0] == "load":
+            return self.load(*request[1:]).describe()
+        if request[0] == "status":
+            return self.status()
+        raise ValueError(f"perintah tidak dikenal: {request[0]!r}")
+
+    def _run(self, request, segment):
+        command, model_id, _, shape, dtype = request
+        served = self._models.get(model_id)
+        if served is None:
+            raise KeyError(f"model {model_id} sudah tidak dimuat di server; muat ulang model")
+        batch = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        if command == "embeddings":
+            return served.model.predict_with_embeddings(batch)
+        if command == "gradcam":
+            return served.model.predict_with_gradcam(batch)
+        # Prediksi biasa lewat batcher: request dari banyak worker menjadi satu batch
+        futures = [served.batcher.submit(array) for array in batch]
+        return np.stack([future.result() for future in futures])
+
+    def _log(self, message):
+        print(f"[{time.strftime('%H:%M:%S')}] inference_server: {message}", file=sys.stderr, flush=True)
+
+
+# Shared memory milik worker dibuka (dan dipakai ulang selama namanya sama).
+# Di Python < 3.13 membuka segmen juga mendaftarkannya ke resource_tracker
+# proses ini, yang akan menghapusnya saat server berhenti; pemiliknya worker,
+# jadi pendaftaran itu dibatalkan.
+def _attach(segment, name):
+    if segment is not None and segment.name == name:
+        return segment
+    if segment is not None:
+        segment.close()
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment
+
+
+def _remove_stale_socket(address):
+    if not os.path.exists(address):
+        return
+    try:
+        connection.Client(address, family="AF_UNIX").close()
+    except (ConnectionError, OSError):
+        os.remove(address)  # sisa server yang mati
+        return
+    raise RuntimeError(f"server inferensi sudah berjalan di {address}")
+
+
+# Satu koneksi worker -> server beserta shared memory untuk input batch.
+# Segmen dibuat (dan dihapus) oleh worker, diperbesar jika batch tidak muat.
+# pending = request sudah dikirim tapi balasannya belum dibaca; koneksi seperti
+# itu tidak boleh dipakai lagi karena balasan lama masih ada di pipe.
+class _Client:
+    def __init__(self, address, authkey):
+        self.connection = connection.Client(address, family="AF_UNIX", authkey=authkey)
+        self.segment = None
+        self.pending = False
+
+    def call(self, request):
+        self.pending = True
+        self.connection.send(request)
+        status, result = self.connection.recv()
+        self.pending = False
+        if status == "error":
+            raise result
+        return result
+
+    def run(self, command, model_id, batch):
+        batch = np.ascontiguousarray(batch)
+        if self.segment is None or self.segment.size < batch.nbytes:
+            self._release_segment()
+            self.segment = shared_memory.SharedMemory(create=True, size=max(batch.nbytes, MIN_SEGMENT_BYTES))
+        np.ndarray(batch.shape, batch.dtype, buffer=self.segment.buf)[...] = batch
+        return self.call((command, model_id, self.segment.name, batch.shape, batch.dtype.str))
+
+    def close(self):
+        self.connection.close()
+        self._release_segment()
+
+    def _release_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+
+# Kumpulan koneksi ke satu server, dipakai bergantian oleh thread mana pun
+# (sesi Streamlit, thread pool API, thread MicroBatcher). Koneksi yang putus
+# (server restart) dibuang dan request dicoba sekali lagi dengan koneksi baru.
+# Koneksi hanya kembali ke pool jika pertukaran request/balasan selesai
+# (termasuk balasan error dari server); jika terputus di tengah (mis.
+# KeyboardInterrupt di antara send dan recv), koneksi ditutup.
+class _ClientPool:
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._idle = queue.LifoQueue()
+
+    def call(self, method, *args):
+        for attempt in (1, 2):
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                try:
+                    client = _Client(self.address, self.authkey)
+                except (ConnectionError, FileNotFoundError) as e:
+                    raise RuntimeError(f"server inferensi {self.address} tidak bisa dihubungi: {e}") from e
+            try:
+                result = getattr(client, method)(*args)
+            except (EOFError, ConnectionError, BrokenPipeError) as e:
+                client.close()
+                if attempt == 2:
+                    raise RuntimeError(f"koneksi ke server inferensi {self.address} terputus") from e
+                continue
+            except BaseException:
+                if client.pending:
+                    client.close()
+                else:
+                    self._idle.put(client)
+                raise
+            self._idle.put(client)
+            return result
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(address, authkey):
+    with _pools_lock:
+        pool = _pools.get((address, authkey))
+        if pool is None:
+            pool = _pools[(address, authkey)] = _ClientPool(address, authkey)
+        return pool
+
+
+# Hapus shared memory milik proses ini saat keluar (tanpa peringatan resource_tracker)
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+
+# Engine di sisi worker: antarmuka sama dengan engine lokal (engines.py), tapi
+# model dimuat dan dijalankan di server inferensi. Metadata (urutan kelas,
+# ukuran input, fingerprint, manifest) disalin dari server, jadi cache
+# prediksi, index embedding dan model_manager bekerja seperti biasa.
+class RemoteEngine(InferenceEngine):
+    name = "remote"
+
+    def __init__(self, path, engine=config.INFERENCE_ENGINE, class_names=None, address=None, authkey=None):
+        super().__init__(path, class_names=class_names)
+        self.requested_path = os.path.abspath(path)
+        self.engine = engine or ""
+        self.address = address or config.INFERENCE_SERVER
+        self.backend = None
+        self.model_id = None
+        self._pool = _pool(self.address, _authkey(authkey))
+
+    def load(self):
+        self._apply(self._request_load())
+        return self
+
+    def _request_load(self):
+        return self._pool.call("call", ("load", self.requested_path, self.engine, self.expected_class_names))
+
+    def _apply(self, info):
+        self.model_id = info["id"]
+        self.backend = info["engine"]
+        self.name = f"remote/{self.backend}"
+        self.path = info["path"]
+        self.class_names = list(info["class_names"])
+        self.image_size = tuple(info["image_size"])
+        self.input_shape = (None,) + self.image_size[::-1] + (3,)
+        self.fingerprint = info["fingerprint"]
+        self.manifest = info["manifest"]
+        self.num_threads = info["num_threads"]
+        self.embedding_size = info["embedding_size"]
+        self.gradcam_shape = tuple(info["gradcam_shape"]) if info["gradcam_shape"] else None
+
+    # Server sudah melakukan warmup saat memuat model
+    def warmup(self):
+        return self
+
+    def predict_batch(self, batch):
+        return self._run("predict", batch)
+
+    def predict_with_embeddings(self, batch):
+        if self.embedding_size is None:
+            return super().predict_with_embeddings(batch)
+        return self._run("embeddings", batch)
+
+    def predict_with_gradcam(self, batch):
+        if self.gradcam_shape is None:
+            return super().predict_with_gradcam(batch)
+        return self._run("gradcam", batch)
+
+    def metadata(self):
+        return {**super().metadata(), "server": self.address, "backend": self.backend}
+
+    # Server yang baru restart belum memuat model ini: muat lagi lalu ulangi
+    # sekali. Fingerprint harus sama, kalau tidak hasilnya bukan dari model
+    # yang dikenal worker ini (model_manager akan memuat versi barunya sendiri).
+    def _run(self, command, batch):
+        try:
+            return self._pool.call("run", command, self.model_id, batch)
+        except KeyError:
+            info = self._request_load()
+            if info["fingerprint"] != self.fingerprint:
+                raise RuntimeError(f"model {self.requested_path} di server inferensi sudah berganti versi")
+            self.model_id = info["id"]
+            return self._pool.call("run", command, self.model_id, batch)
+
+
+def server_status(address=None, authkey=None):
+    return _pool(address or config.INFERENCE_SERVER, _authkey(authkey)).call("call", ("status",))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=config.INFERENCE_SERVER or "/tmp/klasifikasi-inference.sock",
+                        help="path Unix socket (sama dengan INFERENCE_SERVER di worker)")
+    parser.add_argument("--preload", nargs="*", default=[config.MODEL_PATH],
+                        help="model yang dimuat sebelum menerima koneksi")
+    parser.add_argument("--engine", default=config.INFERENCE_ENGINE, help="keras | tflite | onnx")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=2)
+    parser.add_argument("--status", action="store_true", help="tampilkan status server yang sedang berjalan")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        print(json.dumps(server_status(args.socket), indent=2, default=str))
+        return
+
+    server = InferenceServer(args.socket, _authkey(), args.max_batch_size, args.max_wait_ms)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # socket tetap dibersihkan saat dihentikan
+    for path in args.preload:
+        server.load(path, args.engine)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
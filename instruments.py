@@ -0,0 +1,39 @@
+# Metadata alat musik (fakta, video, audio, ikon) yang dipakai app3.py dan api.py
+fun_facts = {
+    "Balungan": {
+        "fact": "Nada dasar dalam musik gamelan, biasanya dimainkan oleh saron atau slenthem. Dalam musik gamelan Jawa, balungan merujuk pada melodi kerangka atau garis nada utama dari sebuah komposisi. Menariknya, meskipun alat musik seperti saron atau slenthem memainkan bagian ini, para pemain gamelan yang berpengalaman sering kali mendengar balungan hanya di dalam pikiran mereka, bahkan saat tidak ada alat musik yang secara eksplisit memainkannya.",
+        "video": "https://www.youtube.com/watch?v=5kLDV8PnHaI",
+        "audio": "data_suara/Balungan.mp3",
+        "icon": "🎼"
+    },
+    "Bonang": {
+        "fact": "Bonang terdiri dari gong kecil yang ditata mendatar dan dipukul dengan stik empuk. Alat ini memiliki peran penting dalam ansambel gamelan sebagai pembawa melodi dan pencipta pola ritmis yang kompleks. Bonang sering menjadi pusat perhatian dalam pertunjukan gamelan karena suaranya yang khas dan perannya yang vital.",
+        "video": "https://www.youtube.com/watch?v=U4SvK8QaJr8",
+        "audio": "data_suara/Bonang.mp3",
+        "icon": "🥁"
+    },
+    "Gambang": {
+        "fact": "Gambang adalah instrumen dari bilah kayu dimainkan dengan dua pemukul. Dengan rentang nada yang luas, gambang mampu memainkan melodi dengan kecepatan tinggi. Suaranya yang cerah dan jernih membuat gambang sering digunakan untuk mengiringi lagu-lagu tradisional Jawa.",
+        "video": "https://www.youtube.com/watch?v=OpmMJNH2bG4",
+        "audio": "data_suara/Gambang.mp3",
+        "icon": "🎹"
+    },
+    "Kendang": {
+        "fact": "Kendang adalah gendang dua sisi yang berfungsi sebagai pengatur tempo dalam gamelan. Pemain kendang menggunakan teknik khusus dengan jari dan telapak tangan untuk menghasilkan berbagai macam suara. Kendang dianggap sebagai 'jantung' dari ansambel gamelan karena mengendalikan dinamika dan transisi dalam musik.",
+        "video": "https://www.youtube.com/watch?v=dygpeUtvn1g",
+        "audio": "data_suara/Kendang.mp3",
+        "icon": "🪘"
+    },
+    "Rebab": {
+        "fact": "Rebab adalah alat musik gesek tradisional berbentuk hati yang berasal dari Timur Tengah. Dalam gamelan, rebab berfungsi sebagai pembawa melodi utama dan sering dianggap sebagai 'suara manusia' dalam ansambel karena kemampuannya mengekspresikan emosi melalui teknik gesek yang bervariasi.",
+        "video": "https://www.youtube.com/watch?v=_m5W7QnH2Gc",
+        "audio": "data_suara/Rebab.mp3",
+        "icon": "🎻"
+    },
+    "Slentho": {
+        "fact": "Slentho mirip dengan saron, namun memiliki bunyi lebih rendah dan khas. Alat ini biasanya terbuat dari logam perunggu atau besi dan dimainkan dengan pemukul kayu. Slentho memberikan dasar harmonis dalam ansambel gamelan dan sering bekerja sama dengan demung untuk menciptakan tekstur suara yang kaya.",
+        "video": "https://www.youtube.com/watch?v=9vn_-YxdYJk",
+        "audio": "data_suara/Slentho.mp3",
+        "icon": "🔔"
+    }
+}
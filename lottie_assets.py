@@ -0,0 +1,71 @@
+"""Animasi Lottie untuk app3.py, dibaca dari file lokal di assets/lottie/.
+
+Aset music/upload/success ikut di-commit, jadi app tidak pernah mengakses
+jaringan dan tidak menulis ke folder source saat render. Untuk mengganti aset
+lokal dengan animasi asli dari LottieFiles (langkah build opsional, butuh
+jaringan; gagal jika ada yang tidak bisa diunduh):
+    python lottie_assets.py --download
+
+Tanpa argumen, hanya menampilkan aset yang tersedia:
+    python lottie_assets.py
+"""
+import argparse
+import json
+import os
+
+LOTTIE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "lottie")
+LOTTIE_URLS = {
+    "music": "https://assets9.lottiefiles.com/packages/lf20_jcikwtux.json",
+    "upload": "https://assets1.lottiefiles.com/packages/lf20_yo4ytbyz.json",
+    "success": "https://assets2.lottiefiles.com/packages/lf20_7yomjwvk.json",
+}
+
+_cache = {}
+
+
+def lottie_path(name):
+    return os.path.join(LOTTIE_DIR, f"{name}.json")
+
+
+# Ambil animasi dari disk (di-cache per proses). None jika file tidak ada;
+# file yang rusak tetap memunculkan error supaya kelihatan.
+def load_lottie(name):
+    if name not in _cache:
+        try:
+            with open(lottie_path(name), encoding="utf-8") as f:
+                _cache[name] = json.load(f)
+        except FileNotFoundError:
+            return None
+    return _cache[name]
+
+
+# Unduh satu animasi dari LottieFiles dan simpan ke assets/lottie (atomik)
+def download_lottie(name, timeout=10):
+    import requests
+
+    r = requests.get(LOTTIE_URLS[name], timeout=timeout)
+    r.raise_for_status()
+    data = r.json()
+    os.makedirs(LOTTIE_DIR, exist_ok=True)
+    tmp_path = lottie_path(name) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, lottie_path(name))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--download", action="store_true",
+                        help="timpa aset lokal dengan animasi dari LottieFiles")
+    args = parser.parse_args(argv)
+
+    if args.download:
+        for name in LOTTIE_URLS:
+            download_lottie(name)
+    for name in LOTTIE_URLS:
+        status = "✅" if os.path.exists(lottie_path(name)) else "❌"
+        print(f"{status} {name}: {lottie_path(name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Lapisan media untuk sampel audio di data_suara/.
+
+File audio dipetakan ke memori (mmap) sekali per proses dan disajikan lewat
+server HTTP kecil yang mendukung Range request dan header cache, sehingga
+st.audio cukup menerima URL, bukan byte file yang dibaca ulang setiap rerun.
+
+Transcode opsional ke Opus bitrate rendah (butuh ffmpeg):
+    python media.py --transcode
+    MEDIA_VARIANT=opus streamlit run app3.py
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import re
+import shutil
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+import config
+import metrics
+
+MIME_TYPES = {".mp3": "audio/mpeg", ".opus": "audio/ogg", ".ogg": "audio/ogg"}
+OPUS_DIR = "opus"
+
+
+class MediaFile:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.mime = MIME_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # mmap berbagi page cache antar proses/worker; file kosong tidak bisa di-mmap
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size
+        self.etag = '"' + hashlib.blake2b(self.data, digest_size=12).hexdigest() + '"'
+        self._bytes = None
+
+    # Salinan bytes (dibuat sekali) untuk fallback st.audio tanpa server
+    def to_bytes(self):
+        if self._bytes is None:
+            self._bytes = bytes(self.data)
+        return self._bytes
+
+
+# Kumpulan file audio yang dimuat sekali per proses. Jika variant="opus" dan
+# hasil transcode tersedia di <root>/opus/, versi Opus yang dipakai.
+class MediaLibrary:
+    def __init__(self, root=config.MEDIA_ROOT, variant=config.MEDIA_VARIANT):
+        self.root = root
+        self.variant = variant
+        self._files = {}
+        for directory in (root, os.path.join(root, OPUS_DIR)):
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path) and os.path.splitext(name)[1].lower() in MIME_TYPES:
+                    self._files[os.path.relpath(path, root).replace(os.sep, "/")] = MediaFile(path)
+
+    # Nama file relatif terhadap root untuk path seperti "data_suara/Bonang.mp3"
+    def resolve(self, path):
+        name = os.path.basename(path)
+        if self.variant == "opus":
+            opus_name = f"{OPUS_DIR}/{os.path.splitext(name)[0]}.opus"
+            if opus_name in self._files:
+                return opus_name
+        return name if name in self._files else None
+
+    def get(self, name):
+        return self._files.get(name)
+
+    def names(self):
+        return list(self._files)
+
+    def total_bytes(self):
+        return sum(f.size for f in self._files.values())
+
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+# Parse header Range (satu rentang saja); None = tidak valid
+def parse_range(header, size):
+    match = _RANGE_RE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    start, end = match.group(1), match.group(2)
+    if not start:
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _make_handler(library):
+    class MediaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _serve(self, send_body):
+            media = library.get(unquote(self.path.lstrip("/").split("?", 1)[0]))
+            if media is None:
+                self.send_error(404)
+                return
+            if self.headers.get("If-None-Match") == media.etag:
+                self.send_response(304)
+                self._send_cache_headers(media)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start, end = 0, media.size - 1
+            range_header = self.headers.get("Range")
+            if range_header:
+                parsed = parse_range(range_header, media.size)
+                if parsed is None:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{media.size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start, end = parsed
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{media.size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", media.mime)
+            self.send_header("Content-Length", str(end - start + 1))
+            self._send_cache_headers(media)
+            self.end_headers()
+            if send_body and media.size:
+                self.wfile.write(memoryview(media.data)[start:end + 1])
+
+        def _send_cache_headers(self, media):
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", media.etag)
+            self.send_header("Cache-Control", "public, max-age=86400")
+            self.send_header("Access-Control-Allow-Origin", "*")
+
+        def log_message(self, format, *args):
+            pass
+
+    return MediaHandler
+
+
+class MediaServer:
+    def __init__(self, library, host=config.MEDIA_HOST, port=config.MEDIA_PORT):
+        self.library = library
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(library))
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="media-server", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_library = None
+_base_url = None
+_lock = threading.Lock()
+
+
+# Muat library dan jalankan server media sekali per proses. Mengembalikan
+# base URL yang bisa dipakai browser, atau None jika server dinonaktifkan/gagal.
+def get_library():
+    global _library, _base_url
+    with _lock:
+        if _library is None:
+            _library = MediaLibrary()
+            if config.MEDIA_PORT:
+                try:
+                    server = MediaServer(_library)
+                    _base_url = config.MEDIA_BASE_URL or f"http://{config.MEDIA_HOST}:{server.port}/"
+                except OSError:
+                    # Port dipakai worker lain yang menyajikan file yang sama
+                    _base_url = config.MEDIA_BASE_URL or None
+        return _library, _base_url
+
+
+# Sumber audio untuk st.audio: (URL atau bytes, mime type), atau (None, None)
+def audio_source(path):
+    with metrics.timed("media"):
+        return _audio_source(path)
+
+
+def _audio_source(path):
+    library, base_url = get_library()
+    name = library.resolve(path) if path else None
+    if name is None:
+        return None, None
+    media = library.get(name)
+    if base_url:
+        return base_url.rstrip("/") + "/" + quote(name), media.mime
+    return media.to_bytes(), media.mime
+
+
+# Transcode semua mp3 ke Opus mono bitrate rendah di <root>/opus/
+def transcode_opus(root=config.MEDIA_ROOT, bitrate="32k"):
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg tidak ditemukan")
+    out_dir = os.path.join(root, OPUS_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    for name in sorted(os.listdir(root)):
+        if not name.lower().endswith(".mp3"):
+            continue
+        src = os.path.join(root, name)
+        dst = os.path.join(out_dir, os.path.splitext(name)[0] + ".opus")
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-i", src, "-ac", "1", "-c:a", "libopus", "-b:a", bitrate, dst],
+            check=True,
+        )
+        results.append((src, os.path.getsize(src), dst, os.path.getsize(dst)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcode", action="store_true", help="buat varian Opus di data_suara/opus/")
+    parser.add_argument("--bitrate", default="32k")
+    args = parser.parse_args(argv)
+
+    if args.transcode:
+        for src, src_size, dst, dst_size in transcode_opus(bitrate=args.bitrate):
+            print(f"✅ {src} ({src_size / 1024:.0f} KB) -> {dst} ({dst_size / 1024:.0f} KB)")
+    else:
+        library = MediaLibrary()
+        for name in library.names():
+            print(f"{name}: {library.get(name).size / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
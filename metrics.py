@@ -0,0 +1,264 @@
+import bisect
+import os
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Batas bucket histogram durasi (detik): dari decode gambar kecil (~1 ms)
+# sampai pemuatan model / foto besar di mesin lambat (~10 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Metrik dengan label. Nilai per kombinasi label disimpan di dict dan diubah
+# di bawah lock: satu lookup dict + satu operasi aritmetika per panggilan,
+# cukup murah untuk dibiarkan aktif di production.
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+# Gauge bisa di-set langsung atau dihitung saat scrape lewat set_function(fn);
+# fn mengembalikan angka, atau dict {tuple nilai label: angka}
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn):
+        self._function = fn
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                values = self._function()
+            except Exception:
+                return
+            items = values.items() if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            if value is not None:
+                yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    # Per kombinasi label: [jumlah per bucket (tidak kumulatif) + overflow, total nilai]
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield self.name + "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield self.name + "_sum", _format_labels(self.labelnames, key), total
+            yield self.name + "_count", _format_labels(self.labelnames, key), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    # Format teks Prometheus (exposition format 0.0.4)
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter("classifier_requests_total", "Jumlah request prediksi", ["app", "outcome"])
+STAGE_SECONDS = REGISTRY.histogram(
+    "classifier_stage_seconds",
+    "Durasi per tahap: upload_decode, preprocess, inference, media, request",
+    ["stage"],
+)
+PREDICTIONS = REGISTRY.counter("classifier_predictions_total", "Jumlah prediksi per versi model dan kelas",
+                               ["version", "class_name"])
+
+
+# Resident set size proses saat ini (Linux: /proc/self/statm), termasuk bobot model
+def _resident_memory_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+REGISTRY.gauge("process_resident_memory_bytes", "Memori resident proses (byte)").set_function(_resident_memory_bytes)
+
+
+_tracer = None
+if config.METRICS_OTEL:
+    try:
+        from opentelemetry import trace
+
+        _tracer = trace.get_tracer("deteksi-alat-musik")
+    except ImportError:
+        warnings.warn("METRICS_OTEL=1 tetapi paket opentelemetry-api tidak terpasang; span dinonaktifkan")
+
+
+# Ukur durasi satu tahap dengan perf_counter (monotonik, resolusi tinggi) dan
+# catat ke histogram classifier_stage_seconds. Jika METRICS_OTEL=1, tahap yang
+# sama juga menjadi span OpenTelemetry.
+#     with metrics.timed("preprocess"):
+#         array = load_image(img)
+class timed:
+    __slots__ = ("stage", "start", "span")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.span = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self.span = _tracer.start_as_current_span(self.stage)
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, stage=self.stage)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+def _make_handler(registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+# Endpoint /metrics untuk proses tanpa server HTTP sendiri (Streamlit), sekali
+# per proses. METRICS_PORT=0 = nonaktif. Mengembalikan port atau None.
+def serve(host=config.METRICS_HOST, port=config.METRICS_PORT):
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((host, port), _make_handler(REGISTRY))
+            except OSError:
+                return None  # port dipakai worker lain
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server.server_address[1] if _server is not None else None
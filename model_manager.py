@@ -0,0 +1,389 @@
+import collections
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+import config
+import embedding_index
+import inference
+import metrics
+from model_manifest import manifest_path, resolve_model_path
+
+ROUTING_FILE = "routing.json"
+MODEL_EXTENSIONS = (".keras", ".h5", ".tflite", ".onnx")
+# Prediksi di bawah ambang ini dihitung sebagai "kurang yakin" (sama seperti app.py)
+LOW_CONFIDENCE = 0.5
+
+
+# Statistik satu versi model dari trafik nyata: latensi per gambar dan
+# distribusi confidence (jendela geser), plus jumlah prediksi per kelas
+class VersionStats:
+    def __init__(self, window=4096):
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._confidences = collections.deque(maxlen=window)
+        self._classes = collections.Counter()
+        self.requests = 0
+
+    def record(self, class_name, confidence, seconds):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(seconds * 1000.0)
+            self._confidences.append(confidence)
+            self._classes[class_name] += 1
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self._latencies)
+            confidences = np.array(self._confidences)
+            summary = {"requests": self.requests, "classes": dict(self._classes.most_common())}
+        if len(latencies):
+            summary.update({f"latency_p{q}_ms": float(np.percentile(latencies, q)) for q in (50, 95, 99)})
+            summary.update({
+                "confidence_mean": float(confidences.mean()),
+                "confidence_p10": float(np.percentile(confidences, 10)),
+                "confidence_p50": float(np.percentile(confidences, 50)),
+                "low_confidence_rate": float(np.mean(confidences < LOW_CONFIDENCE)),
+                "confidence_histogram": np.histogram(confidences, bins=10, range=(0.0, 1.0))[0].tolist(),
+            })
+        return summary
+
+
+# Satu versi model yang sudah dimuat dan di-warmup, dengan batcher dan
+# statistiknya sendiri. class_names/image_size sama dengan milik engine.
+# Index embedding (<model>.embeddings/, lihat embedding_index.py) ikut dimuat
+# jika ada, bersama batcher kedua untuk prediksi + embedding; index untuk model
+# lain diabaikan dan alasannya dicatat di index_error.
+class ModelVersion:
+    def __init__(self, source, model, signature):
+        self.source = source
+        self.model = model
+        self.signature = signature
+        self.name = os.path.basename(model.path)
+        self.class_names = model.class_names
+        self.image_size = model.image_size
+        self.loaded_at = time.time()
+        self.stats = VersionStats()
+        self.batcher = inference.create_batcher(model)
+        self.index, self.index_error = None, None
+        self.embedding_batcher = None
+        try:
+            self.index = embedding_index.load_for_model(model)
+        except (OSError, ValueError) as e:
+            self.index_error = str(e)
+        if self.index is not None:
+            # warmup jalur embedding juga, supaya pencarian pertama tidak menunggu tracing
+            model.predict_with_embeddings(np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.uint8))
+            self.embedding_batcher = inference.create_embedding_batcher(model)
+
+    def predict_image(self, img, cache=None, tta="none"):
+        pred_class, confidence, pred_time = inference.predict_image(
+            self.model, img, batcher=self.batcher, cache=cache, tta=tta)
+        self._record(pred_class, confidence, pred_time)
+        return pred_class, confidence, pred_time
+
+    # Prediksi + foto referensi termirip dan status out-of-distribution
+    # (butuh index); hasil keempat = EmbeddingIndex.describe
+    def predict_similar(self, img, cache=None, tta="none", k=config.EMBEDDING_NEIGHBOURS):
+        pred_class, confidence, pred_time, similar = inference.predict_image_similar(
+            self.model, img, self.index, k=k, tta=tta, batcher=self.embedding_batcher, cache=cache)
+        self._record(pred_class, confidence, pred_time)
+        return pred_class, confidence, pred_time, similar
+
+    # Prediksi + heatmap Grad-CAM (dan foto termirip jika ada index); hasil
+    # keempat = heatmap (h, w), kelima = EmbeddingIndex.describe atau None
+    def predict_explained(self, img, cache=None, k=config.EMBEDDING_NEIGHBOURS):
+        pred_class, confidence, pred_time, heatmap, similar = inference.predict_image_explained(
+            self.model, img, cache=cache, index=self.index, k=k)
+        self._record(pred_class, confidence, pred_time)
+        return pred_class, confidence, pred_time, heatmap, similar
+
+    # Banyak gambar dalam satu forward pass; latensi dicatat rata-rata per gambar.
+    # views > 1: arrays berisi view TTA berurutan per gambar (N * views),
+    # probabilitas setiap gambar = rata-rata view-nya.
+    def predict_arrays(self, arrays, cache=None, views=1):
+        start_time = time.perf_counter()
+        probs = inference.predict_arrays(self.model, arrays, cache=cache)
+        if views > 1:
+            probs = probs.reshape(-1, views, probs.shape[-1]).mean(axis=1)
+        per_image = (time.perf_counter() - start_time) / max(len(probs), 1)
+        for row in probs:
+            pred_class = int(np.argmax(row))
+            self._record(pred_class, float(row[pred_class]), per_image)
+        return probs
+
+    def _record(self, pred_class, confidence, seconds):
+        class_name = self.class_names[pred_class]
+        self.stats.record(class_name, confidence, seconds)
+        metrics.PREDICTIONS.inc(version=self.name, class_name=class_name)
+
+    def describe(self):
+        manifest = self.model.manifest or {}
+        return {
+            "name": self.name,
+            "path": self.model.path,
+            "engine": self.model.name,
+            "architecture": manifest.get("architecture"),
+            "fingerprint": self.model.fingerprint[:12],
+            "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at)),
+            **self.stats.summary(),
+            "batcher": self.batcher.stats(),
+            "embedding_batcher": self.embedding_batcher.stats() if self.embedding_batcher is not None else None,
+            "embedding_index": {
+                "images": len(self.index),
+                "nlist": self.index.info["nlist"],
+                "ood_threshold": self.index.ood_threshold,
+            } if self.index is not None else self.index_error,
+        }
+
+    def close(self):
+        self.batcher.close()
+        if self.embedding_batcher is not None:
+            self.embedding_batcher.close()
+
+
+# Pengelola model untuk proses yang berjalan lama (app2/app3/api). Thread
+# background memeriksa file model setiap poll_interval detik: versi baru
+# dimuat dan di-warmup di background sementara versi lama tetap melayani
+# request, lalu keduanya ditukar dengan satu assignment (atomik). Versi lama
+# ditutup setelah retire_after detik supaya request yang masih berjalan selesai.
+# Model yang gagal dimuat (mis. checksum manifest tidak cocok) tidak pernah
+# menggantikan versi yang sedang berjalan.
+#
+# Trafik bisa dibagi ke versi kandidat sebesar candidate_percent persen.
+# route(key) dengan key yang sama (mis. id sesi) selalu memilih versi yang sama.
+#
+# Tanpa model_dir, yang dipantau adalah path (+ candidate). Dengan model_dir,
+# versi dibaca dari model_dir/routing.json:
+#     {"primary": "mobilenetv2-20250101-120000.keras",
+#      "candidate": "cnn-20250102-090000.keras", "candidate_percent": 20}
+# Tanpa routing.json, model terbaru di folder itu (yang punya manifest, seperti
+# hasil train.py) otomatis menjadi versi utama.
+class ModelManager:
+    def __init__(self, path=config.MODEL_PATH, model_dir=config.MODEL_DIR, candidate=config.MODEL_CANDIDATE,
+                 candidate_percent=config.MODEL_CANDIDATE_PERCENT, engine=config.INFERENCE_ENGINE,
+                 poll_interval=config.MODEL_POLL_SECONDS, retire_after=30):
+        self.path = path
+        self.model_dir = model_dir
+        self.candidate = candidate
+        self.candidate_percent = candidate_percent
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.retire_after = retire_after
+        self.cache = inference.create_prediction_cache()
+        self.error = None
+        self.events = collections.deque(maxlen=20)
+        # (versi utama, versi kandidat, persen trafik kandidat); hanya diganti utuh
+        self._routing = (None, None, 0.0)
+        self._failed = {}
+        self._refresh_lock = threading.Lock()
+        self._first_attempt = threading.Event()
+        self._stopped = threading.Event()
+        self._register_metrics()
+        self._thread = threading.Thread(target=self._watch, name="model-manager", daemon=True)
+        self._thread.start()
+
+    def ready(self):
+        return self._routing[0] is not None
+
+    def loading(self):
+        return not self._first_attempt.is_set()
+
+    # Versi model untuk satu request (menunggu pemuatan pertama jika perlu)
+    def route(self, key=None, timeout=None):
+        if not self._first_attempt.wait(timeout):
+            raise TimeoutError("model belum selesai dimuat")
+        primary, candidate, percent = self._routing
+        if primary is None:
+            raise RuntimeError(self.error or "model belum dimuat")
+        if candidate is None or _bucket(key) >= percent:
+            return primary
+        return candidate
+
+    def versions(self):
+        primary, candidate, _ = self._routing
+        return [version for version in (primary, candidate) if version is not None]
+
+    # Periksa konfigurasi dan file model, muat versi yang berubah, lalu tukar.
+    # Mengembalikan True jika routing berganti.
+    def refresh(self):
+        with self._refresh_lock:
+            current_primary, current_candidate, _ = self._routing
+            try:
+                primary_path, candidate_path, percent = self._desired()
+                primary = self._version(primary_path, current_primary)
+            except Exception as e:
+                self._set_error(f"Gagal memuat model: {e}")
+                return False
+            candidate, error = None, None
+            if candidate_path and candidate_path != primary_path:
+                try:
+                    candidate = self._version(candidate_path, current_candidate)
+                except Exception as e:
+                    error = f"Gagal memuat kandidat: {e}"
+                    if current_candidate is not None and current_candidate.source == candidate_path:
+                        candidate = current_candidate
+            self._set_error(error)
+            routing = (primary, candidate, percent if candidate is not None else 0.0)
+            if routing == self._routing:
+                return False
+
+            self._routing = routing
+            self.cache.bind(*[version.model.fingerprint for version in self.versions()])
+            for old in (current_primary, current_candidate):
+                if old is not None and old not in routing:
+                    timer = threading.Timer(self.retire_after, old.close)
+                    timer.daemon = True
+                    timer.start()
+            self._log(f"utama: {primary.name}" + (f", kandidat: {candidate.name} ({routing[2]:g}%)" if candidate else ""))
+            return True
+
+    def status(self):
+        primary, candidate, percent = self._routing
+        versions = []
+        for role, version in (("primary", primary), ("candidate", candidate)):
+            if version is not None:
+                versions.append({"role": role, **version.describe()})
+        return {
+            "status": "ok" if primary is not None else ("loading" if self.loading() else "error"),
+            "error": self.error,
+            "candidate_percent": percent,
+            "versions": versions,
+            "events": list(self.events),
+            "cache": self.cache.stats(),
+        }
+
+    # Gauge yang dihitung saat scrape /metrics dari versi yang sedang aktif
+    def _register_metrics(self):
+        registry = metrics.REGISTRY
+        registry.gauge("classifier_models_loaded", "Jumlah versi model aktif").set_function(
+            lambda: len(self.versions()))
+        registry.gauge("classifier_candidate_traffic_percent", "Persen trafik ke versi kandidat").set_function(
+            lambda: self._routing[2])
+        registry.gauge("classifier_model_file_bytes", "Ukuran file model (bobot) per versi", ["version"]).set_function(
+            lambda: {(v.name,): v.model.manifest["size_bytes"] if v.model.manifest else os.path.getsize(v.model.path)
+                     for v in self.versions()})
+        registry.gauge("classifier_batcher_queue_depth", "Request yang menunggu di antrean micro-batching",
+                       ["version"]).set_function(lambda: {(v.name,): v.batcher.queue_depth() for v in self.versions()})
+        registry.gauge("classifier_cache_hit_ratio", "Hit rate cache prediksi").set_function(
+            lambda: self.cache.stats()["hit_rate"])
+
+        def cache_entries():
+            stats = self.cache.stats()
+            return {("memory",): stats["memory_entries"], ("disk",): stats.get("disk_entries")}
+
+        registry.gauge("classifier_cache_entries", "Jumlah entri cache prediksi", ["tier"]).set_function(cache_entries)
+
+    def close(self):
+        self._stopped.set()
+        for version in self.versions():
+            version.close()
+
+    def _watch(self):
+        self.refresh()
+        self._first_attempt.set()
+        if self.poll_interval <= 0:
+            return
+        while not self._stopped.wait(self.poll_interval):
+            self.refresh()
+
+    # (path utama, path kandidat atau None, persen trafik kandidat)
+    def _desired(self):
+        if not self.model_dir:
+            return self.path, self.candidate or None, self.candidate_percent
+        try:
+            with open(os.path.join(self.model_dir, ROUTING_FILE), encoding="utf-8") as f:
+                routing = json.load(f)
+        except FileNotFoundError:
+            routing = {}
+        primary = routing.get("primary") or latest_model(self.model_dir)
+        if primary is None:
+            raise FileNotFoundError(f"Tidak ada model bermanifest di {self.model_dir}")
+        candidate = routing.get("candidate")
+        return (
+            os.path.join(self.model_dir, primary),
+            os.path.join(self.model_dir, candidate) if candidate else None,
+            float(routing.get("candidate_percent", 0)),
+        )
+
+    # Versi untuk path: pakai yang sedang berjalan jika file-nya tidak berubah,
+    # jika tidak muat + warmup versi baru. Kegagalan diingat per signature,
+    # jadi file rusak yang sama tidak dicoba ulang setiap polling.
+    def _version(self, path, current):
+        signature = _signature(path)
+        for version in self.versions():
+            if version.source == path and version.signature == signature:
+                return version
+        failed = self._failed.get(path)
+        if failed is not None and failed[0] == signature:
+            raise failed[1]
+        try:
+            model = inference.load_model(path, self.engine)
+        except Exception as e:
+            self._failed[path] = (signature, e)
+            raise
+        self._failed.pop(path, None)
+        if current is not None:
+            self._log(f"versi baru dimuat: {os.path.basename(model.path)} (menggantikan {current.name})")
+        return ModelVersion(path, model, signature)
+
+    def _set_error(self, message):
+        if message is not None and message != self.error:
+            self._log(message)
+        self.error = message
+
+    def _log(self, message):
+        self.events.append(f"{time.strftime('%H:%M:%S')} {message}")
+
+
+# Model terbaru (berdasarkan waktu manifest) di folder: hanya file model yang
+# punya manifest <model>.json, jadi file yang masih disalin tidak ikut terpilih
+def latest_model(model_dir):
+    candidates = []
+    for name in os.listdir(model_dir):
+        model_name = name[:-len(".json")]
+        if name == ROUTING_FILE or not name.endswith(".json") or not model_name.endswith(MODEL_EXTENSIONS):
+            continue
+        if os.path.isfile(os.path.join(model_dir, model_name)):
+            candidates.append((os.path.getmtime(os.path.join(model_dir, name)), model_name))
+    return max(candidates)[1] if candidates else None
+
+
+# Signature file model + manifest-nya; berubah jika salah satunya diganti
+def _signature(path):
+    model_path = resolve_model_path(path)
+    signature = []
+    for file_path in (path, model_path, manifest_path(model_path)):
+        try:
+            stat = os.stat(file_path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+# Posisi key di rentang [0, 100): stabil antar proses (tidak memakai hash()
+# bawaan Python yang diacak per proses); tanpa key, acak per request
+def _bucket(key):
+    if key is None:
+        return random.random() * 100.0
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % 10000 / 100.0
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+# Satu ModelManager per proses, dipakai bersama semua sesi Streamlit
+def get_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ModelManager()
+        return _manager
@@ -0,0 +1,149 @@
+"""Manifest model: metadata yang menyertai setiap file model.
+
+Manifest disimpan sebagai <file model>.json di sebelah file modelnya (mis.
+Model_CNN_Baru_Final.keras.json, Model_CNN_Baru_Final.h5.json) dan berisi urutan kelas (indeks output -> nama kelas), ukuran input,
+spesifikasi praproses serta checksum file. Engine membaca manifest saat model
+dimuat dan langsung gagal jika ada yang tidak cocok. Dengan begitu model bisa
+diganti tanpa mengubah kode dan tanpa label yang tertukar diam-diam.
+
+Contoh:
+    python model_manifest.py create Model_CNN_Baru_Final.keras --class-names Balungan Bonang Gambang Kendang Rebab Slentho
+    python model_manifest.py create Model_CNN_Baru_Final.h5 --class-names Balungan Bonang Kendang Slentho
+    python model_manifest.py validate Model_CNN_Baru_Final.keras --load
+    MODEL_PATH=models/mobilenetv2-20250101-120000.keras.json streamlit run app3.py
+"""
+import argparse
+import hashlib
+import json
+import os
+
+FORMAT_VERSION = 1
+# Praproses yang diimplementasikan preprocessing.load_image + engine: RGB,
+# resize bicubic ke image_size, nilai piksel [0, 1] (uint8 / 255)
+PREPROCESSING = {"color_mode": "RGB", "resize": "bicubic", "value_range": [0.0, 1.0]}
+
+
+# sha256 isi file model (dibaca per blok supaya tidak memuat file utuh ke memori)
+def model_fingerprint(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path(model_path):
+    return model_path + ".json"
+
+
+# MODEL_PATH boleh menunjuk file model atau manifest-nya (.json)
+def resolve_model_path(path):
+    if not path.endswith(".json"):
+        return path
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or "model_file" not in manifest:
+        raise ValueError(f"{path} bukan manifest model")
+    return os.path.join(os.path.dirname(path), manifest["model_file"])
+
+
+def build_manifest(model_path, class_names, image_size, preprocessing=None, **extra):
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model_file": os.path.basename(model_path),
+        "size_bytes": os.path.getsize(model_path),
+        "sha256": model_fingerprint(model_path),
+        "class_names": list(class_names),
+        "image_size": list(image_size),
+        "preprocessing": dict(preprocessing or PREPROCESSING),
+    }
+    manifest.update(extra)
+    return manifest
+
+
+def write_manifest(model_path, manifest):
+    path = manifest_path(model_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+# Cek struktur manifest (tanpa membaca file model)
+def validate_manifest(manifest, source=""):
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Versi manifest {source} tidak didukung: {manifest.get('format_version')}")
+    class_names = manifest.get("class_names")
+    if not class_names or not all(isinstance(name, str) and name for name in class_names):
+        raise ValueError(f"class_names di manifest {source} kosong atau tidak valid")
+    if len(set(class_names)) != len(class_names):
+        raise ValueError(f"class_names di manifest {source} berisi nama ganda: {class_names}")
+    image_size = manifest.get("image_size")
+    if not (isinstance(image_size, list) and len(image_size) == 2 and all(isinstance(v, int) and v > 0 for v in image_size)):
+        raise ValueError(f"image_size di manifest {source} tidak valid: {image_size}")
+    if manifest.get("preprocessing") != PREPROCESSING:
+        raise ValueError(f"Praproses di manifest {source} tidak didukung: {manifest.get('preprocessing')}")
+    for key in ("size_bytes", "sha256"):
+        if key not in manifest:
+            raise ValueError(f"Manifest {source} tidak memiliki {key}")
+
+
+# Manifest untuk file model, atau None jika tidak ada. Manifest yang ada tapi
+# rusak/tidak valid langsung menimbulkan ValueError.
+def read_manifest(model_path):
+    path = manifest_path(model_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        raise ValueError(f"Manifest {path} bukan JSON yang valid: {e}")
+    if not isinstance(manifest, dict):
+        raise ValueError(f"Manifest {path} bukan objek JSON")
+    validate_manifest(manifest, path)
+    return manifest
+
+
+# Cek cepat bahwa file model sama dengan yang dicatat manifest: ukuran dulu
+# (tanpa membaca file), lalu sha256 (pakai fingerprint yang sudah dihitung jika ada)
+def check_model_file(manifest, model_path, fingerprint=None):
+    size = os.path.getsize(model_path)
+    if size != manifest["size_bytes"]:
+        raise ValueError(f"Ukuran {model_path} ({size} byte) tidak cocok dengan manifest ({manifest['size_bytes']} byte)")
+    if (fingerprint or model_fingerprint(model_path)) != manifest["sha256"]:
+        raise ValueError(f"Checksum {model_path} tidak cocok dengan manifest")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    create = subparsers.add_parser("create", help="buat manifest untuk file model")
+    create.add_argument("model")
+    create.add_argument("--class-names", nargs="+", required=True, help="urutan kelas sesuai indeks output model")
+    create.add_argument("--image-size", type=int, nargs=2, default=[225, 225], metavar=("WIDTH", "HEIGHT"))
+    validate = subparsers.add_parser("validate", help="cek manifest dan checksum file model")
+    validate.add_argument("model")
+    validate.add_argument("--load", action="store_true", help="muat model dan cek bentuk input/output juga")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        path = write_manifest(args.model, build_manifest(args.model, args.class_names, args.image_size))
+        print(f"✅ {path}")
+        return
+
+    model_path = resolve_model_path(args.model)
+    manifest = read_manifest(model_path)
+    if manifest is None:
+        raise SystemExit(f"❌ Manifest {manifest_path(model_path)} tidak ditemukan")
+    check_model_file(manifest, model_path)
+    if args.load:
+        from engines import create_engine
+
+        create_engine(model_path).load().warmup()
+    print(f"✅ {model_path}: {len(manifest['class_names'])} kelas, input {manifest['image_size'][0]}x{manifest['image_size'][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import collections
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+# Kunci cache = hash piksel hasil decode (bukan byte file, jadi metadata/EXIF
+# yang berbeda tetap menghasilkan kunci sama) + fingerprint model. Model yang
+# berganti otomatis menghasilkan kunci berbeda.
+def image_key(array, fingerprint):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(fingerprint.encode())
+    h.update(str(array.shape).encode())
+    h.update(np.ascontiguousarray(array).data)
+    return h.hexdigest()
+
+
+# Cache prediksi dua tingkat: LRU di memori, lalu (opsional) SQLite di disk
+# dengan batas ukuran total. Entri yang dibaca dari disk dinaikkan ke memori.
+class PredictionCache:
+    def __init__(self, capacity=1024, db_path=None, max_db_bytes=64 * 1024 * 1024):
+        self.capacity = capacity
+        self.max_db_bytes = max_db_bytes
+        self.fingerprint = None
+        self._bound = None
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = collections.Counter()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT, probs BLOB, size INTEGER, last_access REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS predictions_lru ON predictions(last_access)")
+
+    # Ikat cache ke model yang sedang dipakai (boleh lebih dari satu, mis. dua
+    # versi saat A/B; yang pertama menjadi default untuk key/put). Jika daftar
+    # model berubah (file model diganti), isi memori dikosongkan dan entri
+    # model yang tidak dipakai lagi dihapus dari disk.
+    def bind(self, *fingerprints):
+        with self._lock:
+            self.fingerprint = fingerprints[0] if fingerprints else None
+            if set(fingerprints) == self._bound:
+                return
+            self._bound = set(fingerprints)
+            self._memory.clear()
+            self._counts["invalidations"] += 1
+            if self._db is not None:
+                placeholders = ", ".join("?" * len(fingerprints))
+                self._db.execute(f"DELETE FROM predictions WHERE fingerprint NOT IN ({placeholders})", fingerprints)
+
+    def key(self, array, fingerprint=None):
+        return image_key(array, fingerprint or self.fingerprint or "")
+
+    def get(self, key):
+        with self._lock:
+            probs = self._memory.get(key)
+            if probs is not None:
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return probs
+            if self._db is not None:
+                row = self._db.execute("SELECT probs FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE predictions SET last_access = ? WHERE key = ?", (time.time(), key))
+                    probs = np.frombuffer(row[0], dtype=np.float32)
+                    self._put_memory(key, probs)
+                    self._counts["disk_hits"] += 1
+                    return probs
+            self._counts["misses"] += 1
+            return None
+
+    def put(self, key, probs, fingerprint=None):
+        probs = np.asarray(probs, dtype=np.float32)
+        with self._lock:
+            self._put_memory(key, probs)
+            if self._db is not None:
+                blob = probs.tobytes()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    (key, fingerprint or self.fingerprint, blob, len(blob), time.time()),
+                )
+                self._evict_disk()
+
+    def _put_memory(self, key, probs):
+        self._memory[key] = probs
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    # Hapus entri yang paling lama tidak diakses sampai total ukuran di bawah batas
+    def _evict_disk(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM predictions").fetchone()[0]
+        if total <= self.max_db_bytes:
+            return
+        excess = total - self.max_db_bytes
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM predictions ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM predictions WHERE key = ?", victims)
+        self._counts["disk_evictions"] += len(victims)
+
+    # Ambil dari cache atau hitung dengan compute_fn(array) lalu simpan.
+    # fingerprint = model yang menghitung (default: model pertama di bind)
+    def get_or_compute(self, array, compute_fn, fingerprint=None):
+        key = self.key(array, fingerprint)
+        probs = self.get(key)
+        if probs is None:
+            probs = np.asarray(compute_fn(array), dtype=np.float32)
+            self.put(key, probs, fingerprint)
+        return probs
+
+    def stats(self):
+        with self._lock:
+            hits = self._counts["memory_hits"] + self._counts["disk_hits"]
+            lookups = hits + self._counts["misses"]
+            stats = dict(self._counts)
+            stats.update({
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            })
+            if self._db is not None:
+                entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM predictions").fetchone()
+                stats.update({"disk_entries": entries, "disk_bytes": size})
+        return stats
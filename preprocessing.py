@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+from PIL import Image
+
+from config import IMAGE_SIZE, TTA_CROP_SCALE
+
+# Mode test-time augmentation -> jumlah view per gambar
+TTA_MODES = {"none": 1, "flip": 2, "crops": 5, "crops_flip": 10}
+
+
+# Decode + resize satu gambar ke array uint8 (H, W, 3).
+# source boleh path, file-like (mis. hasil st.file_uploader), PIL Image atau
+# array uint8 (H, W, 3) yang sudah berukuran input (mis. uploads.Upload.array).
+# Untuk JPEG yang belum di-decode, draft mode membuat decoder langsung
+# menurunkan resolusi (skala DCT 1/2, 1/4, 1/8) sehingga foto kamera besar
+# tidak pernah di-decode penuh. Hasil ditulis ke `out` jika diberikan.
+def load_image(source, size=IMAGE_SIZE, out=None):
+    if isinstance(source, np.ndarray):
+        if source.shape[1::-1] != tuple(size):
+            source = Image.fromarray(source)
+        elif out is None:
+            return source
+        else:
+            out[...] = source
+            return out
+    if isinstance(source, Image.Image):
+        return _to_array(source, size, out)
+    with Image.open(source) as img:
+        return _to_array(img, size, out)
+
+
+# Sama seperti load_image, ditambah waktu (detik) tahap decode dan resize
+# untuk profil latensi per tahap (evaluate.py). Jika tta bukan "none", hasilnya
+# view TTA (N, H, W, 3) seperti tta_views dan "resize" termasuk pembuatan view.
+def load_image_timed(source, size=IMAGE_SIZE, tta="none"):
+    start = time.perf_counter()
+    with Image.open(source) as img:
+        img = _decode(img, _tta_decode_size(size, tta))
+        img.load()
+        decoded = time.perf_counter()
+        array = _to_array(img, size, None) if tta == "none" else _tta_arrays(img, size, tta)
+    return array, decoded - start, time.perf_counter() - decoded
+
+
+# Jumlah view untuk mode TTA; ValueError jika mode tidak dikenal
+def tta_view_count(mode):
+    try:
+        return TTA_MODES[mode]
+    except KeyError:
+        raise ValueError(f"mode TTA tidak dikenal: {mode!r} (pilihan: {', '.join(TTA_MODES)})") from None
+
+
+# View test-time augmentation dari satu gambar sebagai array uint8 (N, H, W, 3),
+# siap diprediksi dalam satu forward pass lalu probabilitasnya dirata-rata.
+# View pertama selalu gambar utuh (sama dengan load_image). "crops" menambah
+# empat crop pojok dari gambar yang diperbesar 1/TTA_CROP_SCALE (objek yang
+# tidak di tengah ikut terlihat lebih besar); "flip"/"crops_flip" menambah
+# cermin horizontal setiap view. Gambar hanya di-decode sekali; crop dan flip
+# berupa slicing numpy, bukan operasi PIL per view.
+def tta_views(source, size=IMAGE_SIZE, mode="crops_flip"):
+    if isinstance(source, np.ndarray):
+        source = Image.fromarray(source)
+    if isinstance(source, Image.Image):
+        return _tta_arrays(source, size, mode)
+    with Image.open(source) as img:
+        return _tta_arrays(img, size, mode)
+
+
+# Ukuran decode: gambar utuh, atau gambar yang diperbesar untuk crop
+def _tta_decode_size(size, mode):
+    if tta_view_count(mode) < 5:
+        return tuple(size)
+    return int(round(size[0] / TTA_CROP_SCALE)), int(round(size[1] / TTA_CROP_SCALE))
+
+
+def _tta_arrays(img, size, mode):
+    count = tta_view_count(mode)
+    grid_size = _tta_decode_size(size, mode)
+    img = _decode(img, grid_size)
+    img.load()  # decode sekali; draft berikutnya tidak berefek
+    views = _to_array(img, size, None)[np.newaxis]
+    if count >= 5:
+        width, height = size
+        grid = _to_array(img, grid_size, None)
+        windows = np.lib.stride_tricks.sliding_window_view(grid, (height, width, 3))[:, :, 0]
+        bottom, right = windows.shape[0] - 1, windows.shape[1] - 1
+        corners = windows[[0, 0, bottom, bottom], [0, right, 0, right]]
+        views = np.concatenate([views, corners])
+    if count % 2 == 0:
+        views = np.concatenate([views, views[:, :, ::-1]])
+    return views
+
+
+def _decode(img, size):
+    img.draft("RGB", size)  # hanya berefek pada JPEG yang belum di-decode
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
+
+def _to_array(img, size, out):
+    img = _decode(img, size)
+    if img.size != tuple(size):
+        img = img.resize(size)
+    if out is None:
+        return np.asarray(img, dtype=np.uint8)
+    out[...] = np.asarray(img)
+    return out
+
+
+# Buffer batch uint8 yang dialokasikan sekali lalu diisi ulang di tempat.
+# Model menerima uint8 langsung: skala 1/255 dilakukan di dalam engine
+# (pada KerasEngine dilipat ke graph sebagai layer Rescaling).
+class BatchBuffer:
+    def __init__(self, capacity, size=IMAGE_SIZE):
+        self.array = np.zeros((capacity, size[1], size[0], 3), dtype=np.uint8)
+        self.size = size
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        return len(self.array)
+
+    def full(self):
+        return self.count == self.capacity
+
+    # Tambah satu gambar (source atau array uint8 hasil load_image)
+    def append(self, item):
+        if isinstance(item, np.ndarray):
+            self.array[self.count] = item
+        else:
+            load_image(item, self.size, out=self.array[self.count])
+        self.count += 1
+
+    # View (tanpa salinan) ke bagian buffer yang terisi
+    def view(self):
+        return self.array[:self.count]
+
+    def clear(self):
+        self.count = 0
+
+
+# Praproses banyak gambar sekaligus ke satu array uint8 (N, H, W, 3)
+def load_images(sources, size=IMAGE_SIZE):
+    buffer = BatchBuffer(len(sources), size)
+    for source in sources:
+        buffer.append(source)
+    return buffer.view()
+
+
+# Skala uint8 -> float32 [0, 1] untuk engine yang butuh input float
+def to_float(batch):
+    batch = np.asarray(batch)
+    if batch.dtype == np.uint8:
+        out = batch.astype(np.float32)
+        out *= 1.0 / 255.0
+        return out
+    return batch.astype(np.float32, copy=False)
@@ -0,0 +1,265 @@
+import functools
+
+import instruments
+import media
+from config import CLASS_NAMES
+
+
+# Konten statis app3.py: CSS, HTML header, ensiklopedia dan tab "Tentang".
+# Script Streamlit dieksekusi ulang dari atas setiap rerun, sedangkan modul
+# yang di-import hanya dieksekusi sekali per proses, jadi semua string di sini
+# dibangun sekali lalu dipakai bersama oleh semua sesi. HTML dipadatkan
+# (indentasi dan baris kosong dibuang) supaya payload rerun penuh lebih kecil.
+def compact_html(html):
+    return "\n".join(line.strip() for line in html.splitlines() if line.strip())
+
+
+APP_CSS = compact_html("""
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
+
+    * {
+        font-family: 'Poppins', sans-serif;
+    }
+
+    .main {
+        max-width: 900px;
+        padding: 2rem;
+        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    }
+
+    .header {
+        text-align: center;
+        margin-bottom: 2rem;
+        animation: fadeIn 1s ease-in-out;
+    }
+
+    .header h1 {
+        color: #2c3e50;
+        font-weight: 600;
+        margin-bottom: 0.5rem;
+    }
+
+    .header p {
+        color: #7f8c8d;
+        font-size: 1.1rem;
+    }
+
+    .result-card {
+        background: white;
+        border-radius: 15px;
+        padding: 1.5rem;
+        box-shadow: 0 10px 20px rgba(0,0,0,0.1);
+        margin: 1rem 0;
+        border-left: 5px solid #4CAF50;
+        transition: transform 0.3s ease, box-shadow 0.3s ease;
+        animation: slideUp 0.5s ease-out;
+    }
+
+    .result-card:hover {
+        transform: translateY(-5px);
+        box-shadow: 0 15px 30px rgba(0,0,0,0.15);
+    }
+
+    .confidence-meter {
+        height: 12px;
+        background: #e0e0e0;
+        border-radius: 10px;
+        margin: 0.8rem 0;
+        overflow: hidden;
+    }
+
+    .confidence-level {
+        height: 100%;
+        border-radius: 10px;
+        background: linear-gradient(90deg, #4CAF50 0%, #8BC34A 100%);
+        transition: width 1s ease-in-out;
+    }
+
+    .upload-area {
+        border: 2px dashed #4a6fa5;
+        border-radius: 15px;
+        padding: 2rem;
+        text-align: center;
+        margin-bottom: 2rem;
+        background: rgba(255,255,255,0.7);
+        transition: all 0.3s ease;
+    }
+
+    .upload-area:hover {
+        background: rgba(255,255,255,0.9);
+        border-color: #3498db;
+    }
+
+    .instrument-card {
+        background: white;
+        border-radius: 15px;
+        padding: 1.5rem;
+        margin: 1rem 0;
+        box-shadow: 0 5px 15px rgba(0,0,0,0.05);
+        transition: all 0.3s ease;
+    }
+
+    .instrument-card:hover {
+        transform: translateY(-3px);
+        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
+    }
+
+    .stButton>button {
+        background: linear-gradient(135deg, #4CAF50 0%, #2E7D32 100%);
+        color: white;
+        border: none;
+        padding: 0.7rem 1.5rem;
+        border-radius: 50px;
+        font-size: 1rem;
+        font-weight: 500;
+        cursor: pointer;
+        transition: all 0.3s ease;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        width: 100%;
+    }
+
+    .stButton>button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 7px 14px rgba(0,0,0,0.15);
+        background: linear-gradient(135deg, #43A047 0%, #1B5E20 100%);
+    }
+
+    .tab-content {
+        padding: 1rem 0;
+    }
+
+    @keyframes fadeIn {
+        from { opacity: 0; }
+        to { opacity: 1; }
+    }
+
+    @keyframes slideUp {
+        from {
+            opacity: 0;
+            transform: translateY(20px);
+        }
+        to {
+            opacity: 1;
+            transform: translateY(0);
+        }
+    }
+
+    .pulse {
+        animation: pulse 2s infinite;
+    }
+
+    @keyframes pulse {
+        0% { transform: scale(1); }
+        50% { transform: scale(1.05); }
+        100% { transform: scale(1); }
+    }
+
+    .feature-icon {
+        font-size: 2rem;
+        margin-bottom: 1rem;
+        color: #4CAF50;
+    }
+
+    .feature-card {
+        background: white;
+        border-radius: 15px;
+        padding: 1.5rem;
+        margin: 1rem 0;
+        box-shadow: 0 5px 15px rgba(0,0,0,0.05);
+        text-align: center;
+        transition: all 0.3s ease;
+    }
+
+    .feature-card:hover {
+        transform: translateY(-5px);
+        box-shadow: 0 10px 25px rgba(0,0,0,0.1);
+    }
+</style>
+""")
+
+HEADER_HTML = compact_html("""
+<div class="header">
+    <h1>🎷 Blitar Musical Instrument Classifier</h1>
+    <p>Identifikasi alat musik tradisional dari Blitar dengan teknologi AI</p>
+</div>
+""")
+
+UPLOAD_INTRO_HTML = compact_html("""
+<div style="text-align: center; margin-bottom: 2rem;">
+    <h3 style="color: #2c3e50;">Unggah gambar alat musik untuk diidentifikasi</h3>
+    <p style="color: #7f8c8d;">Format yang didukung: JPG, JPEG, PNG</p>
+</div>
+""")
+
+UPLOAD_AREA_HTML = compact_html("""
+<div class="upload-area pulse">
+    <h4>📤 Tarik dan Lepas Gambar di Sini</h4>
+    <p>Atau klik untuk memilih file</p>
+</div>
+""")
+
+ENCYCLOPEDIA_INTRO_HTML = compact_html("""
+<div style="text-align: center; margin-bottom: 2rem;">
+    <h2 style="color: #2c3e50;">📚 Ensiklopedia Alat Musik Blitar</h2>
+    <p style="color: #7f8c8d;">Pelajari tentang berbagai alat musik tradisional dari Blitar</p>
+</div>
+""")
+
+ABOUT_INTRO_HTML = compact_html("""
+<div style="text-align: center; margin-bottom: 2rem;">
+    <h2 style="color: #2c3e50;">ℹ️ Tentang Aplikasi Ini</h2>
+</div>
+<div style="background: white; border-radius: 15px; padding: 1.5rem; box-shadow: 0 5px 15px rgba(0,0,0,0.05); margin-bottom: 2rem;">
+    <p style="color: #34495e;">Aplikasi ini menggunakan teknologi <strong>Convolutional Neural Network (CNN)</strong> untuk mengidentifikasi alat musik tradisional dari Blitar. Model AI telah dilatih dengan ratusan gambar untuk memberikan hasil yang akurat.</p>
+</div>
+""")
+
+# (ikon, judul, deskripsi) kartu fitur di tab "Tentang"
+FEATURES = [
+    ("🔍", "Identifikasi Cepat", "Analisis gambar dalam hitungan detik"),
+    ("🎵", "Audio Sample", "Dengarkan suara asli alat musik"),
+    ("📚", "Ensiklopedia", "Pelajari tentang alat musik tradisional"),
+]
+FEATURE_CARDS = [compact_html(f"""
+<div class="feature-card">
+    <div class="feature-icon">{icon}</div>
+    <h4>{title}</h4>
+    <p>{description}</p>
+</div>
+""") for icon, title, description in FEATURES]
+
+TEAM_HTML = compact_html("""
+<div style="margin-top: 2rem;">
+    <h4>👨‍💻 Tim Pengembang</h4>
+    <p>Aplikasi ini dikembangkan oleh tim yang peduli dengan pelestarian budaya Indonesia, khususnya alat musik tradisional dari Blitar.</p>
+</div>
+""")
+
+
+# Sumber audio (URL atau bytes, mime type) satu alat musik, sekali per proses;
+# dipakai tab Ensiklopedia dan detail hasil prediksi
+@functools.lru_cache(maxsize=None)
+def instrument_audio(instrument):
+    return media.audio_source(instruments.fun_facts.get(instrument, {}).get("audio"))
+
+
+# Satu entri ensiklopedia per kelas: (HTML kartu, link video markdown atau
+# None, sumber audio, mime type audio)
+@functools.lru_cache(maxsize=None)
+def encyclopedia_entries(class_names=tuple(CLASS_NAMES)):
+    entries = []
+    for instrument in class_names:
+        info = instruments.fun_facts.get(instrument, {})
+        card = compact_html(f"""
+        <div class="instrument-card">
+            <div style="display: flex; align-items: center; margin-bottom: 1rem;">
+                <span style="font-size: 2rem; margin-right: 1rem;">{info.get('icon', '🎵')}</span>
+                <h3 style="margin: 0; color: #2c3e50;">{instrument}</h3>
+            </div>
+            <p style="color: #34495e;">{info.get('fact', 'Fakta tidak tersedia.')}</p>
+        </div>
+        """)
+        video = f"[🎥 Tonton Video]({info['video']})" if info.get("video") else None
+        entries.append((card, video) + instrument_audio(instrument))
+    return tuple(entries)
@@ -0,0 +1,301 @@
+"""Training model klasifikasi alat musik dari command line (pengganti sel notebook).
+
+Contoh:
+    python train.py --config configs/mobilenetv2.json
+    python train.py --config configs/cnn.json --dataset dataset_packed_255 --epochs 30
+    python train.py --config configs/mobilenetv2.json --resume
+    python train.py --config configs/mobilenetv2.json --mixed-precision bfloat16 --intra-op-threads 8
+
+Checkpoint disimpan di <run-dir>/<name>/ (last.keras, best.keras, state.json,
+history.csv) sehingga training yang terputus bisa dilanjutkan dengan --resume.
+Hasil akhir adalah bobot terbaik menurut data validasi:
+<output-dir>/<name>-<waktu>.keras plus manifest <name>-<waktu>.keras.json (urutan
+kelas, ukuran input, praproses, checksum, metrik dan config; lihat model_manifest.py).
+"""
+import argparse
+import copy
+import json
+import os
+import time
+
+DEFAULT_CONFIG = {
+    "name": "model",
+    "architecture": "mobilenetv2",
+    "dataset": "dataset",
+    "image_size": [225, 225],
+    "batch_size": 16,
+    "epochs": 25,
+    "learning_rate": 0.0001,
+    "validation_split": 0.2,
+    "seed": 42,
+    "augment": True,
+    "dropout": 0.3,
+    "weights": "imagenet",
+    "early_stopping": {"monitor": "val_loss", "patience": 5},
+    "reduce_lr": None,
+    # 0 = biarkan TensorFlow memilih (jumlah core)
+    "threads": {"intra_op": 0, "inter_op": 0},
+    "onednn": True,
+    # None (float32) atau "bfloat16" (efektif di CPU dengan AVX512_BF16/AMX)
+    "mixed_precision": None,
+    "cache_dir": ".tf_cache",
+}
+
+
+def _merge(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path=None, overrides=None):
+    config = DEFAULT_CONFIG
+    if path:
+        with open(path, encoding="utf-8") as f:
+            config = _merge(config, json.load(f))
+    return _merge(config, overrides or {})
+
+
+# Pengaturan runtime CPU. Harus dipanggil sebelum TensorFlow diimpor: flag
+# oneDNN dibaca saat import, jumlah thread hanya bisa diatur sebelum op pertama.
+def configure_runtime(config):
+    os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if config["onednn"] else "0"
+    import tensorflow as tf
+
+    threads = config["threads"]
+    if threads.get("intra_op"):
+        tf.config.threading.set_intra_op_parallelism_threads(threads["intra_op"])
+    if threads.get("inter_op"):
+        tf.config.threading.set_inter_op_parallelism_threads(threads["inter_op"])
+    policy = "mixed_bfloat16" if config["mixed_precision"] == "bfloat16" else "float32"
+    tf.keras.mixed_precision.set_global_policy(policy)
+    tf.keras.utils.set_random_seed(config["seed"])
+
+
+# Arsitektur sama dengan notebook: CNN 3 lapis (Model_CNN.ipynb) dan
+# MobileNetV2 beku + head GAP/Dropout/Dense (Model2_CNN.ipynb). Layer output
+# selalu float32 supaya softmax stabil saat mixed precision.
+def build_model(config, num_classes, weights=None):
+    from tensorflow.keras import Model, Sequential, layers
+    from tensorflow.keras.applications import MobileNetV2
+
+    input_shape = (config["image_size"][1], config["image_size"][0], 3)
+    if config["architecture"] == "cnn":
+        return Sequential([
+            layers.Input(input_shape),
+            layers.Conv2D(32, (3, 3), activation="relu"),
+            layers.MaxPooling2D(2, 2),
+            layers.Conv2D(64, (3, 3), activation="relu"),
+            layers.MaxPooling2D(2, 2),
+            layers.Conv2D(128, (3, 3), activation="relu"),
+            layers.MaxPooling2D(2, 2),
+            layers.Flatten(),
+            layers.Dense(128, activation="relu"),
+            layers.Dropout(config["dropout"]),
+            layers.Dense(num_classes, activation="softmax", dtype="float32"),
+        ], name=config["name"])
+    if config["architecture"] == "mobilenetv2":
+        base_model = MobileNetV2(input_shape=input_shape, include_top=False, weights=weights)
+        base_model.trainable = False
+        x = layers.GlobalAveragePooling2D()(base_model.output)
+        x = layers.Dropout(config["dropout"])(x)
+        outputs = layers.Dense(num_classes, activation="softmax", dtype="float32")(x)
+        return Model(inputs=base_model.input, outputs=outputs, name=config["name"])
+    raise ValueError(f"Arsitektur tidak dikenal: {config['architecture']}")
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def make_resume_state_callback(state_path, early_stopping, reduce_lr, best_path, initial_state):
+    import tensorflow as tf
+
+    # Simpan state callback (epoch, best/wait EarlyStopping dan ReduceLROnPlateau)
+    # setiap akhir epoch, dan pulihkan saat --resume. Harus berada paling akhir
+    # di daftar callbacks: on_train_begin callback lain mereset state-nya dulu.
+    class ResumeState(tf.keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            if not initial_state:
+                return
+            es_state = initial_state.get("early_stopping", {})
+            if es_state.get("best") is not None:
+                early_stopping.best = es_state["best"]
+                early_stopping.wait = es_state["wait"]
+                early_stopping.best_epoch = es_state["best_epoch"]
+                if early_stopping.restore_best_weights and os.path.exists(best_path):
+                    early_stopping.best_weights = tf.keras.models.load_model(best_path).get_weights()
+            if reduce_lr is not None and initial_state.get("reduce_lr"):
+                rl_state = initial_state["reduce_lr"]
+                reduce_lr.best = rl_state["best"] if rl_state["best"] is not None else reduce_lr.best
+                reduce_lr.wait = rl_state["wait"]
+                reduce_lr.cooldown_counter = rl_state["cooldown_counter"]
+
+        def on_epoch_end(self, epoch, logs=None):
+            state = {
+                "epoch": epoch + 1,
+                "early_stopping": {
+                    "best": _float(early_stopping.best),
+                    "wait": early_stopping.wait,
+                    "best_epoch": early_stopping.best_epoch,
+                },
+            }
+            if reduce_lr is not None:
+                state["reduce_lr"] = {
+                    "best": _float(reduce_lr.best),
+                    "wait": reduce_lr.wait,
+                    "cooldown_counter": reduce_lr.cooldown_counter,
+                }
+            _write_json(state_path, state)
+
+    return ResumeState()
+
+
+def train(config, run_dir="runs", output_dir="models", resume=False):
+    configure_runtime(config)
+    import tensorflow as tf
+
+    from model_manifest import build_manifest, write_manifest
+    from training_data import build_datasets
+
+    train_ds, val_ds, class_names = build_datasets(
+        config["dataset"], image_size=tuple(config["image_size"]), batch_size=config["batch_size"],
+        validation_split=config["validation_split"], seed=config["seed"], augment=config["augment"],
+        cache_dir=config["cache_dir"],
+    )
+
+    run_path = os.path.join(run_dir, config["name"])
+    os.makedirs(run_path, exist_ok=True)
+    last_path = os.path.join(run_path, "last.keras")
+    best_path = os.path.join(run_path, "best.keras")
+    state_path = os.path.join(run_path, "state.json")
+
+    state = {}
+    if resume and os.path.exists(last_path) and os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        model = tf.keras.models.load_model(last_path)  # termasuk state optimizer dan learning rate
+        print(f"▶️ Melanjutkan {config['name']} dari epoch {state['epoch']}")
+    else:
+        model = build_model(config, len(class_names), weights=config.get("weights"))
+        model.compile(
+            optimizer=tf.keras.optimizers.Adam(config["learning_rate"]),
+            loss="categorical_crossentropy",
+            metrics=["accuracy"],
+        )
+    _write_json(os.path.join(run_path, "config.json"), config)
+
+    monitor = config["early_stopping"]["monitor"]
+    early_stopping = tf.keras.callbacks.EarlyStopping(
+        monitor=monitor, patience=config["early_stopping"]["patience"], restore_best_weights=True,
+    )
+    reduce_lr = None
+    if config.get("reduce_lr"):
+        reduce_lr = tf.keras.callbacks.ReduceLROnPlateau(**config["reduce_lr"])
+    callbacks = [
+        tf.keras.callbacks.ModelCheckpoint(last_path),
+        tf.keras.callbacks.ModelCheckpoint(
+            best_path, monitor=monitor, save_best_only=True,
+            initial_value_threshold=state.get("early_stopping", {}).get("best"),
+        ),
+        early_stopping,
+    ]
+    if reduce_lr is not None:
+        callbacks.append(reduce_lr)
+    callbacks += [
+        tf.keras.callbacks.CSVLogger(os.path.join(run_path, "history.csv"), append=bool(state)),
+        make_resume_state_callback(state_path, early_stopping, reduce_lr, best_path, state),
+    ]
+
+    initial_epoch = state.get("epoch", 0)
+    start_time = time.perf_counter()
+    if initial_epoch < config["epochs"]:
+        model.fit(
+            train_ds, validation_data=val_ds, epochs=config["epochs"], initial_epoch=initial_epoch,
+            callbacks=callbacks,
+        )
+    train_seconds = time.perf_counter() - start_time
+
+    # Artefak akhir: bobot terbaik, dibangun ulang dalam float32 tanpa state
+    # optimizer, supaya bisa langsung dimuat oleh KerasEngine
+    best_model = tf.keras.models.load_model(best_path if os.path.exists(best_path) else last_path)
+    tf.keras.mixed_precision.set_global_policy("float32")
+    export_model = build_model(config, len(class_names))
+    export_model.set_weights(best_model.get_weights())
+    version = time.strftime("%Y%m%d-%H%M%S")
+    os.makedirs(output_dir, exist_ok=True)
+    artifact = os.path.join(output_dir, f"{config['name']}-{version}.keras")
+    export_model.save(artifact)  # disimpan sebelum compile: tanpa optimizer
+    export_model.compile(loss="categorical_crossentropy", metrics=["accuracy"])
+    val_loss, val_accuracy = export_model.evaluate(val_ds, verbose=0)
+    with open(state_path, encoding="utf-8") as f:
+        final_state = json.load(f)
+    metadata = build_manifest(
+        artifact, class_names, config["image_size"],
+        name=config["name"],
+        version=version,
+        architecture=config["architecture"],
+        metrics={"val_loss": float(val_loss), "val_accuracy": float(val_accuracy)},
+        epochs_trained=final_state["epoch"],
+        best_epoch=final_state["early_stopping"]["best_epoch"] + 1,
+        train_seconds=train_seconds,
+        tensorflow=tf.__version__,
+        config=config,
+    )
+    write_manifest(artifact, metadata)
+    return artifact, metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="configs/mobilenetv2.json")
+    parser.add_argument("--dataset", default=None, help="folder dataset atau dataset terpaket")
+    parser.add_argument("--epochs", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--weights", default=None, help='bobot awal MobileNetV2: "imagenet" atau "none"')
+    parser.add_argument("--mixed-precision", choices=["bfloat16", "none"], default=None)
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--inter-op-threads", type=int, default=None)
+    parser.add_argument("--no-onednn", action="store_true", help="matikan optimasi oneDNN")
+    parser.add_argument("--run-dir", default="runs", help="lokasi checkpoint")
+    parser.add_argument("--output-dir", default="models", help="lokasi artefak .keras + metadata")
+    parser.add_argument("--resume", action="store_true", help="lanjutkan dari checkpoint terakhir")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for key, value in (("dataset", args.dataset), ("epochs", args.epochs), ("batch_size", args.batch_size)):
+        if value is not None:
+            overrides[key] = value
+    if args.weights is not None:
+        overrides["weights"] = None if args.weights == "none" else args.weights
+    if args.mixed_precision is not None:
+        overrides["mixed_precision"] = None if args.mixed_precision == "none" else args.mixed_precision
+    threads = {}
+    if args.intra_op_threads is not None:
+        threads["intra_op"] = args.intra_op_threads
+    if args.inter_op_threads is not None:
+        threads["inter_op"] = args.inter_op_threads
+    if threads:
+        overrides["threads"] = threads
+    if args.no_onednn:
+        overrides["onednn"] = False
+
+    config = load_config(args.config, overrides)
+    artifact, metadata = train(config, args.run_dir, args.output_dir, args.resume)
+    print(f"✅ {artifact} (val_accuracy {metadata['metrics']['val_accuracy']:.4f}, "
+          f"epoch terbaik {metadata['best_epoch']}/{metadata['epochs_trained']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Pipeline data training berbasis tf.data (pengganti ImageDataGenerator.flow_from_directory).
+
+    from training_data import build_datasets
+    train_ds, val_ds, class_names = build_datasets("dataset", batch_size=16)
+    model.fit(train_ds, validation_data=val_ds, epochs=25)
+
+Decode JPEG/PNG berjalan paralel, hasil decode (uint8, sudah di-resize) di-cache
+ke file lokal sehingga epoch berikutnya tidak men-decode ulang, augmentasi
+dijalankan per batch dengan layer Keras, dan batch berikutnya disiapkan
+(prefetch) selagi model melatih batch sekarang.
+"""
+import hashlib
+import os
+import sys
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from config import IMAGE_SIZE
+from dataset import list_labelled_images
+from dataset_shards import ShardedDataset, is_packed
+
+AUTOTUNE = tf.data.AUTOTUNE
+CACHE_DIR = ".tf_cache"
+
+
+# Split train/validasi per kelas yang deterministik: setiap kelas diacak dengan
+# seed-nya sendiri, jadi hasil split sama di setiap run dan tidak berubah untuk
+# kelas lain saat satu kelas ditambah gambar. Berbeda dengan validation_split
+# ImageDataGenerator yang selalu mengambil file terakhir dari setiap folder.
+def stratified_split_indices(labels, validation_split=0.2, seed=42):
+    labels = np.asarray(labels)
+    train_idx, val_idx = [], []
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        np.random.default_rng([seed, int(label)]).shuffle(idx)
+        n_val = int(round(len(idx) * validation_split))
+        if validation_split > 0 and len(idx) > 1:
+            n_val = min(max(n_val, 1), len(idx) - 1)
+        val_idx.extend(idx[:n_val])
+        train_idx.extend(idx[n_val:])
+    return np.sort(np.asarray(train_idx, dtype=np.int64)), np.sort(np.asarray(val_idx, dtype=np.int64))
+
+
+def stratified_split(paths, labels, validation_split=0.2, seed=42):
+    labels = np.asarray(labels)
+    train_idx, val_idx = stratified_split_indices(labels, validation_split, seed)
+    train = ([paths[i] for i in train_idx], labels[train_idx].tolist())
+    val = ([paths[i] for i in val_idx], labels[val_idx].tolist())
+    return train, val
+
+
+# Augmentasi setara pengaturan notebook (rotation_range=20, zoom_range=0.2,
+# horizontal_flip=True, fill_mode='nearest'), dijalankan per batch
+def augmentation_layers(rotation=20, zoom=0.2, horizontal_flip=True, seed=None):
+    layers = []
+    if horizontal_flip:
+        layers.append(tf.keras.layers.RandomFlip("horizontal", seed=seed))
+    if rotation:
+        layers.append(tf.keras.layers.RandomRotation(rotation / 360.0, fill_mode="nearest", seed=seed))
+    if zoom:
+        layers.append(tf.keras.layers.RandomZoom(zoom, fill_mode="nearest", seed=seed))
+    return tf.keras.Sequential(layers, name="augmentation")
+
+
+# Decode + resize satu file ke uint8 (H, W, 3). Resize bicubic dengan antialias
+# mendekati Image.resize di preprocessing.load_image yang dipakai saat inferensi.
+def decode_image(path, size=IMAGE_SIZE):
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, (size[1], size[0]), method="bicubic", antialias=True)
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+
+# Dataset (gambar uint8, label int) dari daftar file, decode paralel. File
+# yang tetap gagal di-decode walau lolos unreadable_images (mis. JPEG
+# terpotong) dilewati dengan peringatan, bukan menghentikan training.
+def image_dataset(paths, labels, size=IMAGE_SIZE):
+    ds = tf.data.Dataset.from_tensor_slices((tf.constant(list(paths), tf.string), np.asarray(labels, dtype=np.int32)))
+    ds = ds.map(lambda path, label: (decode_image(path, size), label), num_parallel_calls=AUTOTUNE)
+    return ds.ignore_errors(log_warning=True)
+
+
+# File yang tidak bisa dibaca sebagai gambar (rusak, kosong, bukan gambar):
+# daftar (path, error). Hanya header dan struktur file yang diperiksa
+# (Image.verify), tanpa decode penuh.
+def unreadable_images(paths):
+    unreadable = []
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except Exception as e:
+            unreadable.append((path, str(e)))
+    return unreadable
+
+
+# Buang path yang ada di skip dari satu subset (paths, labels)
+def _without(skip, paths, labels):
+    keep = [i for i, path in enumerate(paths) if path not in skip]
+    return [paths[i] for i in keep], [labels[i] for i in keep]
+
+
+# Nama file cache unik per isi split dan ukuran gambar: menambah/menghapus
+# gambar atau mengganti IMAGE_SIZE otomatis memakai cache baru
+def cache_path(cache_dir, subset, paths, size):
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr(tuple(size)).encode())
+    for path in paths:
+        h.update(os.fsencode(path))
+        h.update(str(os.path.getmtime(path)).encode())
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f"{subset}-{size[0]}x{size[1]}-{h.hexdigest()}")
+
+
+# Ubah dataset (uint8, label) menjadi batch siap training: cache -> shuffle ->
+# batch -> skala 1/255 + one-hot -> augmentasi (opsional) -> prefetch
+def build_pipeline(ds, num_classes, batch_size=32, training=False, augmentation=None, seed=42, cache=None,
+                   shuffle_buffer=1024):
+    if cache is not None:
+        ds = ds.cache(cache)
+    if training and shuffle_buffer:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(
+        lambda x, y: (tf.cast(x, tf.float32) / 255.0, tf.one_hot(y, num_classes)),
+        num_parallel_calls=AUTOTUNE,
+    )
+    if training and augmentation is not None:
+        ds = ds.map(lambda x, y: (augmentation(x, training=True), y), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+# Dataset train dan validasi dari folder dataset/<kelas>/<gambar>. Urutan kelas
+# alfabetis, sama seperti flow_from_directory. cache_dir=None = cache di memori.
+# Jika root adalah dataset terpaket (dataset_shards.py), gambar dibaca dari
+# shard memory-map tanpa decode dan tanpa cache tambahan.
+def build_datasets(root="dataset", image_size=IMAGE_SIZE, batch_size=32, validation_split=0.2, seed=42,
+                   augment=True, cache_dir=CACHE_DIR, class_names=None):
+    augmentation = augmentation_layers(seed=seed) if augment else None
+    if is_packed(root):
+        return _build_packed_datasets(root, image_size, batch_size, validation_split, seed, augmentation, class_names)
+
+    paths, labels, class_names = list_labelled_images(root, class_names)
+    # Split dihitung dari semua file sebelum file rusak dibuang, jadi file rusak
+    # tidak menggeser gambar lain antara train dan validasi
+    (train_paths, train_labels), (val_paths, val_labels) = stratified_split(paths, labels, validation_split, seed)
+    unreadable = unreadable_images(paths)
+    if unreadable:
+        for path, error in unreadable:
+            print(f"⚠️ dilewati {path}: {error}", file=sys.stderr)
+        print(f"⚠️ {len(unreadable)} dari {len(paths)} gambar tidak bisa dibaca dan dilewati", file=sys.stderr)
+        skip = {path for path, _ in unreadable}
+        train_paths, train_labels = _without(skip, train_paths, train_labels)
+        val_paths, val_labels = _without(skip, val_paths, val_labels)
+
+    def cache_for(subset, subset_paths):
+        return cache_path(cache_dir, subset, subset_paths, image_size) if cache_dir else ""
+
+    train_ds = build_pipeline(
+        image_dataset(train_paths, train_labels, image_size), len(class_names), batch_size,
+        training=True, augmentation=augmentation, seed=seed, cache=cache_for("train", train_paths),
+        shuffle_buffer=max(len(train_paths), 1),
+    )
+    val_ds = build_pipeline(
+        image_dataset(val_paths, val_labels, image_size), len(class_names), batch_size,
+        cache=cache_for("validation", val_paths),
+    )
+    return train_ds, val_ds, class_names
+
+
+def _build_packed_datasets(root, image_size, batch_size, validation_split, seed, augmentation, class_names):
+    shards = ShardedDataset(root)
+    if class_names is not None and list(class_names) != shards.class_names:
+        raise ValueError(f"Urutan kelas tidak cocok dengan manifest {root}: {shards.class_names}")
+    if tuple(image_size) != shards.image_size:
+        raise ValueError(f"Dataset {root} dipaket dengan ukuran {shards.image_size}, bukan {tuple(image_size)}")
+    train_idx, val_idx = stratified_split_indices(shards.labels, validation_split, seed)
+    num_classes = len(shards.class_names)
+    # Urutan diacak di generator (per epoch), jadi tidak perlu shuffle buffer
+    train_ds = build_pipeline(
+        shards.to_tf_dataset(train_idx, shuffle=True, seed=seed), num_classes, batch_size,
+        training=True, augmentation=augmentation, seed=seed, shuffle_buffer=0,
+    )
+    val_ds = build_pipeline(shards.to_tf_dataset(val_idx), num_classes, batch_size)
+    return train_ds, val_ds, shards.class_names
@@ -0,0 +1,119 @@
+import math
+import os
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+import config
+from preprocessing import _tta_decode_size, load_image, tta_views
+
+# Tag EXIF Orientation -> transformasi supaya gambar tegak seperti di galeri HP
+EXIF_ORIENTATION = 0x0112
+_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+# Upload ditolak (terlalu besar, bukan gambar, dsb.); pesannya aman ditampilkan ke pengguna
+class UploadError(ValueError):
+    pass
+
+
+# Hasil membaca satu upload: thumbnail kecil untuk ditampilkan (juga sumber
+# view TTA dan overlay Grad-CAM) dan array uint8 seukuran input model.
+# Gambar resolusi penuh tidak disimpan.
+class Upload:
+    def __init__(self, thumbnail, array, original_size, decoded_size, byte_size):
+        self.thumbnail = thumbnail
+        self.array = array
+        self.original_size = original_size
+        self.decoded_size = decoded_size
+        self.byte_size = byte_size
+
+    # Sumber untuk predict_image: array siap pakai jika tanpa TTA dan ukuran
+    # input model sama, selain itu thumbnail (di-resize ulang oleh preprocessing)
+    def model_input(self, size, tta="none"):
+        if tta == "none" and self.array.shape[1::-1] == tuple(size):
+            return self.array
+        return self.thumbnail
+
+    # View (N, H, W, 3) untuk satu forward pass, seperti preprocessing.tta_views
+    def views(self, size, tta="none"):
+        source = self.model_input(size, tta)
+        if tta == "none":
+            return load_image(source, size)[np.newaxis]
+        return tta_views(source, size, tta)
+
+
+# Baca upload (path atau file-like, mis. hasil st.file_uploader) dengan memori
+# terbatas:
+# 1. ukuran file dicek sebelum apa pun di-decode (max_bytes);
+# 2. jumlah piksel dibaca dari header (max_pixels), jadi decompression bomb
+#    ditolak tanpa dialokasikan;
+# 3. JPEG di-decode lewat draft mode pada skala DCT terkecil yang masih cukup
+#    untuk thumbnail dan input model (termasuk crop TTA), lalu hasil decode
+#    dibatasi max_decode_pixels (PNG tidak bisa di-draft);
+# 4. orientasi EXIF diterapkan pada gambar yang sudah kecil;
+# 5. hasilnya satu thumbnail (sisi terpanjang maksimal thumbnail_size) dan
+#    satu array seukuran input model.
+def read_upload(file, size=config.IMAGE_SIZE, max_bytes=None, max_pixels=config.UPLOAD_MAX_PIXELS,
+                max_decode_pixels=config.UPLOAD_MAX_DECODE_PIXELS, thumbnail_size=config.UPLOAD_THUMBNAIL_PX):
+    max_bytes = max_bytes or int(config.UPLOAD_MAX_MB * 1024 * 1024)
+    byte_size = _byte_size(file)
+    if byte_size > max_bytes:
+        raise UploadError(f"file {byte_size / 1024 / 1024:.1f} MB melebihi batas {max_bytes / 1024 / 1024:g} MB")
+    try:
+        with Image.open(file) as img:
+            original_size = img.size
+            if original_size[0] * original_size[1] > max_pixels:
+                raise UploadError(f"gambar {original_size[0]}x{original_size[1]} melebihi batas "
+                                  f"{max_pixels / 1e6:g} megapiksel")
+            orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+            img.draft("RGB", _draft_size(original_size, size, thumbnail_size, orientation))
+            decoded_size = img.size
+            if decoded_size[0] * decoded_size[1] > max_decode_pixels:
+                raise UploadError(f"gambar {original_size[0]}x{original_size[1]} terlalu besar untuk format ini "
+                                  f"(maksimal {max_decode_pixels / 1e6:g} megapiksel, atau kirim sebagai JPEG)")
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise UploadError("bukan file gambar yang didukung" if isinstance(e, UnidentifiedImageError) else str(e)) from e
+    except OSError as e:
+        raise UploadError(f"gambar rusak atau terpotong: {e}") from e
+
+    if orientation in _TRANSPOSE:
+        img = img.transpose(_TRANSPOSE[orientation])
+    array = load_image(img, size)
+    img.thumbnail((thumbnail_size, thumbnail_size), Image.BICUBIC)
+    return Upload(img, array, original_size, decoded_size, byte_size)
+
+
+def _byte_size(file):
+    size = getattr(file, "size", None)  # UploadedFile Streamlit
+    if size is not None:
+        return size
+    if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+        return os.path.getsize(file)
+    position = file.tell()
+    file.seek(0, 2)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+# Ukuran minimal hasil draft (lebar, tinggi) dalam orientasi file: cukup
+# untuk thumbnail dan untuk input model/crop TTA di kedua sumbu
+def _draft_size(original_size, size, thumbnail_size, orientation):
+    width, height = original_size
+    scale = min(1.0, thumbnail_size / max(width, height))
+    grid = _tta_decode_size(size, "crops")
+    if orientation in (5, 6, 7, 8):
+        grid = grid[::-1]
+    return max(math.ceil(width * scale), grid[0]), max(math.ceil(height * scale), grid[1])
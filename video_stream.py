@@ -0,0 +1,395 @@
+"""Klasifikasi video dan stream kamera menjadi timeline alat musik per segmen.
+
+Sumber boleh file video, indeks webcam ("0") atau URL stream (rtsp://, http://).
+Frame di-decode di thread background dan diambil sampelnya secara adaptif:
+jarang selama prediksi stabil, rapat lagi saat kelas berubah atau confidence
+turun. Frame sampel diprediksi per batch dengan model yang sama seperti
+aplikasi, dihaluskan dengan sliding window (detik), lalu digabung menjadi
+segmen: mulai, selesai, alat musik dan confidence rata-rata.
+
+Sumber live (webcam/URL, atau file dengan --realtime yang diputar pada
+kecepatan aslinya) memakai antrean frame terbatas: jika inferensi tertinggal,
+frame terlama dibuang supaya prediksi tetap mengikuti waktu nyata. File biasa
+dibaca secepat inferensi mampu, tanpa frame yang dibuang.
+
+Butuh opencv-python-headless untuk file video dan kamera; GIF/WebP animasi
+bisa dibaca dengan Pillow saja.
+
+    python video_stream.py pertunjukan.mp4 --output timeline.json
+    python video_stream.py pertunjukan.mp4 --realtime --model Model_CNN_Baru_Final.onnx
+    python video_stream.py 0 --max-seconds 30
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from PIL import Image
+
+import metrics
+from config import MODEL_PATH
+from preprocessing import BatchBuffer, load_image
+
+PILLOW_EXTENSIONS = (".gif", ".webp")
+
+FRAMES = metrics.REGISTRY.counter("classifier_video_frames_total",
+                                  "Frame video per status: decoded, sampled, dropped, predicted", ["state"])
+
+
+# Webcam (indeks angka) dan URL stream berjalan terus pada waktu nyata
+def is_live(source):
+    return str(source).isdigit() or "://" in str(source)
+
+
+def _import_cv2():
+    try:
+        import cv2
+    except ImportError:
+        raise RuntimeError("video dan kamera butuh OpenCV: pip install opencv-python-headless") from None
+    return cv2
+
+
+# Interval antar frame sampel memanjang (sampai 1/min_fps) selama prediksi
+# stabil dan yakin, dan langsung kembali ke 1/max_fps saat kelas berubah atau
+# confidence turun. should_sample dipanggil thread pembaca, update dipanggil
+# thread inferensi; interval cukup satu float, jadi tidak perlu lock.
+class AdaptiveSampler:
+    def __init__(self, min_fps=1.0, max_fps=5.0, growth=1.5):
+        self.shortest = 1.0 / max_fps
+        self.longest = 1.0 / min_fps
+        self.growth = growth
+        self.interval = self.shortest
+        self._last = None
+
+    def should_sample(self, timestamp):
+        if self._last is None or timestamp - self._last >= self.interval - 1e-6:
+            self._last = timestamp
+            return True
+        return False
+
+    def update(self, stable):
+        self.interval = min(self.interval * self.growth, self.longest) if stable else self.shortest
+
+
+# Rata-rata probabilitas frame dalam window_s detik terakhir. Berbasis waktu,
+# bukan jumlah frame, karena jarak antar frame sampel berubah-ubah.
+class TemporalSmoother:
+    def __init__(self, window_s=2.0):
+        self.window_s = window_s
+        self._items = deque()
+
+    def update(self, timestamp, probs):
+        self._items.append((timestamp, probs))
+        while self._items[0][0] <= timestamp - self.window_s:
+            self._items.popleft()
+        return np.mean([p for _, p in self._items], axis=0)
+
+    # Awal deretan frame terakhir di window yang prediksi mentahnya = index.
+    # Smoothing membuat pergantian kelas baru terlihat setelah sebagian window
+    # terisi; batas segmen dimundurkan ke frame pertama kelas baru itu.
+    def onset(self, index):
+        onset = self._items[-1][0]
+        for timestamp, probs in reversed(self._items):
+            if int(np.argmax(probs)) != index:
+                break
+            onset = timestamp
+        return onset
+
+
+# Segmen berurutan dengan kelas hasil smoothing yang sama. Confidence di bawah
+# min_confidence menjadi segmen tanpa kelas (None); segmen yang lebih pendek
+# dari min_segment_s digabung ke segmen sebelumnya.
+class Timeline:
+    def __init__(self, class_names, min_confidence=0.5, min_segment_s=1.0):
+        self.class_names = class_names
+        self.min_confidence = min_confidence
+        self.min_segment_s = min_segment_s
+        self._segments = []  # [kelas, mulai, selesai, jumlah confidence, jumlah frame]
+
+    # onset: awal sebenarnya jika kelas berganti di frame ini (TemporalSmoother.onset)
+    def add(self, timestamp, probs, onset=None):
+        index = int(np.argmax(probs))
+        confidence = float(probs[index])
+        label = self.class_names[index] if confidence >= self.min_confidence else None
+        if not self._segments or self._segments[-1][0] != label:
+            start = timestamp
+            if self._segments:
+                start = max(min(timestamp if onset is None else onset, timestamp), self._segments[-1][1])
+                self._segments[-1][2] = start
+            self._segments.append([label, start, timestamp, 0.0, 0])
+        segment = self._segments[-1]
+        segment[2] = timestamp
+        segment[3] += confidence
+        segment[4] += 1
+
+    def segments(self, end_s=None):
+        merged = []
+        for index, segment in enumerate(self._segments):
+            label, start, end, confidence, frames = segment
+            if index == len(self._segments) - 1 and end_s is not None:
+                end = max(end, end_s)
+            if merged and (merged[-1][0] == label or end - start < self.min_segment_s):
+                merged[-1][2] = end
+                merged[-1][3] += confidence
+                merged[-1][4] += frames
+            else:
+                merged.append([label, start, end, confidence, frames])
+        return [{
+            "start_s": round(start, 3),
+            "end_s": round(end, 3),
+            "class": label,
+            "confidence": confidence / frames,
+            "frames": frames,
+        } for label, start, end, confidence, frames in merged]
+
+
+# Thread pembaca: decode frame, ambil sampel, resize ke ukuran input model,
+# lalu masukkan ke antrean (timestamp detik, array uint8 (H, W, 3)). Diakhiri
+# None. Jika drop=True antrean tidak pernah memblokir: frame terlama dibuang.
+class FrameReader:
+    def __init__(self, source, size, sampler, queue_size=16, realtime=False):
+        self.source = source
+        self.size = tuple(size)
+        self.sampler = sampler
+        self.live = is_live(source)
+        self.realtime = realtime and not self.live
+        self.drop = self.live or realtime
+        self.queue = queue.Queue(queue_size)
+        self.fps = None
+        self.position = 0.0  # timestamp frame terakhir yang di-decode
+        self.error = None
+        self.counts = {"decoded": 0, "sampled": 0, "dropped": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="video-reader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        try:
+            while True:
+                self.queue.get_nowait()  # lepaskan put yang sedang menunggu
+        except queue.Empty:
+            pass
+        self._thread.join()
+
+    def _run(self):
+        started = time.monotonic()
+        frames = self._pillow_frames() if str(self.source).lower().endswith(PILLOW_EXTENSIONS) \
+            else self._opencv_frames()
+        try:
+            for timestamp, retrieve in frames:
+                self.counts["decoded"] += 1
+                self.position = timestamp
+                if self.realtime:
+                    delay = started + timestamp - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                if not self.sampler.should_sample(timestamp):
+                    continue
+                with metrics.timed("video_decode"):
+                    array = retrieve()
+                if array is None:
+                    continue
+                self.counts["sampled"] += 1
+                if not self._put((timestamp, array)):
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            frames.close()  # lepaskan VideoCapture / file
+            self._put(None)
+            for state in ("decoded", "sampled", "dropped"):
+                FRAMES.inc(self.counts[state], state=state)
+
+    # False jika pembacaan dihentikan (stop) sebelum item masuk antrean
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                if self.drop:
+                    self.queue.put_nowait(item)
+                else:
+                    self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.drop:
+                    try:
+                        self.queue.get_nowait()
+                        self.counts["dropped"] += 1
+                    except queue.Empty:
+                        pass
+        return False
+
+    # Frame yang tidak diambil sampel hanya di-grab, tanpa retrieve, resize
+    # dan konversi warna. Resize memakai INTER_AREA OpenCV sebelum BGR->RGB,
+    # lebih murah daripada lewat PIL untuk frame video beresolusi tinggi.
+    def _opencv_frames(self):
+        cv2 = _import_cv2()
+        capture = cv2.VideoCapture(int(self.source) if self.live and str(self.source).isdigit() else self.source)
+        if not capture.isOpened():
+            raise RuntimeError(f"tidak bisa membuka video {self.source}")
+        self.fps = capture.get(cv2.CAP_PROP_FPS) or None
+        started = time.monotonic()
+
+        def retrieve():
+            ok, frame = capture.retrieve()
+            if not ok:
+                return None
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        try:
+            index = 0
+            while not self._stop.is_set() and capture.grab():
+                if self.live or not self.fps:
+                    timestamp = time.monotonic() - started
+                else:
+                    timestamp = index / self.fps
+                index += 1
+                yield timestamp, retrieve
+        finally:
+            capture.release()
+
+    # GIF/WebP animasi: durasi per frame dari metadata (default 100 ms)
+    def _pillow_frames(self):
+        with Image.open(self.source) as img:
+            frame_count = getattr(img, "n_frames", 1)
+            timestamp = 0.0
+            for index in range(frame_count):
+                if self._stop.is_set():
+                    break
+                img.seek(index)
+                yield timestamp, lambda: load_image(img, self.size)
+                timestamp += img.info.get("duration", 100) / 1000.0
+            self.fps = frame_count / timestamp if timestamp else None
+
+
+# Klasifikasi satu sumber video sampai habis (atau max_seconds). Frame yang
+# sudah menunggu di antrean digabung menjadi satu batch (maksimal batch_size)
+# tanpa menunggu frame baru. on_prediction(timestamp, probs) dipanggil untuk
+# setiap frame dengan probabilitas yang sudah dihaluskan.
+def classify_stream(model, source, min_fps=1.0, max_fps=5.0, window_s=2.0, batch_size=8, queue_size=16,
+                    realtime=False, max_seconds=None, min_confidence=0.5, min_segment_s=1.0, on_prediction=None):
+    sampler = AdaptiveSampler(min_fps, max_fps)
+    smoother = TemporalSmoother(window_s)
+    timeline = Timeline(model.class_names, min_confidence, min_segment_s)
+    batch = BatchBuffer(batch_size, model.image_size)
+    reader = FrameReader(source, model.image_size, sampler, queue_size, realtime).start()
+    start_time = time.perf_counter()
+    predicted, batches, last_index, last_timestamp = 0, 0, None, 0.0
+    finished = False
+    try:
+        while not finished:
+            item = reader.queue.get()
+            if item is None:
+                break
+            timestamps = []
+            while item is not None:
+                timestamps.append(item[0])
+                batch.append(item[1])
+                if batch.full():
+                    break
+                try:
+                    item = reader.queue.get_nowait()
+                except queue.Empty:
+                    break
+                finished = item is None
+            with metrics.timed("inference"):
+                probs = model.predict_batch(batch.view())
+            batch.clear()
+            batches += 1
+            for timestamp, row in zip(timestamps, probs):
+                smoothed = smoother.update(timestamp, row)
+                index = int(np.argmax(smoothed))
+                sampler.update(stable=index == last_index and smoothed[index] >= min_confidence)
+                last_index = index
+                timeline.add(timestamp, smoothed, onset=smoother.onset(index))
+                if on_prediction is not None:
+                    on_prediction(timestamp, smoothed)
+            predicted += len(timestamps)
+            last_timestamp = timestamps[-1]
+            if max_seconds is not None and last_timestamp >= max_seconds:
+                break
+    finally:
+        reader.stop()
+        FRAMES.inc(predicted, state="predicted")
+    if reader.error is not None:
+        raise reader.error
+    elapsed = time.perf_counter() - start_time
+    # Durasi = akhir frame terakhir yang di-decode (file), atau frame terakhir yang diprediksi
+    if max_seconds is None and not reader.live:
+        duration = reader.position + (1.0 / reader.fps if reader.fps else 0.0)
+    else:
+        duration = last_timestamp
+    return {
+        "source": str(source),
+        "live": reader.live,
+        "realtime": reader.drop,
+        "fps": reader.fps,
+        "duration_s": duration,
+        "elapsed_s": elapsed,
+        "realtime_factor": duration / elapsed if elapsed else None,
+        "frames": {**reader.counts, "predicted": predicted},
+        "batches": batches,
+        "mean_batch_size": predicted / batches if batches else 0.0,
+        "timeline": timeline.segments(end_s=duration),
+    }
+
+
+def print_timeline(result, file=sys.stderr):
+    for segment in result["timeline"]:
+        label = segment["class"] or "(tidak yakin)"
+        print(f"{segment['start_s']:8.1f}s - {segment['end_s']:8.1f}s  {label:12}  "
+              f"{segment['confidence']:.1%}  ({segment['frames']} frame)", file=file)
+    frames = result["frames"]
+    print(f"\n{frames['decoded']} frame di-decode, {frames['sampled']} diambil sampel, "
+          f"{frames['dropped']} dibuang, {frames['predicted']} diprediksi dalam {result['batches']} batch; "
+          f"{result['realtime_factor'] or 0:.1f}x waktu nyata", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="file video, indeks webcam (mis. 0) atau URL stream")
+    parser.add_argument("-m", "--model", default=MODEL_PATH, help="path model atau manifest (.json)")
+    parser.add_argument("-o", "--output", default="-", help="file JSON timeline (default: stdout)")
+    parser.add_argument("--min-fps", type=float, default=1.0, help="sampling paling jarang saat prediksi stabil")
+    parser.add_argument("--max-fps", type=float, default=5.0, help="sampling paling rapat saat prediksi berubah")
+    parser.add_argument("--window", type=float, default=2.0, help="lebar sliding window smoothing (detik)")
+    parser.add_argument("-b", "--batch-size", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=16, help="frame sampel yang boleh menunggu inferensi")
+    parser.add_argument("--realtime", action="store_true",
+                        help="putar file pada kecepatan aslinya dan buang frame jika tertinggal (seperti kamera)")
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--min-confidence", type=float, default=0.5)
+    parser.add_argument("--min-segment", type=float, default=1.0, help="segmen lebih pendek digabung (detik)")
+    args = parser.parse_args(argv)
+
+    if not is_live(args.source) and not os.path.isfile(args.source):
+        parser.error(f"file {args.source} tidak ditemukan")
+    from inference import load_model
+
+    model = load_model(args.model)
+    result = classify_stream(
+        model, args.source, min_fps=args.min_fps, max_fps=args.max_fps, window_s=args.window,
+        batch_size=args.batch_size, queue_size=args.queue_size, realtime=args.realtime,
+        max_seconds=args.max_seconds, min_confidence=args.min_confidence, min_segment_s=args.min_segment,
+    )
+    result["model"] = model.metadata()
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print_timeline(result)
+
+
+if __name__ == "__main__":
+    main()